@@ -1,6 +1,6 @@
 import React, { useEffect, useState } from 'react';
 import { Link } from 'react-router-dom';
-import { getTickets } from '../services/api';
+import { getDashboardSummary, subscribeToTicketChanges } from '../services/api';
 import './Dashboard.css'; // Create this file for styling
 
 // Define a fixed set of statuses for summary cards
@@ -12,28 +12,86 @@ const PRIORITY_GROUPS = {
   Other: ['Low', 'Lowest', 'Undefined', null, ''], // Include null or empty for tickets without priority
 };
 
+// Builds card counts and priority groups from a list of tickets. Only used for
+// the placeholder data; real data arrives pre-aggregated from the backend.
+const summarizeTickets = (tickets) => {
+  const counts = {};
+  KEY_STATUSES.forEach(status => counts[status] = 0); // Initialize all key statuses to 0
+  tickets.forEach(ticket => {
+    if (KEY_STATUSES.includes(ticket.status)) {
+      counts[ticket.status]++;
+    } else {
+      // Optional: group unknown statuses under a generic key
+      counts['Other Statuses'] = (counts['Other Statuses'] || 0) + 1;
+    }
+  });
+
+  const groups = { P1: [], P2: [], Other: [] };
+  tickets.forEach(ticket => {
+    let assignedGroup = false;
+    for (const groupName in PRIORITY_GROUPS) {
+      if (PRIORITY_GROUPS[groupName].includes(ticket.priority)) {
+        groups[groupName].push(ticket);
+        assignedGroup = true;
+        break;
+      }
+    }
+    if (!assignedGroup) { // If no specific priority match, assign to 'Other'
+      groups.Other.push(ticket);
+    }
+  });
+
+  const groupCounts = {};
+  Object.keys(groups).forEach(group => groupCounts[group] = groups[group].length);
+  return { counts, groups, groupCounts };
+};
+
+// Maps the /dashboard/summary/ response onto the same shape as summarizeTickets.
+const fromSummary = (summary) => {
+  const counts = {};
+  KEY_STATUSES.forEach(status => counts[status] = 0);
+  Object.entries(summary.status_counts || {}).forEach(([status, count]) => {
+    if (KEY_STATUSES.includes(status)) {
+      counts[status] = count;
+    } else {
+      counts['Other Statuses'] = (counts['Other Statuses'] || 0) + count;
+    }
+  });
+
+  const groups = {};
+  const groupCounts = {};
+  Object.keys(PRIORITY_GROUPS).forEach(group => {
+    const entry = (summary.priority_groups || {})[group] || { count: 0, tickets: [] };
+    groups[group] = entry.tickets;
+    groupCounts[group] = entry.count;
+  });
+  return { counts, groups, groupCounts };
+};
+
 function Dashboard() {
-  const [tickets, setTickets] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
   const [summaryCounts, setSummaryCounts] = useState({});
   const [groupedTickets, setGroupedTickets] = useState({});
+  const [groupCounts, setGroupCounts] = useState({});
   const [openSections, setOpenSections] = useState({ P1: true, P2: true, Other: true });
 
   useEffect(() => {
-    const fetchDashboardData = async () => {
+    const fetchDashboardData = async (quiet = false) => {
       try {
-        setLoading(true);
-        console.log("Dashboard: Fetching tickets...");
-        const response = await getTickets();
-        
-        let fetchedTickets = [];
+        if (!quiet) {
+          setLoading(true);
+        }
+        console.log("Dashboard: Fetching summary...");
+        const response = await getDashboardSummary();
+
+        let summary;
         if (response && response.data) {
-          fetchedTickets = response.data;
+          summary = fromSummary(response.data);
         } else {
-          console.log("Dashboard: getTickets did not return data, using placeholder data.");
+          console.log("Dashboard: getDashboardSummary did not return data, using placeholder data.");
           // Placeholder data if API is not yet returning real data or fails
-          fetchedTickets = [
+          summary = summarizeTickets([
             { id: 1, jira_id: 'JIRA-101', title: 'Dashboard Bug Display', status: 'Ongoing', priority: 'Highest', assignee: 'Dev1', updated_date: '2024-05-01T10:00:00Z' },
             { id: 2, jira_id: 'JIRA-102', title: 'User Login Issue', status: 'Triage Pending', priority: 'High', assignee: 'Dev2', updated_date: '2024-05-02T11:00:00Z' },
             { id: 3, jira_id: 'JIRA-103', title: 'Setup CI/CD Pipeline', status: 'Waiting', priority: 'Medium', assignee: 'DevOps', updated_date: '2024-04-28T15:00:00Z' },
@@ -44,56 +102,43 @@ function Dashboard() {
             { id: 8, jira_id: 'JIRA-108', title: 'Refactor Legacy Code Module', status: 'In Progress', priority: 'Medium', assignee: 'Dev2', updated_date: '2024-05-02T16:00:00Z' },
             { id: 9, jira_id: 'JIRA-109', title: 'Fix Typo on Homepage', status: 'Resolved', priority: 'Lowest', assignee: 'Dev1', updated_date: '2024-04-25T17:00:00Z' },
             { id: 10, jira_id: 'JIRA-110', title: 'Server Upgrade', status: 'Closed', priority: null, assignee: 'SysAdmin', updated_date: '2024-04-20T10:00:00Z' },
-          ];
+          ]);
         }
-        setTickets(fetchedTickets);
-
-        // Calculate summary counts
-        const counts = {};
-        KEY_STATUSES.forEach(status => counts[status] = 0); // Initialize all key statuses to 0
-        fetchedTickets.forEach(ticket => {
-          if (KEY_STATUSES.includes(ticket.status)) {
-            counts[ticket.status]++;
-          } else {
-            // Optional: group unknown statuses under a generic key
-            counts['Other Statuses'] = (counts['Other Statuses'] || 0) + 1;
-          }
-        });
-        setSummaryCounts(counts);
-
-        // Group tickets by priority
-        const groups = { P1: [], P2: [], Other: [] };
-        fetchedTickets.forEach(ticket => {
-          let assignedGroup = false;
-          for (const groupName in PRIORITY_GROUPS) {
-            if (PRIORITY_GROUPS[groupName].includes(ticket.priority)) {
-              groups[groupName].push(ticket);
-              assignedGroup = true;
-              break;
-            }
-          }
-          if (!assignedGroup) { // If no specific priority match, assign to 'Other'
-            groups.Other.push(ticket);
-          }
-        });
-        setGroupedTickets(groups);
+        setSummaryCounts(summary.counts);
+        setGroupedTickets(summary.groups);
+        setGroupCounts(summary.groupCounts);
         setError(null);
       } catch (err) {
-        console.error('Dashboard: Failed to fetch tickets:', err);
+        console.error('Dashboard: Failed to fetch summary:', err);
         setError('Failed to load dashboard data. Please try again later.');
-        // Set placeholder data on error
-        setTickets([
-            { id: 1, jira_id: 'ERR-101', title: 'Error Loading Ticket 1', status: 'Error', priority: 'Unknown', assignee: 'N/A', updated_date: new Date().toISOString() },
-            { id: 2, jira_id: 'ERR-102', title: 'Error Loading Ticket 2', status: 'Error', priority: 'Unknown', assignee: 'N/A', updated_date: new Date().toISOString() },
-        ]);
         setSummaryCounts(KEY_STATUSES.reduce((acc, st) => ({...acc, [st]: 0}), {}));
         setGroupedTickets({ P1: [], P2: [], Other: [] });
+        setGroupCounts({ P1: 0, P2: 0, Other: 0 });
       } finally {
         setLoading(false);
       }
     };
 
     fetchDashboardData();
+
+    // The summary is aggregated server-side, so ticket changes trigger a quiet
+    // refetch of it, at most once per burst of events.
+    let refreshTimer = null;
+    const unsubscribe = subscribeToTicketChanges((event) => {
+      if (event.type.startsWith('comment.') || refreshTimer) {
+        return;
+      }
+      refreshTimer = setTimeout(() => {
+        refreshTimer = null;
+        fetchDashboardData(true);
+      }, 1000);
+    });
+    return () => {
+      clearTimeout(refreshTimer);
+      if (unsubscribe) {
+        unsubscribe();
+      }
+    };
   }, []);
 
   const toggleSection = (section) => {
@@ -132,7 +177,7 @@ function Dashboard() {
         {Object.keys(groupedTickets).map(priorityGroup => (
           <div key={priorityGroup} className="priority-section">
             <h3 onClick={() => toggleSection(priorityGroup)} style={{cursor: 'pointer'}}>
-              {priorityGroup} Tickets ({groupedTickets[priorityGroup].length}) {openSections[priorityGroup] ? '▼' : '►'}
+              {priorityGroup} Tickets ({groupCounts[priorityGroup]}) {openSections[priorityGroup] ? '▼' : '►'}
             </h3>
             {openSections[priorityGroup] && groupedTickets[priorityGroup].length > 0 && (
               <table>
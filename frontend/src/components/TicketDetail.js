@@ -118,8 +118,9 @@ function TicketDetail() {
     return <p>No ticket data available for ID: {id}.</p>;
   }
 
-  // Fallback for comments if not present
+  // Fallback for comments if not present. Detail responses only embed the latest few.
   const comments = ticket.comments || [];
+  const commentCount = ticket.comment_count ?? comments.length;
 
   return (
     <div className="ticket-detail-container">
@@ -169,7 +170,10 @@ function TicketDetail() {
       </div>
 
       <div className="ticket-comments">
-        <h3>Comments ({comments.length})</h3>
+        <h3>Comments ({commentCount})</h3>
+        {commentCount > comments.length && (
+          <p className="comments-truncated">Showing the latest {comments.length} of {commentCount} comments.</p>
+        )}
         {comments.length > 0 ? (
           <ul>
             {comments.map(comment => (
@@ -1,57 +1,166 @@
-import React, { useEffect, useState, useMemo } from 'react';
+import React, { useCallback, useEffect, useRef, useState } from 'react';
 import { Link } from 'react-router-dom';
-import { getTickets } from '../services/api';
+import { getTicketById, getTickets, subscribeToTicketChanges } from '../services/api';
 import './TicketList.css'; // Create this for styling
 
+// How long typing in a filter pauses before the list is reloaded with it.
+const FILTER_DELAY_MS = 300;
+
+// The server-side filters for the list: exact matches, comma-separated for several values.
+const filterParams = (status, assignee) => {
+  const params = {};
+  if (status.trim()) {
+    params.status = status.trim();
+  }
+  if (assignee.trim()) {
+    params.assignee = assignee.trim();
+  }
+  return params;
+};
+
+const sameParams = (a, b) => JSON.stringify(a) === JSON.stringify(b);
+
+// Whether a ticket passes the filters the list was loaded with, as the server would decide.
+const matchesFilters = (ticket, params) => Object.entries(params).every(
+  ([field, value]) => value.split(',').map(v => v.trim()).includes(ticket[field])
+);
+
+// The cursor of the list's `next` link, or null on the last page.
+const cursorOf = (next) => {
+  if (!next) {
+    return null;
+  }
+  try {
+    return new URL(next, window.location.origin).searchParams.get('cursor');
+  } catch (err) {
+    return null;
+  }
+};
+
 function TicketList() {
   const [tickets, setTickets] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [error, setError] = useState(null);
   const [statusFilter, setStatusFilter] = useState('');
   const [assigneeFilter, setAssigneeFilter] = useState('');
+  const [filters, setFilters] = useState({});
+  // Numbers each (re)load; responses to a superseded one are dropped.
+  const loadId = useRef(0);
+  const filtersRef = useRef(filters);
 
-  useEffect(() => {
-    const fetchTickets = async () => {
-      try {
-        setLoading(true);
-        console.log("TicketList: Fetching tickets...");
-        const response = await getTickets();
-        
-        if (response && response.data) {
-          setTickets(response.data);
-        } else {
-          console.log("TicketList: getTickets did not return data, using placeholder data.");
-          setTickets([
-            { id: 1, jira_id: 'JIRA-101', title: 'Dashboard Bug Display', status: 'Ongoing', priority: 'Highest', assignee: 'Dev1', updated_date: '2024-05-01T10:00:00Z' },
-            { id: 2, jira_id: 'JIRA-102', title: 'User Login Issue', status: 'Triage Pending', priority: 'High', assignee: 'Dev2', updated_date: '2024-05-02T11:00:00Z' },
-            { id: 3, jira_id: 'JIRA-103', title: 'Setup CI/CD Pipeline', status: 'Waiting', priority: 'Medium', assignee: 'DevOps', updated_date: '2024-04-28T15:00:00Z' },
-            { id: 4, jira_id: 'JIRA-104', title: 'Documentation Update', status: 'Done', priority: 'Low', assignee: 'TechWriter', updated_date: '2024-04-30T09:00:00Z' },
-            { id: 5, jira_id: 'JIRA-105', title: 'Feature Request X - Rejected', status: 'Rejected', priority: 'Medium', assignee: 'ProductOwner', updated_date: '2024-04-29T12:00:00Z' },
-          ]);
-        }
-        setError(null);
-      } catch (err) {
-        console.error('TicketList: Failed to fetch tickets:', err);
-        setError('Failed to load tickets. Please try again later.');
+  const loadTickets = useCallback(async (params) => {
+    const id = ++loadId.current;
+    try {
+      console.log("TicketList: Fetching tickets...", params);
+      const response = await getTickets(params);
+      if (id !== loadId.current) {
+        return;
+      }
+
+      if (response && response.data) {
+        // Paginated responses wrap the page in `results`; `next` leads to the following one.
+        const page = Array.isArray(response.data) ? { results: response.data, next: null } : response.data;
+        setTickets(page.results);
+        setNextCursor(cursorOf(page.next));
+      } else {
+        console.log("TicketList: getTickets did not return data, using placeholder data.");
         setTickets([
-            { id: 1, jira_id: 'ERR-1', title: 'Failed Load Ticket 1', status: 'Error', priority: 'Unknown', assignee: 'N/A', updated_date: new Date().toISOString() },
+          { id: 1, jira_id: 'JIRA-101', title: 'Dashboard Bug Display', status: 'Ongoing', priority: 'Highest', assignee: 'Dev1', updated_date: '2024-05-01T10:00:00Z' },
+          { id: 2, jira_id: 'JIRA-102', title: 'User Login Issue', status: 'Triage Pending', priority: 'High', assignee: 'Dev2', updated_date: '2024-05-02T11:00:00Z' },
+          { id: 3, jira_id: 'JIRA-103', title: 'Setup CI/CD Pipeline', status: 'Waiting', priority: 'Medium', assignee: 'DevOps', updated_date: '2024-04-28T15:00:00Z' },
+          { id: 4, jira_id: 'JIRA-104', title: 'Documentation Update', status: 'Done', priority: 'Low', assignee: 'TechWriter', updated_date: '2024-04-30T09:00:00Z' },
+          { id: 5, jira_id: 'JIRA-105', title: 'Feature Request X - Rejected', status: 'Rejected', priority: 'Medium', assignee: 'ProductOwner', updated_date: '2024-04-29T12:00:00Z' },
         ]);
-      } finally {
+        setNextCursor(null);
+      }
+      setError(null);
+    } catch (err) {
+      if (id !== loadId.current) {
+        return;
+      }
+      console.error('TicketList: Failed to fetch tickets:', err);
+      setError('Failed to load tickets. Please try again later.');
+      setTickets([
+          { id: 1, jira_id: 'ERR-1', title: 'Failed Load Ticket 1', status: 'Error', priority: 'Unknown', assignee: 'N/A', updated_date: new Date().toISOString() },
+      ]);
+    } finally {
+      if (id === loadId.current) {
         setLoading(false);
       }
-    };
-
-    fetchTickets();
+    }
   }, []);
 
-  const filteredTickets = useMemo(() => {
-    return tickets.filter(ticket => {
-      const statusMatch = statusFilter ? ticket.status && ticket.status.toLowerCase().includes(statusFilter.toLowerCase()) : true;
-      const assigneeMatch = assigneeFilter ? ticket.assignee && ticket.assignee.toLowerCase().includes(assigneeFilter.toLowerCase()) : true;
-      return statusMatch && assigneeMatch;
+  // Filters are applied by the server, so they cover every page, not just the loaded ones.
+  useEffect(() => {
+    const timer = setTimeout(() => {
+      const params = filterParams(statusFilter, assigneeFilter);
+      setFilters(prev => (sameParams(prev, params) ? prev : params));
+    }, FILTER_DELAY_MS);
+    return () => clearTimeout(timer);
+  }, [statusFilter, assigneeFilter]);
+
+  useEffect(() => {
+    filtersRef.current = filters;
+    loadTickets(filters);
+  }, [filters, loadTickets]);
+
+  useEffect(() => {
+    // Apply changes as they stream in rather than reloading the whole list.
+    const unsubscribe = subscribeToTicketChanges(async (event) => {
+      if (event.type === 'reset') {
+        loadTickets(filtersRef.current);
+      } else if (event.type === 'ticket.deleted') {
+        setTickets(prev => prev.filter(ticket => ticket.id !== event.ticket));
+      } else if (event.type === 'ticket.created' || event.type === 'ticket.updated') {
+        try {
+          const response = await getTicketById(event.jira_id);
+          if (response && response.data) {
+            const changed = response.data;
+            if (!matchesFilters(changed, filtersRef.current)) {
+              // Changed out of the filtered list.
+              setTickets(prev => prev.filter(ticket => ticket.id !== changed.id));
+              return;
+            }
+            setTickets(prev => prev.some(ticket => ticket.id === changed.id)
+              ? prev.map(ticket => (ticket.id === changed.id ? changed : ticket))
+              : [changed, ...prev]);
+          }
+        } catch (err) {
+          console.error(`TicketList: Failed to fetch changed ticket ${event.jira_id}:`, err);
+        }
+      }
     });
-  }, [tickets, statusFilter, assigneeFilter]);
+    return () => {
+      if (unsubscribe) {
+        unsubscribe();
+      }
+    };
+  }, [loadTickets]);
 
+  const loadMore = async () => {
+    const id = loadId.current;
+    setLoadingMore(true);
+    try {
+      const response = await getTickets({ ...filtersRef.current, cursor: nextCursor });
+      if (id !== loadId.current) {
+        return;
+      }
+      // A ticket streamed in meanwhile may show up again on a later page.
+      setTickets(prev => {
+        const seen = new Set(prev.map(ticket => ticket.id));
+        return [...prev, ...response.data.results.filter(ticket => !seen.has(ticket.id))];
+      });
+      setNextCursor(cursorOf(response.data.next));
+    } catch (err) {
+      console.error('TicketList: Failed to load more tickets:', err);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  // Only the first load shows this; filter reloads keep the list and inputs on screen.
   if (loading) {
     return <p>Loading tickets...</p>;
   }
@@ -68,18 +177,20 @@ function TicketList() {
         <input 
           type="text" 
           placeholder="Filter by status..." 
+          title="Exact status; separate several with commas"
           value={statusFilter} 
           onChange={(e) => setStatusFilter(e.target.value)} 
         />
         <input 
           type="text" 
           placeholder="Filter by assignee..." 
+          title="Exact assignee name; separate several with commas"
           value={assigneeFilter} 
           onChange={(e) => setAssigneeFilter(e.target.value)} 
         />
       </div>
 
-      {filteredTickets.length > 0 ? (
+      {tickets.length > 0 ? (
         <table className="ticket-table">
           <thead>
             <tr>
@@ -92,7 +203,7 @@ function TicketList() {
             </tr>
           </thead>
           <tbody>
-            {filteredTickets.map(ticket => (
+            {tickets.map(ticket => (
               <tr key={ticket.id || ticket.jira_id}>
                 <td>
                   <Link to={`/tickets/${ticket.jira_id || ticket.id}`}>
@@ -111,6 +222,12 @@ function TicketList() {
       ) : (
         <p>No tickets found matching your criteria.</p>
       )}
+
+      {nextCursor && (
+        <button className="load-more" onClick={loadMore} disabled={loadingMore}>
+          {loadingMore ? 'Loading...' : 'Load more'}
+        </button>
+      )}
     </div>
   );
 }
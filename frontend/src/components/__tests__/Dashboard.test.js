@@ -23,22 +23,39 @@ const mockTicketsData = [
 // Defined in Dashboard.js
 const KEY_STATUSES = ["Ongoing", "Triage Pending", "Waiting", "Done", "Rejected", "Open", "In Progress", "Resolved", "Closed"];
 
+// Builds the /api/dashboard/summary/ response the backend would return for `tickets`.
+const toSummary = (tickets) => {
+  const groupOf = (priority) => {
+    if (['Highest', 'High'].includes(priority)) return 'P1';
+    if (priority === 'Medium') return 'P2';
+    return 'Other';
+  };
+  const statusCounts = {};
+  const priorityGroups = { P1: { count: 0, tickets: [] }, P2: { count: 0, tickets: [] }, Other: { count: 0, tickets: [] } };
+  tickets.forEach(ticket => {
+    statusCounts[ticket.status] = (statusCounts[ticket.status] || 0) + 1;
+    priorityGroups[groupOf(ticket.priority)].count++;
+    priorityGroups[groupOf(ticket.priority)].tickets.push(ticket);
+  });
+  return { total: tickets.length, status_counts: statusCounts, priority_groups: priorityGroups };
+};
+
 describe('Dashboard Component', () => {
   beforeEach(() => {
-    api.getTickets.mockClear();
+    api.getDashboardSummary.mockClear();
   });
 
   test('renders loading state initially', () => {
-    api.getTickets.mockReturnValue(new Promise(() => {})); // Never resolves
+    api.getDashboardSummary.mockReturnValue(new Promise(() => {})); // Never resolves
     render(<MemoryRouter><Dashboard /></MemoryRouter>);
     expect(screen.getByText(/loading dashboard.../i)).toBeInTheDocument();
   });
 
-  test('calls api.getTickets on mount and displays summary cards and ticket tables', async () => {
-    api.getTickets.mockResolvedValue({ data: mockTicketsData });
+  test('calls api.getDashboardSummary on mount and displays summary cards and ticket tables', async () => {
+    api.getDashboardSummary.mockResolvedValue({ data: toSummary(mockTicketsData) });
     render(<MemoryRouter><Dashboard /></MemoryRouter>);
 
-    expect(api.getTickets).toHaveBeenCalledTimes(1);
+    expect(api.getDashboardSummary).toHaveBeenCalledTimes(1);
 
     // Wait for loading to complete and data to be processed
     await waitFor(() => {
@@ -80,8 +97,8 @@ describe('Dashboard Component', () => {
     });
   });
 
-  test('displays error message if api.getTickets fails', async () => {
-    api.getTickets.mockRejectedValue(new Error('Failed to fetch'));
+  test('displays error message if api.getDashboardSummary fails', async () => {
+    api.getDashboardSummary.mockRejectedValue(new Error('Failed to fetch'));
     render(<MemoryRouter><Dashboard /></MemoryRouter>);
 
     await waitFor(() => {
@@ -89,8 +106,8 @@ describe('Dashboard Component', () => {
     });
   });
 
-  test('uses placeholder data if api.getTickets returns no data', async () => {
-    api.getTickets.mockResolvedValue({ data: null }); // Simulate API returning null/undefined data
+  test('uses placeholder data if api.getDashboardSummary returns no data', async () => {
+    api.getDashboardSummary.mockResolvedValue({ data: null }); // Simulate API returning null/undefined data
     render(<MemoryRouter><Dashboard /></MemoryRouter>);
 
     await waitFor(() => {
@@ -104,7 +121,7 @@ describe('Dashboard Component', () => {
   
   test('collapsible sections can be toggled', async () => {
     const user = userEvent.setup();
-    api.getTickets.mockResolvedValue({ data: mockTicketsData });
+    api.getDashboardSummary.mockResolvedValue({ data: toSummary(mockTicketsData) });
     render(<MemoryRouter><Dashboard /></MemoryRouter>);
 
     // Wait for initial rendering
@@ -141,7 +158,7 @@ describe('Dashboard Component', () => {
     const noP1Tickets = mockTicketsData.filter(
       ticket => !['Highest', 'High'].includes(ticket.priority)
     );
-    api.getTickets.mockResolvedValue({ data: noP1Tickets });
+    api.getDashboardSummary.mockResolvedValue({ data: toSummary(noP1Tickets) });
     render(<MemoryRouter><Dashboard /></MemoryRouter>);
 
     await waitFor(() => {
@@ -14,6 +14,15 @@ const mockTicketsData = [
   { id: 4, jira_id: 'JIRA-004', title: 'Fix CSS on Homepage', status: 'Closed', priority: 'Medium', assignee: 'Charlie', updated_date: '2024-04-28T15:00:00Z' },
 ];
 
+// Answers getTickets like the server: exact-match filters, one page.
+const serveTickets = (params = {}) => Promise.resolve({
+  data: {
+    next: null,
+    results: mockTicketsData.filter(ticket =>
+      (!params.status || ticket.status === params.status) && (!params.assignee || ticket.assignee === params.assignee)),
+  },
+});
+
 describe('TicketList Component', () => {
   beforeEach(() => {
     api.getTickets.mockClear();
@@ -81,7 +90,7 @@ describe('TicketList Component', () => {
 
   test('filters tickets by status', async () => {
     const user = userEvent.setup();
-    api.getTickets.mockResolvedValue({ data: mockTicketsData });
+    api.getTickets.mockImplementation(serveTickets);
     render(<MemoryRouter><TicketList /></MemoryRouter>);
 
     await waitFor(() => { // Wait for initial load
@@ -97,6 +106,8 @@ describe('TicketList Component', () => {
       expect(screen.queryByText('Feature: User Profile')).not.toBeInTheDocument(); // In Progress
       expect(screen.queryByText('Fix CSS on Homepage')).not.toBeInTheDocument(); // Closed
     });
+    // Filtered by the server, once typing pauses.
+    expect(api.getTickets).toHaveBeenLastCalledWith({ status: 'Open' });
     
     // Clear filter
     await user.clear(statusFilterInput);
@@ -110,7 +121,7 @@ describe('TicketList Component', () => {
 
   test('filters tickets by assignee', async () => {
     const user = userEvent.setup();
-    api.getTickets.mockResolvedValue({ data: mockTicketsData });
+    api.getTickets.mockImplementation(serveTickets);
     render(<MemoryRouter><TicketList /></MemoryRouter>);
 
     await waitFor(() => {
@@ -130,7 +141,7 @@ describe('TicketList Component', () => {
 
   test('filters tickets by both status and assignee', async () => {
     const user = userEvent.setup();
-    api.getTickets.mockResolvedValue({ data: mockTicketsData });
+    api.getTickets.mockImplementation(serveTickets);
     render(<MemoryRouter><TicketList /></MemoryRouter>);
     
     await waitFor(() => {
@@ -166,7 +177,7 @@ describe('TicketList Component', () => {
 
   test('displays "No tickets found" message if filters result in empty list', async () => {
     const user = userEvent.setup();
-    api.getTickets.mockResolvedValue({ data: mockTicketsData });
+    api.getTickets.mockImplementation(serveTickets);
     render(<MemoryRouter><TicketList /></MemoryRouter>);
     
     await waitFor(() => {
@@ -180,4 +191,53 @@ describe('TicketList Component', () => {
       expect(screen.getByText(/no tickets found matching your criteria/i)).toBeInTheDocument();
     });
   });
+
+  test('loads further pages by following the next cursor', async () => {
+    const user = userEvent.setup();
+    api.getTickets
+      .mockResolvedValueOnce({ data: { next: 'http://localhost:8000/api/tickets/?cursor=page2', results: mockTicketsData.slice(0, 2) } })
+      .mockResolvedValueOnce({ data: { next: null, results: mockTicketsData.slice(2) } });
+    render(<MemoryRouter><TicketList /></MemoryRouter>);
+
+    await waitFor(() => {
+      expect(screen.getByText('Bug in Login')).toBeInTheDocument();
+    });
+    expect(screen.queryByText('Fix CSS on Homepage')).not.toBeInTheDocument();
+
+    await user.click(screen.getByRole('button', { name: /load more/i }));
+
+    await waitFor(() => {
+      expect(screen.getByText('Fix CSS on Homepage')).toBeInTheDocument();
+    });
+    expect(screen.getByText('Bug in Login')).toBeInTheDocument();
+    expect(api.getTickets).toHaveBeenLastCalledWith({ cursor: 'page2' });
+    expect(screen.queryByRole('button', { name: /load more/i })).not.toBeInTheDocument();
+  });
+
+  test('applies streamed ticket changes without reloading the list', async () => {
+    let onEvent;
+    api.subscribeToTicketChanges.mockImplementation((handler) => {
+      onEvent = handler;
+      return jest.fn();
+    });
+    api.getTickets.mockResolvedValue({ data: mockTicketsData });
+    api.getTicketById.mockResolvedValue({ data: { ...mockTicketsData[0], title: 'Bug in Login (fixed)', status: 'Closed' } });
+    render(<MemoryRouter><TicketList /></MemoryRouter>);
+
+    await waitFor(() => {
+      expect(screen.getByText('Bug in Login')).toBeInTheDocument();
+    });
+
+    onEvent({ type: 'ticket.updated', ticket: 1, jira_id: 'JIRA-001', project: 1 });
+    await waitFor(() => {
+      expect(screen.getByText('Bug in Login (fixed)')).toBeInTheDocument();
+    });
+    expect(api.getTicketById).toHaveBeenCalledWith('JIRA-001');
+
+    onEvent({ type: 'ticket.deleted', ticket: 2, jira_id: 'JIRA-002', project: 1 });
+    await waitFor(() => {
+      expect(screen.queryByText('Feature: User Profile')).not.toBeInTheDocument();
+    });
+    expect(api.getTickets).toHaveBeenCalledTimes(1);
+  });
 });
@@ -19,9 +19,19 @@ apiClient.interceptors.request.use(config => {
   return Promise.reject(error);
 });
 
-export const getTickets = () => {
-  console.log('API: Fetching all tickets...');
-  return apiClient.get('tickets/');
+// The ticket list is keyset-paginated: the response is { next, results }.
+// Pass params such as { page_size: 100, fields: 'jira_id,title,status' }, or
+// follow `next` to load further pages.
+export const getTickets = (params = {}) => {
+  console.log('API: Fetching tickets...');
+  return apiClient.get('tickets/', { params });
+};
+
+// Status counts, priority-group counts and the most recent tickets per group,
+// computed server-side. Optional params: { project, assignee, top }.
+export const getDashboardSummary = (params = {}) => {
+  console.log('API: Fetching dashboard summary...');
+  return apiClient.get('dashboard/summary/', { params });
 };
 
 export const getTicketById = (id) => {
@@ -54,20 +64,32 @@ export const updateTicketStatus = (ticketId, data) => { // data should be an obj
 
 export const addTicketComment = (ticketId, commentData) => { // commentData should be an object e.g. { body: 'New comment' }
   console.log(`API: Adding comment to ticket ${ticketId}...`);
-  // As above, assuming ticketId is the PK.
-  // The backend endpoint for comments on a ticket might be nested, e.g., /api/tickets/{ticket_pk}/comments/
-  // Or it might be a top-level /api/comments/ with ticket_id in the payload.
-  // Assuming the DRF default router setup for a CommentViewSet might make it /api/comments/
-  // For this to work as tickets/{ticketId}/comments/, custom routing is needed on backend or adjustments here.
-  // Let's assume for now the backend is set up to accept POST on /api/comments/ and requires a ticket ID in payload.
-  // Or, if the backend is setup for nested routes like /tickets/{ticket_pk}/add_comment/
-  // This current implementation assumes /api/comments/ and that the serializer handles linking to the ticket.
-  // A more typical DRF approach for nested would be:
-  // return apiClient.post(`tickets/${ticketId}/comments/`, commentData);
-  // For now, let's create a new comment and assume it's linked via ticket ID in payload.
-  // This requires CommentSerializer to accept 'ticket' field (PK).
-  return apiClient.post(`comments/`, { ...commentData, ticket: ticketId });
+  // ticketId may be the database PK or the JIRA key; the nested route accepts either.
+  return apiClient.post(`tickets/${ticketId}/comments/`, commentData);
+};
+
+export const getTicketComments = (ticketId, cursor = null) => {
+  console.log(`API: Fetching comments for ticket ${ticketId}...`);
+  // Oldest first; follow `next` (or pass its cursor) for further pages.
+  return apiClient.get(`tickets/${ticketId}/comments/`, { params: cursor ? { cursor } : {} });
 };
 
+// Opens the ticket change stream (Server-Sent Events) and calls onEvent with each
+// change: { type, ticket, jira_id, project[, comment] }, type being e.g.
+// 'ticket.updated' or 'comment.created', or { type: 'reset' } when changes were
+// missed and everything should be reloaded. The browser reconnects by itself and
+// resumes after the last event seen. Optional params: { project }. Returns a
+// function that closes the stream.
+export const subscribeToTicketChanges = (onEvent, params = {}) => {
+  if (typeof EventSource === 'undefined') {
+    return () => {};
+  }
+  // EventSource can't send an Authorization header, so the token goes in the URL.
+  const token = localStorage.getItem('authToken');
+  const query = new URLSearchParams(token ? { ...params, token } : params);
+  const source = new EventSource(`${API_URL}tickets/stream/?${query}`);
+  source.onmessage = (message) => onEvent(JSON.parse(message.data));
+  return () => source.close();
+};
 
 export default apiClient;
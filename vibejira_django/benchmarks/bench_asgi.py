@@ -0,0 +1,197 @@
+"""
+Load-tests GET /api/tickets/{jira_id}/ against a slow JIRA stub, served by
+a thread pool over WSGI and by the event loop over ASGI.
+
+    python benchmarks/bench_asgi.py --requests 1000 --delay 2.0 --threads 32
+
+Misses ask for a different issue each, so every one waits `--delay` seconds
+on the stub; every `--hit-every`th request is a hit on a fresh local ticket
+instead. The WSGI run fetches in the request thread (like a sync worker
+with `--threads` threads); the ASGI run drives the ASGI application
+in-process with every request in flight at once.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import threading
+import time
+from datetime import timedelta
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from common import setup_django
+
+
+def issue(key):
+    return {
+        'key': key,
+        'fields': {
+            'summary': f'Summary of {key}', 'description': None,
+            'status': {'name': 'Open'}, 'priority': {'name': 'Medium'},
+            'project': {'key': key.split('-')[0], 'name': 'Load'},
+            'assignee': None, 'reporter': {'displayName': 'Reporter'},
+            'created': '2024-03-01T09:00:00.000+0000', 'updated': '2024-03-01T10:00:00.000+0000',
+            'duedate': None,
+        },
+    }
+
+
+def start_stub_jira(delay):
+    """
+    Serves GET /rest/api/3/issue/{key} after `delay` seconds, on an event
+    loop of its own so it can hold any number of slow requests.
+    """
+    ready = threading.Event()
+    address = {}
+
+    async def handle(reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                    pass
+                key = request_line.split()[1].decode().split('?')[0].rsplit('/', 1)[-1]
+                await asyncio.sleep(delay)
+                body = json.dumps(issue(key)).encode()
+                writer.write(
+                    b'HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n'
+                    b'Content-Length: ' + str(len(body)).encode() + b'\r\n\r\n' + body
+                )
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve():
+        server = await asyncio.start_server(handle, '127.0.0.1', 0, backlog=4096)
+        address['url'] = 'http://127.0.0.1:%d' % server.sockets[0].getsockname()[1]
+        ready.set()
+        await server.serve_forever()
+
+    threading.Thread(target=asyncio.run, args=(serve(),), daemon=True).start()
+    ready.wait()
+    return address['url']
+
+
+def report(label, keys, results, elapsed):
+    print(f"  {label}: {len(keys) / elapsed:.1f} req/s, {threading.active_count()} threads alive at the end")
+    for kind in ('miss', 'hit'):
+        latencies = sorted(latency for key, (latency, _) in zip(keys, results) if key.startswith('HIT') == (kind == 'hit'))
+        statuses = Counter(code for key, (_, code) in zip(keys, results) if key.startswith('HIT') == (kind == 'hit'))
+        print(
+            f"    {kind:<5} p50 {statistics.median(latencies) * 1000:7.0f} ms"
+            f"  p99 {latencies[max(0, int(len(latencies) * 0.99) - 1)] * 1000:7.0f} ms  statuses {dict(statuses)}"
+        )
+
+
+def run_wsgi(keys, token, threads):
+    from django.test import Client
+
+    local = threading.local()
+
+    def get(key):
+        if not hasattr(local, 'client'):
+            local.client = Client()
+        response = local.client.get(f'/api/tickets/{key}/', headers={'authorization': f'Token {token}'})
+        # Every request arrived at `start`; time spent queued for a thread counts.
+        return time.perf_counter() - start, response.status_code
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        results = list(pool.map(get, keys))
+    report(f"WSGI, {threads} threads", keys, results, time.perf_counter() - start)
+
+
+def run_asgi(keys, token):
+    from django.core.asgi import get_asgi_application
+
+    application = get_asgi_application()
+
+    async def get(key):
+        done = asyncio.Event()
+        sent = {}
+
+        async def receive():
+            if not sent:
+                sent['request'] = True
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+            await done.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                sent['status'] = message['status']
+            elif not message.get('more_body'):
+                done.set()
+
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+            'scheme': 'http', 'path': f'/api/tickets/{key}/', 'raw_path': f'/api/tickets/{key}/'.encode(),
+            'query_string': b'', 'root_path': '', 'server': ('testserver', 80), 'client': ('127.0.0.1', 0),
+            'headers': [(b'host', b'testserver'), (b'authorization', f'Token {token}'.encode())],
+        }
+        await application(scope, receive, send)
+        return time.perf_counter() - start, sent['status']
+
+    async def run_all():
+        return await asyncio.gather(*(get(key) for key in keys))
+
+    start = time.perf_counter()
+    results = asyncio.run(run_all())
+    report(f"ASGI, {len(keys)} in flight", keys, results, time.perf_counter() - start)
+
+
+def workload(prefix, requests, hit_every):
+    return ['HIT-1' if hit_every and i % hit_every == 0 else f'{prefix}-{i}' for i in range(requests)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--delay', type=float, default=1.0, help='seconds the JIRA stub takes per issue')
+    parser.add_argument('--threads', type=int, default=32, help='WSGI request threads')
+    parser.add_argument('--hit-every', type=int, default=10, help='every Nth request is a local hit (0 for none)')
+    args = parser.parse_args()
+
+    os.environ.update({'JIRA_BASE_URL': start_stub_jira(args.delay), 'JIRA_USER_EMAIL': 'bench@example.com', 'JIRA_PAT': 'pat'})
+    db_path = setup_django()
+    try:
+        from django.conf import settings
+        from django.contrib.auth.models import User
+        from django.utils import timezone
+        from rest_framework.authtoken.models import Token
+        from jira_integration.models import Project, Ticket
+
+        settings.ALLOWED_HOSTS = ['testserver']
+        # Requests store their tickets from many threads; make SQLite queue them for the
+        # write lock rather than fail transactions that read before writing.
+        settings.DATABASES['default'].setdefault('OPTIONS', {}).update(
+            timeout=120, transaction_mode='IMMEDIATE', init_command='PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;',
+        )
+        settings.JIRA_SYNC_COMMENTS = False
+        # Fetch in the request thread, as a sync worker would without the job queue.
+        settings.JOBS_EAGER = True
+        settings.JIRA_POOL_SIZE = args.threads
+        settings.JIRA_ASYNC_MAX_CONNECTIONS = args.requests
+        settings.TICKET_FETCH_WAIT = 60
+        token = Token.objects.create(user=User.objects.create_user(username='bench')).key
+        now = timezone.now()
+        Ticket.objects.create(
+            project=Project.objects.create(name='Hit', jira_key='HIT'), jira_id='HIT-1', title='Local',
+            status='Open', priority='High', created_date=now, updated_date=now, synced_at=now + timedelta(days=1),
+        )
+
+        print(f"{args.requests} ticket requests, JIRA answering misses in {args.delay:.2f}s:")
+        run_wsgi(workload('WSGI', args.requests, args.hit_every), token, args.threads)
+        run_asgi(workload('ASGI', args.requests, args.hit_every), token)
+    finally:
+        os.remove(db_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Counts the queries and times API requests authenticated with DRF's
+TokenAuthentication against CachingTokenAuthentication.
+
+    python benchmarks/bench_auth.py --users 100 --requests 2000
+
+Requests cycle through the users' tokens, like a pool of active clients.
+"""
+import argparse
+import os
+import time
+from unittest.mock import patch
+
+from common import setup_django
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    db_path = setup_django()
+    try:
+        from django.conf import settings
+        from django.contrib.auth.models import User
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from rest_framework.authentication import TokenAuthentication
+        from rest_framework.authtoken.models import Token
+        from rest_framework.test import APIClient
+        from jira_integration.authentication import CachingTokenAuthentication, token_cache
+        from jira_integration.views import TicketViewSet
+
+        settings.ALLOWED_HOSTS = ['testserver']
+        users = User.objects.bulk_create([User(username=f'bench{i}') for i in range(args.users)])
+        keys = [Token.objects.create(user=user).key for user in users]
+        client = APIClient()
+
+        print(f"{args.requests} GET /api/tickets/ requests over {args.users} tokens:")
+        for auth_class in (TokenAuthentication, CachingTokenAuthentication):
+            token_cache.clear()
+            with patch.object(TicketViewSet, 'authentication_classes', [auth_class]):
+                with CaptureQueriesContext(connection) as ctx:
+                    start = time.perf_counter()
+                    for i in range(args.requests):
+                        response = client.get('/api/tickets/', HTTP_AUTHORIZATION=f'Token {keys[i % len(keys)]}')
+                        assert response.status_code == 200, response.status_code
+                    elapsed = time.perf_counter() - start
+            auth_queries = sum('authtoken_token' in q['sql'] for q in ctx.captured_queries)
+            print(
+                f"  {auth_class.__name__:<28} {len(ctx.captured_queries) / args.requests:5.2f} queries/request"
+                f"  ({auth_queries} token lookups)  {elapsed / args.requests * 1000:6.2f} ms/request"
+            )
+    finally:
+        os.remove(db_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Compares what it costs a client to catch up after a few changes: reloading
+every ticket page by page, or asking /api/tickets/changes/ for what changed
+since its cursor.
+
+    python benchmarks/bench_changes.py --tickets 20000 --changed 20
+"""
+import argparse
+import os
+
+from bench_ticket_indexes import seed
+from common import setup_django, time_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tickets', type=int, default=20000)
+    parser.add_argument('--changed', type=int, default=20, help='tickets updated while the client was away')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    db_path = setup_django()
+    try:
+        from django.conf import settings
+        from django.contrib.auth.models import User
+        from rest_framework.test import APIClient
+        from jira_integration.models import Ticket, TicketChange
+
+        settings.ALLOWED_HOSTS = ['testserver']
+        settings.RESPONSE_CACHE_BACKEND = None
+        seed(args.tickets, projects=10, assignees=50, comments_per_ticket=0)
+        # seed() bulk-inserts without signals; log the tickets as the migration backfill would.
+        TicketChange.objects.bulk_create(
+            [TicketChange(ticket_id=pk, jira_id=jira_id) for pk, jira_id in Ticket.objects.values_list('pk', 'jira_id')],
+            batch_size=5000,
+        )
+        client = APIClient()
+        client.force_authenticate(user=User.objects.get(username='bench'))
+
+        cursor = None
+        while True:
+            data = client.get('/api/tickets/changes/', {'since': cursor} if cursor else {}).data
+            cursor = data['cursor']
+            if not data['has_more']:
+                break
+        for ticket in Ticket.objects.order_by('?')[:args.changed]:
+            ticket.status = 'Done'
+            ticket.save()
+
+        def reload_everything():
+            url, rows, size = '/api/tickets/?page_size=500', 0, 0
+            while url:
+                response = client.get(url)
+                rows += len(response.data['results'])
+                size += len(response.content)
+                url = response.data['next']
+            return rows, size
+
+        def catch_up():
+            response = client.get('/api/tickets/changes/', {'since': cursor})
+            return len(response.data['changes']), len(response.content)
+
+        print(f"{args.tickets} tickets, {args.changed} changed since the client's cursor:")
+        for label, fn in (('reload every page', reload_everything), ('changes since cursor', catch_up)):
+            rows, size = fn()
+            print(f"  {label:<22} {time_ms(fn, repeat=args.repeat):9.1f} ms  {rows:6d} tickets  {size / 1024:8.0f} KiB")
+    finally:
+        os.remove(db_path)
+
+
+if __name__ == '__main__':
+    main()
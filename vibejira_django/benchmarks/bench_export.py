@@ -0,0 +1,67 @@
+"""
+Measures peak Python memory and time of the streaming ticket export
+against serializing the same tickets in one list, as a non-streaming
+response would, for growing export sizes.
+
+    python benchmarks/bench_export.py --tickets 1000 10000 100000
+
+Streaming peak memory should stay flat as the export grows.
+"""
+import argparse
+import os
+import time
+import tracemalloc
+
+from common import setup_django
+from bench_ticket_indexes import seed
+
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed * 1000, peak / 2 ** 20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tickets', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--projects', type=int, default=20)
+    args = parser.parse_args()
+
+    db_path = setup_django()
+    try:
+        from jira_integration.export import export_response
+        from jira_integration.models import Ticket
+        from jira_integration.serializers import TicketSerializer
+
+        seed(max(args.tickets), args.projects, assignees=50, comments_per_ticket=0)
+
+        def stream(queryset, **options):
+            for _ in export_response(queryset, **options).streaming_content:
+                pass
+
+        def in_memory(queryset):
+            TicketSerializer(list(queryset.select_related('project')), many=True).data
+
+        print(f"{'tickets':>10}  {'mode':<22} {'time':>10}  {'peak memory':>12}")
+        for count in sorted(args.tickets):
+            queryset = Ticket.objects.filter(id__lte=count).order_by('-updated_date', '-id')
+            modes = {
+                'serialized list': lambda: in_memory(queryset),
+                'stream ndjson': lambda: stream(queryset),
+                'stream csv': lambda: stream(queryset, export_format='csv'),
+                'stream ndjson.gz': lambda: stream(queryset, compress=True),
+            }
+            for name, fn in modes.items():
+                ms, mb = measure(fn)
+                print(f"{count:>10,}  {name:<22} {ms:8.0f} ms  {mb:9.1f} MiB")
+    finally:
+        os.remove(db_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Times JIRA issue mapping: the old one-issue-at-a-time mapping (repeated
+dict lookups, regex date parsing, a project lookup per issue) against
+IssueMapper's batch modes.
+
+    python benchmarks/bench_mapper.py --issues 100000
+"""
+import argparse
+import os
+import random
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from common import setup_django, time_ms
+
+
+def make_issues(count, projects):
+    rng = random.Random(7)
+    epoch = datetime(2023, 1, 1, tzinfo=dt_timezone.utc)
+    issues = []
+    for i in range(count):
+        updated = epoch + timedelta(seconds=rng.randrange(0, 3 * 365 * 86400), milliseconds=rng.randrange(1000))
+        key = f'M{i % projects}'
+        issues.append({
+            'key': f'{key}-{i}',
+            'fields': {
+                'summary': f'Issue {i}', 'description': None,
+                'status': {'name': rng.choice(['Open', 'In Progress', 'Done'])},
+                'priority': {'name': rng.choice(['High', 'Medium', 'Low'])},
+                'assignee': rng.choice([None, {'displayName': f'user{i % 50}'}]),
+                'reporter': {'displayName': 'Reporter'},
+                'created': (updated - timedelta(days=3)).strftime('%Y-%m-%dT%H:%M:%S.000+0000'),
+                'updated': updated.strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + '+0000',
+                'duedate': rng.choice([None, '2024-06-30']),
+                'project': {'key': key, 'name': f'Mapper {key}'},
+            },
+        })
+    return issues
+
+
+def legacy_map(issues):
+    # The mapping as it used to be inlined in retrieve/store_jira_issues.
+    from django.utils import timezone
+    from django.utils.dateparse import parse_date, parse_datetime
+    from jira_integration.models import Project, Ticket
+
+    tickets = []
+    for jira_data in issues:
+        project_key = jira_data.get('fields', {}).get('project', {}).get('key')
+        project, _ = Project.objects.get_or_create(
+            jira_key=project_key,
+            defaults={'name': jira_data.get('fields', {}).get('project', {}).get('name', 'Unnamed Project')},
+        )
+        tickets.append(Ticket(
+            project=project,
+            jira_id=jira_data.get('key'),
+            title=jira_data.get('fields', {}).get('summary', ''),
+            description=jira_data.get('fields', {}).get('description'),
+            status=(jira_data.get('fields', {}).get('status') or {}).get('name', ''),
+            priority=(jira_data.get('fields', {}).get('priority') or {}).get('name', ''),
+            assignee=(jira_data.get('fields', {}).get('assignee') or {}).get('displayName'),
+            reporter=(jira_data.get('fields', {}).get('reporter') or {}).get('displayName'),
+            created_date=parse_datetime(jira_data.get('fields', {}).get('created')),
+            updated_date=parse_datetime(jira_data.get('fields', {}).get('updated')),
+            due_date=parse_date(jira_data['fields']['duedate']) if jira_data.get('fields', {}).get('duedate') else None,
+            synced_at=timezone.now(),
+        ))
+    return tickets
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--issues', type=int, default=100000)
+    parser.add_argument('--projects', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    db_path = setup_django()
+    try:
+        from jira_integration.mapper import IssueMapper
+
+        issues = make_issues(args.issues, args.projects)
+        legacy_map(issues[:args.projects])  # create the projects up front
+        results = {
+            'legacy, one issue at a time': time_ms(lambda: legacy_map(issues), args.repeat),
+            'IssueMapper.to_tickets (batch)': time_ms(lambda: IssueMapper().to_tickets(issues), args.repeat),
+            'IssueMapper.to_rows (no ORM)': time_ms(lambda: IssueMapper().to_rows(issues), args.repeat),
+        }
+        print(f"{args.issues} issues across {args.projects} projects (median of {args.repeat}):")
+        for name, ms in results.items():
+            print(f"  {name:<32} {ms:9.1f} ms  {args.issues / ms * 1000:>10,.0f} issues/s")
+    finally:
+        os.remove(db_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""
+Times ticket list, ticket detail and project list requests with the
+serialized-response cache off, on the in-process LRU, and on the default
+Django cache.
+
+    python benchmarks/bench_response_cache.py --tickets 5000 --projects 10
+
+Each request is timed warm, i.e. after one request has filled the cache.
+"""
+import argparse
+import os
+
+from bench_ticket_indexes import seed
+from common import setup_django, time_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tickets', type=int, default=5000)
+    parser.add_argument('--projects', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    db_path = setup_django()
+    try:
+        from django.conf import settings
+        from django.contrib.auth.models import User
+        from django.test import override_settings
+        from rest_framework.test import APIClient
+        from jira_integration.models import Project, Ticket
+
+        settings.ALLOWED_HOSTS = ['testserver']
+        seed(args.tickets, args.projects, assignees=50, comments_per_ticket=3)
+        client = APIClient()
+        client.force_authenticate(user=User.objects.get(username='bench'))
+        ticket = Ticket.objects.order_by('-updated_date', '-id').first()
+        requests = {
+            'GET /api/tickets/?page_size=500': '/api/tickets/?page_size=500',
+            'GET /api/tickets/{id}/': f'/api/tickets/{ticket.jira_id}/',
+            f'GET /api/projects/ ({Project.objects.count()} projects)': '/api/projects/',
+        }
+
+        for label, url in requests.items():
+            print(label)
+            for backend in (None, 'memory', 'django'):
+                with override_settings(RESPONSE_CACHE_BACKEND=backend):
+                    def get():
+                        response = client.get(url)
+                        assert response.status_code == 200, response.status_code
+                    print(f"  {str(backend):<8} {time_ms(get, repeat=args.repeat):9.1f} ms")
+    finally:
+        os.remove(db_path)
+
+
+if __name__ == '__main__':
+    main()
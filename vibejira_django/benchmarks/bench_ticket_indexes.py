@@ -0,0 +1,133 @@
+"""
+Seeds a large ticket table and times the API's query patterns with and
+without the composite indexes declared on Ticket and Comment.
+
+    python benchmarks/bench_ticket_indexes.py --tickets 1000000
+
+Keep an index only if some pattern here gets measurably faster with it.
+"""
+import argparse
+import os
+import random
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from common import setup_django, time_ms
+
+STATUSES = ['Open', 'In Progress', 'Ongoing', 'Triage Pending', 'Waiting', 'Done', 'Resolved', 'Closed', 'Rejected']
+PRIORITIES = ['Highest', 'High', 'Medium', 'Low', 'Lowest', '']
+
+
+def seed(tickets, projects, assignees, comments_per_ticket, batch_size=20000):
+    from django.contrib.auth.models import User
+    from jira_integration.models import Comment, Project, Ticket
+
+    rng = random.Random(42)
+    project_rows = Project.objects.bulk_create(
+        [Project(name=f'Bench {i}', jira_key=f'B{i}') for i in range(projects)]
+    )
+    author = User.objects.create_user(username='bench')
+    people = [f'user{i}' for i in range(assignees)] + [None]
+    epoch = datetime(2023, 1, 1, tzinfo=dt_timezone.utc)
+
+    batch = []
+    for i in range(tickets):
+        project = project_rows[i % projects]
+        updated = epoch + timedelta(seconds=rng.randrange(0, 3 * 365 * 86400))
+        batch.append(Ticket(
+            project=project, jira_id=f'{project.jira_key}-{i}', title=f'Ticket {i}',
+            status=rng.choice(STATUSES), priority=rng.choice(PRIORITIES), assignee=rng.choice(people),
+            created_date=updated - timedelta(days=rng.randrange(0, 90)), updated_date=updated,
+        ))
+        if len(batch) >= batch_size:
+            Ticket.objects.bulk_create(batch)
+            batch = []
+    Ticket.objects.bulk_create(batch)
+
+    if comments_per_ticket:
+        ticket_ids = list(Ticket.objects.values_list('id', flat=True)[:min(tickets, 20000)])
+        Comment.objects.bulk_create(
+            [Comment(ticket_id=tid, author=author, body='c') for tid in ticket_ids for _ in range(comments_per_ticket)],
+            batch_size=batch_size,
+        )
+
+
+def query_patterns(deep_offset):
+    from django.db.models import Count
+    from jira_integration.models import Comment, Ticket
+    from jira_integration.pagination import TicketPagination
+
+    deep_position = list(
+        Ticket.objects.order_by('-updated_date', '-id').values_list('updated_date', 'id')[deep_offset:deep_offset + 1]
+    )
+    some_ticket = Ticket.objects.order_by('id').values_list('id', flat=True).first()
+
+    def page(qs):
+        return lambda: list(qs.order_by('-updated_date', '-id')[:50])
+
+    patterns = {
+        'list: first page': page(Ticket.objects.all()),
+        'filter: status': page(Ticket.objects.filter(status='Open')),
+        'filter: priority': page(Ticket.objects.filter(priority='Highest')),
+        'filter: assignee': page(Ticket.objects.filter(assignee='user7')),
+        'filter: project': page(Ticket.objects.filter(project__jira_key='B3')),
+        'filter: updated range': page(Ticket.objects.filter(
+            updated_date__gte=datetime(2024, 6, 1, tzinfo=dt_timezone.utc),
+            updated_date__lt=datetime(2024, 6, 8, tzinfo=dt_timezone.utc),
+        )),
+        'aggregate: status x priority': lambda: list(
+            Ticket.objects.order_by().values('status', 'priority').annotate(n=Count('id'))
+        ),
+        'comments: one ticket': lambda: list(Comment.objects.filter(ticket_id=some_ticket).order_by('created_date')),
+    }
+    if deep_position:
+        # Same filter the cursor of a deep page produces.
+        after = TicketPagination().after(list(deep_position[0]))
+        patterns[f'list: keyset page at {deep_offset:,}'] = page(Ticket.objects.filter(after))
+    return patterns
+
+
+def set_indexes(enabled):
+    from django.db import connection
+    from jira_integration.models import Comment, Ticket
+
+    with connection.schema_editor() as editor:
+        for model in (Ticket, Comment):
+            for index in model._meta.indexes:
+                if enabled:
+                    editor.add_index(model, index)
+                else:
+                    editor.remove_index(model, index)
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tickets', type=int, default=1_000_000)
+    parser.add_argument('--projects', type=int, default=20)
+    parser.add_argument('--assignees', type=int, default=200)
+    parser.add_argument('--comments-per-ticket', type=int, default=3)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    db_path = setup_django()
+    try:
+        print(f"Seeding {args.tickets:,} tickets into {db_path} ...")
+        seed(args.tickets, args.projects, args.assignees, args.comments_per_ticket)
+
+        deep_offset = args.tickets // 2
+        set_indexes(False)
+        before = {name: time_ms(fn, args.repeat) for name, fn in query_patterns(deep_offset).items()}
+        set_indexes(True)
+        after = {name: time_ms(fn, args.repeat) for name, fn in query_patterns(deep_offset).items()}
+
+        print(f"\n{'pattern':32} {'no index (ms)':>14} {'indexed (ms)':>14} {'speedup':>9}")
+        for name in before:
+            speedup = before[name] / after[name] if after[name] else float('inf')
+            print(f"{name:32} {before[name]:14.2f} {after[name]:14.2f} {speedup:8.1f}x")
+    finally:
+        os.remove(db_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""
+Shared setup for the standalone benchmark scripts in this directory.
+
+Each script runs against its own throwaway SQLite database so it never
+touches db.sqlite3. Run them from the `vibejira_django/` directory, e.g.
+
+    python benchmarks/bench_ticket_indexes.py --tickets 1000000
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+
+
+def setup_django(db_path=None):
+    """
+    Configures Django against a scratch SQLite file and migrates it.
+
+    Returns the database path.
+    """
+    if str(PROJECT_DIR) not in sys.path:
+        sys.path.insert(0, str(PROJECT_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'vibejira_django.settings')
+
+    from django.conf import settings
+    if db_path is None:
+        handle, db_path = tempfile.mkstemp(prefix='vibejira-bench-', suffix='.sqlite3')
+        os.close(handle)
+    settings.DATABASES['default']['NAME'] = db_path
+
+    import django
+    django.setup()
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+    return db_path
+
+
+def time_ms(fn, repeat=5):
+    """
+    Runs `fn` once to warm up, then `repeat` times; returns the median in ms.
+    """
+    fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
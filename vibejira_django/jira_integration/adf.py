@@ -0,0 +1,253 @@
+import hashlib
+import json
+from collections import namedtuple
+from datetime import datetime, timezone as dt_timezone
+from functools import lru_cache
+from html import escape
+
+# Part of every content hash: bump it when rendering output changes, so
+# stored renderings are redone on the next sync.
+RENDER_VERSION = 1
+# Deeper trees are truncated rather than risking recursion limits.
+MAX_DEPTH = 64
+SAFE_LINK_SCHEMES = ('http://', 'https://', 'mailto:')
+
+RenderedDescription = namedtuple('RenderedDescription', ['text', 'html', 'hash', 'adf'])
+
+# Nodes rendered as separate blocks in plaintext.
+_BLOCKS = {'paragraph', 'heading', 'bulletList', 'orderedList', 'codeBlock', 'blockquote',
+           'rule', 'table', 'tableRow', 'panel', 'mediaSingle', 'mediaGroup', 'blockCard',
+           'expand', 'nestedExpand'}
+_TIGHT = {'table', 'listItem', 'tableCell', 'tableHeader'}
+_MARK_TAGS = {'strong': 'strong', 'em': 'em', 'code': 'code', 'strike': 's', 'underline': 'u'}
+
+
+def content_hash(source):
+    """
+    Hashes a description source (ADF dict or plain string) canonically, so
+    key order in JIRA's JSON doesn't count as a change.
+    """
+    if isinstance(source, str):
+        raw = source
+    else:
+        raw = json.dumps(source, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(f'{RENDER_VERSION}:{raw}'.encode()).hexdigest()
+
+
+def _children(node):
+    content = node.get('content')
+    return content if isinstance(content, list) else []
+
+
+def _safe_href(href):
+    href = (href or '').strip()
+    return href if href.lower().startswith(SAFE_LINK_SCHEMES) else None
+
+
+def _inline_text(node):
+    """Text of leaf nodes that carry it in attrs rather than `text`."""
+    node_type = node.get('type')
+    attrs = node.get('attrs') or {}
+    if node_type == 'mention':
+        return attrs.get('text') or ''
+    if node_type == 'emoji':
+        return attrs.get('text') or attrs.get('shortName') or ''
+    if node_type in ('inlineCard', 'blockCard'):
+        return attrs.get('url') or ''
+    if node_type == 'status':
+        return attrs.get('text') or ''
+    if node_type == 'date':
+        try:
+            return datetime.fromtimestamp(int(attrs.get('timestamp')) / 1000, tz=dt_timezone.utc).date().isoformat()
+        except (TypeError, ValueError):
+            return ''
+    return None
+
+
+def _text(node, depth, out):
+    if depth > MAX_DEPTH or not isinstance(node, dict):
+        return
+    node_type = node.get('type')
+    if node_type == 'text':
+        out.append(node.get('text') or '')
+        return
+    if node_type == 'hardBreak':
+        out.append('\n')
+        return
+    if node_type == 'rule':
+        out.append('---')
+        return
+    inline = _inline_text(node)
+    if inline is not None:
+        out.append(inline)
+        return
+
+    children = _children(node)
+    if node_type in ('bulletList', 'orderedList'):
+        start = (node.get('attrs') or {}).get('order')
+        start = start if isinstance(start, int) else 1
+        items = []
+        for i, item in enumerate(children):
+            parts = []
+            _text(item, depth + 1, parts)
+            bullet = f'{start + i}. ' if node_type == 'orderedList' else '- '
+            items.append(bullet + ''.join(parts).strip().replace('\n', '\n  '))
+        out.append('\n'.join(items))
+        return
+    if node_type == 'tableRow':
+        cells = []
+        for cell in children:
+            parts = []
+            _text(cell, depth + 1, parts)
+            cells.append(' '.join(''.join(parts).split()))
+        out.append(' | '.join(cells))
+        return
+
+    # Child blocks are separated by blank lines (single newlines inside
+    # tables and list items); inline children run together.
+    block_sep = '\n' if node_type in _TIGHT else '\n\n'
+    rendered = ''
+    for child in children:
+        parts = []
+        _text(child, depth + 1, parts)
+        text = ''.join(parts)
+        if isinstance(child, dict) and child.get('type') in _BLOCKS:
+            text = text.strip()
+            if text:
+                rendered = f'{rendered}{block_sep}{text}' if rendered else text
+        else:
+            rendered += text
+    out.append(rendered)
+
+
+def _html(node, depth, out):
+    if depth > MAX_DEPTH or not isinstance(node, dict):
+        return
+    node_type = node.get('type')
+    attrs = node.get('attrs') or {}
+
+    if node_type == 'text':
+        html = escape(node.get('text') or '')
+        for mark in node.get('marks') or []:
+            mark_type = mark.get('type')
+            mark_attrs = mark.get('attrs') or {}
+            if mark_type in _MARK_TAGS:
+                tag = _MARK_TAGS[mark_type]
+                html = f'<{tag}>{html}</{tag}>'
+            elif mark_type == 'link':
+                href = _safe_href(mark_attrs.get('href'))
+                if href:
+                    html = f'<a href="{escape(href)}" rel="noopener noreferrer">{html}</a>'
+            elif mark_type == 'subsup' and mark_attrs.get('type') in ('sub', 'sup'):
+                html = f'<{mark_attrs["type"]}>{html}</{mark_attrs["type"]}>'
+        out.append(html)
+        return
+    if node_type == 'hardBreak':
+        out.append('<br>')
+        return
+    if node_type == 'rule':
+        out.append('<hr>')
+        return
+    if node_type in ('inlineCard', 'blockCard'):
+        href = _safe_href(attrs.get('url'))
+        label = escape(attrs.get('url') or '')
+        out.append(f'<a href="{escape(href)}" rel="noopener noreferrer">{label}</a>' if href else label)
+        return
+    inline = _inline_text(node)
+    if inline is not None:
+        css = 'mention' if node_type == 'mention' else node_type
+        out.append(f'<span class="adf-{css}">{escape(inline)}</span>')
+        return
+
+    def inner():
+        parts = []
+        for child in _children(node):
+            _html(child, depth + 1, parts)
+        return ''.join(parts)
+
+    if node_type == 'doc':
+        out.append(inner())
+    elif node_type == 'paragraph':
+        out.append(f'<p>{inner()}</p>')
+    elif node_type == 'heading':
+        level = attrs.get('level') if attrs.get('level') in (1, 2, 3, 4, 5, 6) else 1
+        out.append(f'<h{level}>{inner()}</h{level}>')
+    elif node_type == 'bulletList':
+        out.append(f'<ul>{inner()}</ul>')
+    elif node_type == 'orderedList':
+        start = attrs.get('order')
+        start_attr = f' start="{int(start)}"' if isinstance(start, int) and start != 1 else ''
+        out.append(f'<ol{start_attr}>{inner()}</ol>')
+    elif node_type == 'listItem':
+        out.append(f'<li>{inner()}</li>')
+    elif node_type == 'codeBlock':
+        language = attrs.get('language')
+        css = f' class="language-{escape(str(language))}"' if language else ''
+        text = ''.join(escape(child.get('text') or '') for child in _children(node) if isinstance(child, dict))
+        out.append(f'<pre><code{css}>{text}</code></pre>')
+    elif node_type == 'blockquote':
+        out.append(f'<blockquote>{inner()}</blockquote>')
+    elif node_type == 'panel':
+        panel_type = escape(str(attrs.get('panelType') or 'info'))
+        out.append(f'<div class="adf-panel adf-panel-{panel_type}">{inner()}</div>')
+    elif node_type == 'table':
+        out.append(f'<table><tbody>{inner()}</tbody></table>')
+    elif node_type == 'tableRow':
+        out.append(f'<tr>{inner()}</tr>')
+    elif node_type == 'tableHeader':
+        out.append(f'<th>{inner()}</th>')
+    elif node_type == 'tableCell':
+        out.append(f'<td>{inner()}</td>')
+    elif node_type in ('expand', 'nestedExpand'):
+        title = escape(attrs.get('title') or '')
+        out.append(f'<details><summary>{title}</summary>{inner()}</details>')
+    elif node_type in ('mediaSingle', 'mediaGroup', 'media'):
+        # Attachments need JIRA credentials to fetch; leave a placeholder.
+        if node_type == 'media':
+            out.append('<span class="adf-media">[attachment]</span>')
+        else:
+            out.append(inner())
+    else:
+        # Unknown node types degrade to their content.
+        out.append(inner())
+
+
+def render_text(adf):
+    parts = []
+    _text(adf, 0, parts)
+    return ''.join(parts).strip()
+
+
+def render_html(adf):
+    parts = []
+    _html(adf, 0, parts)
+    return ''.join(parts)
+
+
+def _plain_html(text):
+    paragraphs = [p for p in text.split('\n\n') if p.strip()]
+    return ''.join(f'<p>{escape(p).replace(chr(10), "<br>")}</p>' for p in paragraphs)
+
+
+@lru_cache(maxsize=2048)
+def _render_cached(digest, source_json):
+    # Keyed by content hash: identical descriptions (templates, bulk-created
+    # issues) are rendered once per process.
+    adf = json.loads(source_json)
+    return render_text(adf), render_html(adf)
+
+
+def render_description(source):
+    """
+    Renders a JIRA description into (text, html, hash, adf).
+
+    `source` is an ADF document (API v3), a plain string (API v2 or local
+    edits) or None. `adf` is the document to store, None for non-ADF input.
+    """
+    if source is None or source == '':
+        return RenderedDescription(None, '', None, None)
+    if isinstance(source, str):
+        return RenderedDescription(source, _plain_html(source), content_hash(source), None)
+    digest = content_hash(source)
+    text, html = _render_cached(digest, json.dumps(source, sort_keys=True, separators=(',', ':')))
+    return RenderedDescription(text, html, digest, source)
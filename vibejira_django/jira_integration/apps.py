@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class JiraIntegrationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'jira_integration'
+
+    def ready(self):
+        # Connects the signal handlers that invalidate cached auth tokens and
+        # responses, and that log ticket events.
+        from . import authentication, events, response_cache  # noqa: F401
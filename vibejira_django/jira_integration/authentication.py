@@ -0,0 +1,149 @@
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+
+class LRUCache:
+    """
+    A thread-safe, size-bounded LRU mapping whose entries expire after `ttl` seconds.
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class TokenCache:
+    """
+    Token key -> (user, token), kept in-process or, with
+    AUTH_TOKEN_CACHE_ALIAS set, in that Django cache.
+
+    An in-process cache is only invalidated in the process that made the
+    change (other processes catch up within AUTH_TOKEN_CACHE_TTL); a shared
+    cache such as Redis or Memcached is invalidated everywhere at once.
+    """
+
+    def __init__(self):
+        self._local = None
+
+    def _backend(self):
+        if settings.AUTH_TOKEN_CACHE_ALIAS:
+            return caches[settings.AUTH_TOKEN_CACHE_ALIAS]
+        local = self._local
+        if local is None or (local.maxsize, local.ttl) != (settings.AUTH_TOKEN_CACHE_SIZE, settings.AUTH_TOKEN_CACHE_TTL):
+            local = self._local = LRUCache(settings.AUTH_TOKEN_CACHE_SIZE, settings.AUTH_TOKEN_CACHE_TTL)
+        return local
+
+    @staticmethod
+    def _cache_key(key):
+        # Raw tokens never become keys in a shared cache.
+        return 'auth-token:' + hashlib.sha256(key.encode()).hexdigest()
+
+    def get(self, key):
+        return self._backend().get(self._cache_key(key))
+
+    def set(self, key, value):
+        backend = self._backend()
+        if isinstance(backend, LRUCache):
+            backend.set(self._cache_key(key), value)
+        else:
+            backend.set(self._cache_key(key), value, settings.AUTH_TOKEN_CACHE_TTL)
+
+    def delete(self, key):
+        self._backend().delete(self._cache_key(key))
+
+    def clear(self):
+        # In-process entries only; a shared cache is left alone.
+        if self._local is not None:
+            self._local.clear()
+
+
+token_cache = TokenCache()
+
+
+class CachingTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication that caches the token -> user lookup, saving the
+    token/user join query on every request.
+
+    Entries live AUTH_TOKEN_CACHE_TTL seconds and are dropped when the
+    token is deleted or re-saved, or its user is saved (e.g. deactivated)
+    or deleted. Writes that skip signals (`QuerySet.update()`) are only
+    picked up when the entry expires.
+    """
+
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is None:
+            cached = super().authenticate_credentials(key)
+            token_cache.set(key, cached)
+        user, token = cached
+        # The cached user is shared between threads; each request gets a copy.
+        return copy.copy(user), token
+
+
+class QueryTokenAuthentication(CachingTokenAuthentication):
+    """
+    Reads the token from `?token=`, for clients that can't set headers (a
+    browser EventSource). URLs end up in access logs, so only the ticket
+    event stream accepts it.
+    """
+
+    def authenticate(self, request):
+        key = request.query_params.get('token')
+        if not key:
+            return None
+        return self.authenticate_credentials(key)
+
+
+@receiver([post_save, post_delete], sender=Token, dispatch_uid='token_cache_token_changed')
+def _token_changed(sender, instance, **kwargs):
+    token_cache.delete(instance.key)
+
+
+# A deleted user's tokens are deleted (and so invalidated) by the cascade.
+@receiver(post_save, sender=get_user_model(), dispatch_uid='token_cache_user_changed')
+def _user_changed(sender, instance, created, **kwargs):
+    if created:
+        return
+    for key in Token.objects.filter(user_id=instance.pk).values_list('key', flat=True):
+        token_cache.delete(key)
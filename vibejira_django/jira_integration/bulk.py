@@ -0,0 +1,200 @@
+import codecs
+import csv
+import json
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .adf import content_hash
+from .events import record_events
+from .models import Project, Ticket, TicketEvent
+from .outbox import record_edits, snapshot
+from .serializers import TicketImportSerializer, TicketSerializer
+from .sync import TICKET_SYNC_FIELDS, upsert_tickets
+
+# Imports leave synced_at alone: an imported row hasn't been refreshed from JIRA.
+IMPORT_SYNC_FIELDS = [field for field in TICKET_SYNC_FIELDS if field != 'synced_at']
+
+
+def _row_id(item):
+    try:
+        return int(item['id'])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def bulk_update_tickets(items, context=None):
+    """
+    Applies a list of partial updates, `[{"id": <pk>, <field>: <value>, ...}]`.
+
+    Each row is validated by TicketSerializer like a single PATCH, but the
+    tickets are read in one query and written with one bulk_update in a
+    single transaction, along with their outbox entries. Invalid rows are
+    skipped. Returns (updated tickets, errors), each error being
+    `{"row": <index>, "id": <pk>, "errors": {...}}`.
+    """
+    errors = []
+    with transaction.atomic():
+        tickets = Ticket.objects.select_for_update().in_bulk(
+            [pk for pk in map(_row_id, items) if pk is not None]
+        )
+        before, fields = {}, set()
+        for row, item in enumerate(items):
+            pk = _row_id(item) if isinstance(item, dict) else None
+            if pk is None:
+                errors.append({"row": row, "id": None, "errors": {"id": ["A ticket id is required."]}})
+                continue
+            ticket = tickets.get(pk)
+            if ticket is None:
+                errors.append({"row": row, "id": pk, "errors": {"id": ["Ticket not found."]}})
+                continue
+            data = {key: value for key, value in item.items() if key != 'id'}
+            serializer = TicketSerializer(ticket, data=data, partial=True, context=context)
+            if not serializer.is_valid():
+                errors.append({"row": row, "id": pk, "errors": serializer.errors})
+                continue
+            # A ticket listed twice keeps its state from before the first row.
+            before.setdefault(pk, snapshot(ticket))
+            for field, value in serializer.validated_data.items():
+                setattr(ticket, field, value)
+            fields.update(serializer.validated_data)
+
+        updated = [tickets[pk] for pk in before]
+        if updated:
+            # bulk_update doesn't apply auto_now, so stamp modified_at by hand.
+            now = timezone.now()
+            for ticket in updated:
+                ticket.modified_at = now
+            Ticket.objects.bulk_update(updated, sorted(fields | {'modified_at'}))
+            record_events(TicketEvent.TICKET_UPDATED, updated)
+            record_edits([(ticket, before[ticket.pk]) for ticket in updated])
+    return updated, errors
+
+
+def read_ndjson(lines):
+    """
+    Yields (line number, row, error) for each non-blank line of an NDJSON stream.
+    """
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield number, None, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(row, dict):
+            yield number, None, "Each line must be a JSON object."
+            continue
+        yield number, row, None
+
+
+def read_csv(lines):
+    """
+    Yields (line number, row, error) for each record of a CSV stream with a
+    header row. Empty cells are left out of the row.
+    """
+    reader = csv.DictReader(codecs.iterdecode(lines, 'utf-8-sig'))
+    for row in reader:
+        if None in row:
+            yield reader.line_num, None, "More cells than header columns."
+            continue
+        yield reader.line_num, {key: value for key, value in row.items() if value not in (None, '')}, None
+
+
+# Content types accepted by POST /api/tickets/import/.
+IMPORT_READERS = {
+    'application/x-ndjson': read_ndjson,
+    'application/jsonl': read_ndjson,
+    'text/csv': read_csv,
+}
+
+
+def _import_ticket(data, project):
+    source = data.get('description')
+    updated_date = data.get('updated_date') or timezone.now()
+    return Ticket(
+        project=project,
+        jira_id=data['jira_id'],
+        title=data['title'],
+        description=source if isinstance(source, str) and source else None,
+        description_adf=source if isinstance(source, dict) else None,
+        description_hash=content_hash(source) if source else None,
+        status=data['status'],
+        priority=data['priority'],
+        assignee=data.get('assignee'),
+        reporter=data.get('reporter'),
+        created_date=data.get('created_date') or updated_date,
+        updated_date=updated_date,
+        due_date=data.get('due_date'),
+    )
+
+
+class TicketImporter:
+    """
+    Upserts ticket rows read from a stream, TICKET_IMPORT_CHUNK_SIZE rows at a time.
+
+    Only one chunk is held in memory. Each chunk is validated and written
+    (with upsert_tickets) in its own transaction, so an interrupted import
+    keeps the chunks before it and can simply be rerun.
+    """
+
+    def __init__(self, chunk_size=None, max_errors=None):
+        self.chunk_size = chunk_size or settings.TICKET_IMPORT_CHUNK_SIZE
+        self.max_errors = settings.TICKET_IMPORT_MAX_ERRORS if max_errors is None else max_errors
+        self.projects = {}
+        self.stats = {"rows": 0, "created": 0, "updated": 0, "failed": 0, "errors": []}
+
+    def error(self, line, jira_id, errors):
+        self.stats["failed"] += 1
+        if len(self.stats["errors"]) < self.max_errors:
+            self.stats["errors"].append({"line": line, "jira_id": jira_id, "errors": errors})
+
+    def resolve_projects(self, keys):
+        missing = set(keys) - set(self.projects)
+        if missing:
+            self.projects.update(
+                (project.jira_key, project) for project in Project.objects.filter(jira_key__in=missing)
+            )
+
+    def write_chunk(self, chunk):
+        self.resolve_projects(row.get('project') for _, row in chunk if isinstance(row.get('project'), str))
+        tickets = []
+        for line, row in chunk:
+            serializer = TicketImportSerializer(data=row)
+            if not serializer.is_valid():
+                self.error(line, row.get('jira_id'), serializer.errors)
+                continue
+            data = serializer.validated_data
+            project = self.projects.get(data['project'])
+            if project is None:
+                self.error(line, data['jira_id'], {"project": [f"Unknown project key {data['project']!r}."]})
+                continue
+            tickets.append(_import_ticket(data, project))
+        created, updated = upsert_tickets(tickets, batch_size=self.chunk_size, fields=IMPORT_SYNC_FIELDS)
+        self.stats["created"] += created
+        self.stats["updated"] += updated
+
+    def run(self, rows):
+        """
+        Imports (line, row, error) tuples from read_ndjson/read_csv and returns
+        the counts, plus the first `max_errors` row errors.
+        """
+        chunk = []
+        try:
+            for line, row, error in rows:
+                self.stats["rows"] += 1
+                if error:
+                    self.error(line, None, {"non_field_errors": [error]})
+                    continue
+                chunk.append((line, row))
+                if len(chunk) >= self.chunk_size:
+                    self.write_chunk(chunk)
+                    chunk = []
+        except (UnicodeDecodeError, csv.Error) as e:
+            # Undecodable bytes or malformed CSV: nothing after this point can be read.
+            self.stats["aborted"] = str(e)
+        if chunk:
+            self.write_chunk(chunk)
+        return self.stats
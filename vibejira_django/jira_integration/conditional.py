@@ -0,0 +1,73 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from rest_framework.permissions import SAFE_METHODS
+
+
+def make_etag(*parts):
+    """
+    Builds a strong ETag from the values a representation is rendered from.
+    """
+    digest = hashlib.sha1(repr(parts).encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def change_state(queryset):
+    """
+    Returns (row count, latest modified_at) for a queryset in one aggregate query.
+
+    The count catches deletions, which leave no newer timestamp behind.
+    """
+    state = queryset.order_by().aggregate(count=Count('pk'), modified=Max('modified_at'))
+    return state['count'], state['modified']
+
+
+def latest(*timestamps):
+    timestamps = [t for t in timestamps if t is not None]
+    return max(timestamps) if timestamps else None
+
+
+class ConditionalGetMixin:
+    """
+    Answers conditional GETs with 304 Not Modified before any serialization.
+
+    Handlers call `not_modified()` with a cheap summary of everything the
+    response is built from (row counts and modified_at maxima). It returns
+    the 304 (or 412) response to send, or None to carry on rendering; the
+    ETag and Last-Modified are then added to the rendered response.
+    If-None-Match takes precedence over If-Modified-Since, whose one-second
+    resolution can't see changes made within the same second.
+    """
+    conditional_etag = None
+    conditional_last_modified = None
+
+    def not_modified(self, request, parts, last_modified):
+        if request.method not in SAFE_METHODS:
+            return None
+        # The URL carries filters, cursor and fieldset; the media type tells
+        # JSON apart from the browsable API.
+        self.conditional_etag = make_etag(request.get_full_path(), request.accepted_media_type, *parts)
+        self.conditional_last_modified = int(last_modified.timestamp()) if last_modified else None
+        return get_conditional_response(
+            request, etag=self.conditional_etag, last_modified=self.conditional_last_modified,
+        )
+
+    def page_not_modified(self, request, page):
+        """
+        not_modified() for a keyset page, validated on its own rows.
+        """
+        parts = ([(row.pk, row.modified_at) for row in page], self.paginator.has_next)
+        last_modified = max((row.modified_at for row in page), default=None)
+        return self.not_modified(request, parts, last_modified)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if self.conditional_etag and response.status_code in (200, 304):
+            response.headers['ETag'] = self.conditional_etag
+            if self.conditional_last_modified is not None:
+                response.headers['Last-Modified'] = http_date(self.conditional_last_modified)
+            # Responses are per-user; clients and shared caches must revalidate.
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
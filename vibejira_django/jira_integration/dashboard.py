@@ -0,0 +1,81 @@
+from django.db.models import Case, CharField, Count, F, Value, When, Window
+from django.db.models.functions import RowNumber
+
+# Mirrors the frontend Dashboard's grouping. Anything not listed lands in "Other".
+PRIORITY_GROUPS = {
+    'P1': ['Highest', 'High'],
+    'P2': ['Medium'],
+    'Other': ['Low', 'Lowest', 'Undefined', None, ''],
+}
+DEFAULT_PRIORITY_GROUP = 'Other'
+
+# Columns returned for the top tickets of each priority group.
+SUMMARY_TICKET_FIELDS = ('id', 'jira_id', 'title', 'status', 'priority', 'assignee', 'updated_date')
+
+
+def priority_group_of(priority):
+    for group, priorities in PRIORITY_GROUPS.items():
+        if priority in priorities:
+            return group
+    return DEFAULT_PRIORITY_GROUP
+
+
+def priority_group_expression():
+    """
+    SQL CASE expression mapping Ticket.priority onto its dashboard group.
+    """
+    whens = []
+    for group, priorities in PRIORITY_GROUPS.items():
+        names = [p for p in priorities if p is not None]
+        if names:
+            whens.append(When(priority__in=names, then=Value(group)))
+        if None in priorities:
+            whens.append(When(priority__isnull=True, then=Value(group)))
+    return Case(*whens, default=Value(DEFAULT_PRIORITY_GROUP), output_field=CharField())
+
+
+def build_dashboard_summary(queryset, top_n=10):
+    """
+    Computes the dashboard from `queryset` in two queries.
+
+    One GROUP BY (status, priority) yields both the status counts and the
+    priority-group counts; one window query picks the `top_n` most recently
+    updated tickets of every priority group.
+    """
+    status_counts = {}
+    group_counts = {group: 0 for group in PRIORITY_GROUPS}
+    total = 0
+    rows = queryset.order_by().values('status', 'priority').annotate(count=Count('id'))
+    for row in rows:
+        status_counts[row['status']] = status_counts.get(row['status'], 0) + row['count']
+        group_counts[priority_group_of(row['priority'])] += row['count']
+        total += row['count']
+
+    top_tickets = {group: [] for group in PRIORITY_GROUPS}
+    if top_n > 0 and total:
+        ranked = (
+            queryset.order_by()
+            .annotate(
+                priority_group=priority_group_expression(),
+                rank=Window(
+                    RowNumber(),
+                    partition_by=[priority_group_expression()],
+                    order_by=[F('updated_date').desc(), F('id').desc()],
+                ),
+            )
+            .filter(rank__lte=top_n)
+            .values('priority_group', *SUMMARY_TICKET_FIELDS)
+        )
+        for row in ranked:
+            top_tickets[row.pop('priority_group')].append(row)
+        for tickets in top_tickets.values():
+            tickets.sort(key=lambda t: (t['updated_date'], t['id']), reverse=True)
+
+    return {
+        'total': total,
+        'status_counts': status_counts,
+        'priority_groups': {
+            group: {'count': group_counts[group], 'tickets': top_tickets[group]}
+            for group in PRIORITY_GROUPS
+        },
+    }
@@ -0,0 +1,272 @@
+import asyncio
+import json
+import time
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Max
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .filters import split_param
+from .models import Comment, Project, Ticket, TicketChange, TicketEvent
+
+
+def _capture(event_type, obj):
+    if isinstance(obj, Comment):
+        return {'type': event_type, 'ticket_id': obj.ticket_id, 'comment_id': obj.pk, 'comment_jira_id': obj.jira_id}
+    return {'type': event_type, 'ticket_id': obj.pk, 'jira_id': obj.jira_id, 'project_id': obj.project_id}
+
+
+def record_events(event_type, objects):
+    """
+    Logs an `event_type` event for each Ticket or Comment in `objects`, and
+    moves each ticket they touch to the end of the change log (as a
+    tombstone if it was deleted).
+
+    Runs in the caller's transaction, so the log commits or rolls back with
+    the write it describes. Used directly by the bulk writes that send no
+    signals; single saves and deletes are logged by the receivers below.
+    """
+    rows = [_capture(event_type, obj) for obj in objects]
+    if not rows:
+        return
+    # Pks that bulk_create didn't return are looked up by jira_id.
+    unsaved_tickets = [row['jira_id'] for row in rows if 'project_id' in row and row['ticket_id'] is None]
+    unsaved_comments = [row['comment_jira_id'] for row in rows if 'comment_id' in row and row['comment_id'] is None]
+    ticket_pks = dict(Ticket.objects.filter(jira_id__in=unsaved_tickets).values_list('jira_id', 'pk')) if unsaved_tickets else {}
+    comment_pks = dict(Comment.objects.filter(jira_id__in=unsaved_comments).values_list('jira_id', 'pk')) if unsaved_comments else {}
+    # Comment events take their ticket's jira_id and project.
+    parents = {
+        pk: (jira_id, project_id) for pk, jira_id, project_id in Ticket.objects.filter(
+            pk__in={row['ticket_id'] for row in rows if 'comment_id' in row},
+        ).values_list('pk', 'jira_id', 'project_id')
+    }
+
+    events = []
+    for row in rows:
+        if 'project_id' in row:
+            ticket_id = row['ticket_id'] or ticket_pks.get(row['jira_id'])
+            if ticket_id is not None:
+                events.append(TicketEvent(
+                    type=row['type'], ticket_id=ticket_id, jira_id=row['jira_id'], project_id=row['project_id'],
+                ))
+        elif row['ticket_id'] in parents:
+            jira_id, project_id = parents[row['ticket_id']]
+            events.append(TicketEvent(
+                type=row['type'], ticket_id=row['ticket_id'], jira_id=jira_id, project_id=project_id,
+                comment_id=row['comment_id'] or comment_pks.get(row['comment_jira_id']),
+            ))
+    if not events:
+        return
+
+    with transaction.atomic():
+        if connection.features.can_return_rows_from_bulk_insert:
+            TicketEvent.objects.bulk_create(events)
+        else:
+            # The change log needs each event's id.
+            for event in events:
+                event.save()
+        # A ticket's last event decides its sequence and whether it is a tombstone.
+        changes = {
+            event.ticket_id: TicketChange(
+                ticket_id=event.ticket_id, jira_id=event.jira_id, seq=event.id,
+                deleted=event.type == TicketEvent.TICKET_DELETED,
+            )
+            for event in events
+        }
+        # An upsert, so concurrent writers to one ticket queue on its row
+        # instead of failing the later insert.
+        TicketChange.objects.bulk_create(
+            changes.values(), update_conflicts=True, unique_fields=['ticket_id'],
+            update_fields=['jira_id', 'deleted', 'seq', 'changed_at'],
+        )
+
+
+def prune_events():
+    """
+    Drops events beyond the newest TICKET_EVENT_LOG_SIZE. Returns how many went.
+
+    Job workers run this as part of their housekeeping, not every write.
+    """
+    last_id = TicketEvent.objects.order_by('-id').values_list('id', flat=True).first()
+    if last_id is None:
+        return 0
+    return TicketEvent.objects.filter(id__lte=last_id - settings.TICKET_EVENT_LOG_SIZE).delete()[0]
+
+
+def committed_horizon(after):
+    """
+    Returns the highest event id that readers may advance to from `after`:
+    every event between the two has committed, as far as can be told.
+
+    Ids are handed out at insert, not commit, so a transaction still open
+    leaves a gap that a later commit fills in. A gap followed by an event
+    younger than TICKET_EVENT_COMMIT_LAG seconds stops the horizon; older
+    gaps are ids whose transactions rolled back, or pruned events.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.TICKET_EVENT_COMMIT_LAG)
+    young = list(
+        TicketEvent.objects.filter(id__gt=after, created_at__gt=cutoff).order_by('id').values_list('id', flat=True)
+    )
+    if not young:
+        return TicketEvent.objects.filter(id__gt=after).aggregate(newest=Max('id'))['newest'] or after
+    # With nothing older left, the ids below were pruned.
+    previous = TicketEvent.objects.filter(id__lt=young[0]).order_by('-id').values_list('id', flat=True).first()
+    horizon = max(young[0] - 1 if previous is None else previous, after)
+    for event_id in young:
+        if event_id != horizon + 1:
+            break
+        horizon = event_id
+    return horizon
+
+
+@receiver(post_save, sender=Ticket, dispatch_uid='events_ticket_saved')
+def _ticket_saved(sender, instance, created, **kwargs):
+    record_events(TicketEvent.TICKET_CREATED if created else TicketEvent.TICKET_UPDATED, [instance])
+
+
+@receiver(post_delete, sender=Ticket, dispatch_uid='events_ticket_deleted')
+def _ticket_deleted(sender, instance, **kwargs):
+    record_events(TicketEvent.TICKET_DELETED, [instance])
+
+
+@receiver(post_save, sender=Comment, dispatch_uid='events_comment_saved')
+def _comment_saved(sender, instance, created, **kwargs):
+    record_events(TicketEvent.COMMENT_CREATED if created else TicketEvent.COMMENT_UPDATED, [instance])
+
+
+@receiver(post_delete, sender=Comment, dispatch_uid='events_comment_deleted')
+def _comment_deleted(sender, instance, origin=None, **kwargs):
+    # Comments deleted along with their ticket are covered by its own event.
+    if isinstance(origin, Ticket) or getattr(origin, 'model', None) is Ticket:
+        return
+    record_events(TicketEvent.COMMENT_DELETED, [instance])
+
+
+def stream_project_ids(value):
+    """
+    Resolves a `?project=` value (JIRA keys or PKs, comma-separated) to
+    project PKs, or None when it is empty.
+    """
+    projects = split_param(value or '')
+    if not projects:
+        return None
+    ids = {int(p) for p in projects if p.isdigit()}
+    keys = [p for p in projects if not p.isdigit()]
+    if keys:
+        ids.update(Project.objects.filter(jira_key__in=keys).values_list('pk', flat=True))
+    return ids
+
+
+def format_event(event_id, data):
+    return f"id: {event_id}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+class EventStream:
+    """
+    Server-Sent Events for the ticket event log, from `last_id` on.
+
+    Each message's id is its TicketEvent id, so a reconnecting EventSource
+    resumes through Last-Event-ID. A `reset` message (with no ticket)
+    means events since `last_id` were pruned, or it is unknown: the client
+    should reload what it holds. Without a `last_id`, only new events are
+    sent. `project_ids` limits the stream to those projects.
+    """
+    BATCH_SIZE = 500
+
+    def __init__(self, last_id=None, project_ids=None):
+        self.last_id = last_id
+        self.project_ids = project_ids
+
+    def start(self):
+        """
+        Returns the opening chunk and fixes the position to read from.
+        """
+        chunk = f"retry: {settings.TICKET_STREAM_RETRY_MS}\n\n"
+        horizon = committed_horizon(0)
+        if self.last_id is None:
+            self.last_id = horizon
+            return chunk
+        newest = TicketEvent.objects.order_by('-id').values_list('id', flat=True).first() or 0
+        oldest = TicketEvent.objects.order_by('id').values_list('id', flat=True).first()
+        if self.last_id > newest or (oldest is not None and self.last_id < oldest - 1):
+            self.last_id = horizon
+            chunk += format_event(horizon, {'type': 'reset'})
+        return chunk
+
+    def poll(self):
+        """
+        Returns the events logged since the last poll as one chunk ('' if none).
+
+        Stops at the committed horizon, so a resumed Last-Event-ID never
+        skips an event whose transaction had yet to commit.
+        """
+        horizon = committed_horizon(self.last_id)
+        if horizon <= self.last_id:
+            return ''
+        events = TicketEvent.objects.filter(id__gt=self.last_id, id__lte=horizon)
+        if self.project_ids is not None:
+            events = events.filter(project_id__in=self.project_ids)
+        events = list(events.order_by('id')[:self.BATCH_SIZE])
+        chunks = []
+        for event in events:
+            data = {'type': event.type, 'ticket': event.ticket_id, 'jira_id': event.jira_id, 'project': event.project_id}
+            if event.comment_id is not None:
+                data['comment'] = event.comment_id
+            chunks.append(format_event(event.id, data))
+        # A full batch may have left events behind; otherwise everything up to the horizon was seen.
+        self.last_id = events[-1].id if len(events) == self.BATCH_SIZE else horizon
+        return ''.join(chunks)
+
+    def _tick(self, chunk, idle):
+        # Returns (what to send, idle seconds), sending a comment line now and
+        # then so proxies keep a quiet stream open.
+        if chunk:
+            return chunk, 0.0
+        idle += settings.TICKET_STREAM_POLL_INTERVAL
+        if idle >= settings.TICKET_STREAM_KEEPALIVE:
+            return ": keepalive\n\n", 0.0
+        return None, idle
+
+    @staticmethod
+    def _closing(fn):
+        # Pool threads outlive requests, so they release their connection as a request would.
+        def call():
+            try:
+                return fn()
+            finally:
+                close_old_connections()
+        return call
+
+    def __iter__(self):
+        # Under WSGI each stream holds a worker thread, so it ends after
+        # TICKET_STREAM_MAX_SECONDS and the client reconnects where it left off.
+        yield self.start()
+        deadline = time.monotonic() + settings.TICKET_STREAM_MAX_SECONDS
+        idle = 0.0
+        while True:
+            chunk, idle = self._tick(self.poll(), idle)
+            if chunk:
+                yield chunk
+            if time.monotonic() >= deadline:
+                return
+            time.sleep(settings.TICKET_STREAM_POLL_INTERVAL)
+
+    async def __aiter__(self):
+        # Under ASGI a stream is a coroutine between polls, and runs until the client goes away.
+        # Polls run in the thread pool rather than the one thread-sensitive
+        # sync thread, so open streams don't queue behind each other (or the
+        # project's other sync code).
+        start = sync_to_async(self._closing(self.start), thread_sensitive=False)
+        poll = sync_to_async(self._closing(self.poll), thread_sensitive=False)
+        yield await start()
+        idle = 0.0
+        while True:
+            chunk, idle = self._tick(await poll(), idle)
+            if chunk:
+                yield chunk
+            await asyncio.sleep(settings.TICKET_STREAM_POLL_INTERVAL)
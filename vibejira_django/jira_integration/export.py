@@ -0,0 +1,146 @@
+import csv
+import json
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
+
+from .models import Comment
+
+# Columns of an export row, in CSV column order.
+EXPORT_FIELDS = (
+    'id', 'jira_id', 'project_key', 'title', 'description', 'status', 'priority',
+    'assignee', 'reporter', 'created_date', 'updated_date', 'due_date',
+)
+TICKET_COLUMNS = [field for field in EXPORT_FIELDS if field != 'project_key']
+
+_encoder = DjangoJSONEncoder()
+
+
+def _value(value):
+    # Dates and datetimes are written as in API responses.
+    return value if value is None or isinstance(value, (str, int)) else _encoder.default(value)
+
+
+def export_rows(queryset, with_comments=False, chunk_size=None):
+    """
+    Yields one dict per ticket, reading `chunk_size` rows at a time.
+
+    With `with_comments`, each ticket's comments (oldest first) are
+    prefetched per chunk, so memory is bounded by one chunk either way.
+    """
+    chunk_size = chunk_size or settings.TICKET_EXPORT_CHUNK_SIZE
+    queryset = queryset.select_related('project').only(*TICKET_COLUMNS, 'project__jira_key')
+    if with_comments:
+        comments = Comment.objects.select_related('author').order_by('created_date', 'id')
+        queryset = queryset.prefetch_related(Prefetch('comments', queryset=comments, to_attr='export_comments'))
+    for ticket in queryset.iterator(chunk_size=chunk_size):
+        row = {
+            field: ticket.project.jira_key if field == 'project_key' else _value(getattr(ticket, field))
+            for field in EXPORT_FIELDS
+        }
+        if with_comments:
+            row['comments'] = [
+                {'id': c.id, 'jira_id': c.jira_id, 'author': c.author_display_name, 'body': c.body,
+                 'created_date': _value(c.created_date)}
+                for c in ticket.export_comments
+            ]
+        yield row
+
+
+def _batched(lines, size):
+    # Joins lines into chunks of `size`, so the response isn't written row by row.
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= size:
+            yield ''.join(batch).encode()
+            batch = []
+    if batch:
+        yield ''.join(batch).encode()
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + '\n'
+
+
+class _Line:
+    # csv.writer target whose write() hands back the formatted line.
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows, with_comments=False):
+    """
+    Yields CSV lines with a header. Comments, if exported, go in a JSON-encoded `comments` column.
+    """
+    writer = csv.writer(_Line())
+    columns = EXPORT_FIELDS + (('comments',) if with_comments else ())
+    yield writer.writerow(columns)
+    for row in rows:
+        if with_comments:
+            row = dict(row, comments=json.dumps(row['comments'], ensure_ascii=False))
+        yield writer.writerow([row[column] for column in columns])
+
+
+def gzipped(chunks):
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)  # gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _close(chunks):
+    chunks.close()
+    connection.close()
+
+
+async def achunks(chunks):
+    """
+    Yields the chunks of a sync export under ASGI, one at a time.
+
+    Given a sync iterator, StreamingHttpResponse would build the whole
+    export in memory before sending a byte. Each chunk is produced on a
+    thread of the export's own, so the rows are read off one connection
+    without holding up the thread-sensitive sync thread.
+    """
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='export')
+    next_chunk = sync_to_async(next, thread_sensitive=False, executor=executor)
+    try:
+        while (chunk := await next_chunk(chunks, None)) is not None:
+            yield chunk
+    finally:
+        await sync_to_async(_close, thread_sensitive=False, executor=executor)(chunks)
+        executor.shutdown(wait=False)
+
+
+def export_response(queryset, export_format='ndjson', with_comments=False, compress=False, chunk_size=None,
+                    asynchronous=False):
+    """
+    Streams `queryset` as NDJSON or CSV, optionally gzipped.
+
+    Pass `asynchronous` under ASGI, so the response streams there too.
+    """
+    chunk_size = chunk_size or settings.TICKET_EXPORT_CHUNK_SIZE
+    rows = export_rows(queryset, with_comments=with_comments, chunk_size=chunk_size)
+    if export_format == 'csv':
+        lines, content_type, extension = csv_lines(rows, with_comments), 'text/csv; charset=utf-8', 'csv'
+    else:
+        lines, content_type, extension = ndjson_lines(rows), 'application/x-ndjson', 'ndjson'
+    chunks = _batched(lines, chunk_size)
+    filename = f'tickets.{extension}'
+    if compress:
+        chunks, content_type, filename = gzipped(chunks), 'application/gzip', f'{filename}.gz'
+    if asynchronous:
+        chunks = achunks(chunks)
+    response = StreamingHttpResponse(chunks, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
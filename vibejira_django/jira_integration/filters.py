@@ -0,0 +1,71 @@
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+from .search import search_tickets
+
+
+def split_param(value):
+    return [part.strip() for part in value.split(',') if part.strip()]
+
+
+def parse_datetime_param(name, raw):
+    # An unencoded '+' in a UTC offset arrives as a space.
+    try:
+        value = parse_datetime(raw.strip().replace(' ', '+'))
+    except ValueError:
+        value = None
+    if value is None:
+        raise ValidationError({name: 'Expected an ISO 8601 datetime.'})
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value
+
+
+class TicketFilterBackend(BaseFilterBackend):
+    """
+    Server-side ticket filters, each backed by a (field, updated_date) index.
+
+    - `status`, `priority`, `assignee`: exact match; comma-separate to match any of several.
+    - `project`: JIRA key or database PK (comma-separated for several).
+    - `updated_after` / `updated_before`: ISO 8601 bounds on updated_date
+      (inclusive / exclusive).
+    """
+    multi_value_fields = ('status', 'priority', 'assignee')
+
+    def filter_queryset(self, request, queryset, view):
+        params = request.query_params
+        for field in self.multi_value_fields:
+            values = split_param(params.get(field, ''))
+            if len(values) == 1:
+                queryset = queryset.filter(**{field: values[0]})
+            elif values:
+                queryset = queryset.filter(**{f'{field}__in': values})
+
+        projects = split_param(params.get('project', ''))
+        if projects:
+            ids = [int(p) for p in projects if p.isdigit()]
+            keys = [p for p in projects if not p.isdigit()]
+            if ids and not keys:
+                queryset = queryset.filter(project_id__in=ids)
+            elif keys and not ids:
+                queryset = queryset.filter(project__jira_key__in=keys)
+            else:
+                queryset = queryset.filter(project_id__in=ids) | queryset.filter(project__jira_key__in=keys)
+
+        for param, lookup in (('updated_after', 'updated_date__gte'), ('updated_before', 'updated_date__lt')):
+            raw = params.get(param)
+            if raw:
+                queryset = queryset.filter(**{lookup: parse_datetime_param(param, raw)})
+        return queryset
+
+
+class TicketSearchFilter(BaseFilterBackend):
+    """
+    Full-text search over ticket title and description via `?search=`.
+    """
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        return search_tickets(queryset, request.query_params.get(self.search_param, ''))
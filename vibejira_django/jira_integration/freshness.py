@@ -0,0 +1,158 @@
+import asyncio
+import logging
+import threading
+import weakref
+from concurrent.futures import Future
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+
+from .jira_utils import aget_jira_issue, get_jira_issue
+from .jobs import enqueue, task
+from .models import Job, Ticket
+from .sync import schedule_comment_sync, store_jira_issues
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key into a single execution.
+
+    The first caller for a key runs the function; callers arriving while it
+    is in flight block and receive the same result (or exception).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+
+_fetches = SingleFlight()
+
+
+def ticket_ttl(ticket, now=None):
+    """
+    Returns how long a synced ticket stays fresh.
+    """
+    now = now or timezone.now()
+    if ticket.updated_date and now - ticket.updated_date > timedelta(seconds=settings.TICKET_COLD_AFTER):
+        return timedelta(seconds=settings.TICKET_COLD_TTL)
+    return timedelta(seconds=settings.TICKET_TTL)
+
+
+def is_fresh(ticket, now=None):
+    now = now or timezone.now()
+    if ticket.synced_at is None:
+        # Never synced from JIRA (created or imported locally): there is
+        # nothing to refresh it from, like the outbox won't push it.
+        return True
+    return now - ticket.synced_at < ticket_ttl(ticket, now)
+
+
+def _store(jira_data):
+    if not jira_data or jira_data.get("error"):
+        return None, False
+    created, _ = store_jira_issues([jira_data])
+    return Ticket.objects.filter(jira_id=jira_data.get('key')).first(), bool(created)
+
+
+def _fetch_and_store(jira_id):
+    jira_data = get_jira_issue(jira_id)
+    return (*_store(jira_data), jira_data)
+
+
+def fetch_ticket(jira_id):
+    """
+    Fetches a ticket from JIRA and stores it locally.
+
+    Concurrent calls for the same jira_id share one upstream request.
+    Returns (ticket, created, jira_data); ticket is None if the fetch failed
+    (jira_data then carries the error) or the issue had no project key.
+    """
+    return _fetches.do(jira_id, lambda: _fetch_and_store(jira_id))
+
+
+@task
+def refresh_ticket(jira_id):
+    """
+    Job task: fetches a ticket from JIRA and stores it, then queues a sync
+    of its comments.
+
+    JIRA errors are returned rather than raised (the client already retried
+    them), so callers waiting on the job can report them.
+    """
+    return _refresh_outcome(jira_id, *fetch_ticket(jira_id))
+
+
+def _refresh_outcome(jira_id, ticket, created, jira_data):
+    if ticket is not None:
+        if settings.JIRA_SYNC_COMMENTS:
+            schedule_comment_sync(ticket.jira_id)
+        return {'jira_id': ticket.jira_id, 'created': created}
+    if jira_data and not jira_data.get('error'):
+        return {'error': 'Project key not found in JIRA data', 'project_missing': True}
+    jira_data = jira_data or {}
+    logger.warning("Refresh of %s failed: %s", jira_id, jira_data.get('error'))
+    return {key: jira_data[key] for key in ('error', 'status_code') if key in jira_data}
+
+
+# Per event loop: jira_id -> the task fetching it.
+_async_refreshes = weakref.WeakKeyDictionary()
+
+
+async def _arefresh(jira_id):
+    jira_data = await aget_jira_issue(jira_id)
+    return await sync_to_async(lambda: _refresh_outcome(jira_id, *_store(jira_data), jira_data))()
+
+
+def arefresh_ticket(jira_id):
+    """
+    Runs the refresh_ticket job's work on the running event loop instead of
+    a worker thread: the JIRA request is made by the async client, and only
+    storing the result touches a thread.
+
+    Returns an asyncio Task resolving to the job's result. Concurrent calls
+    for the same jira_id share one task, which runs to completion even if
+    its callers stop waiting.
+    """
+    loop = asyncio.get_running_loop()
+    tasks = _async_refreshes.setdefault(loop, {})
+    refresh = tasks.get(jira_id)
+    if refresh is None:
+        refresh = tasks[jira_id] = loop.create_task(_arefresh(jira_id))
+        refresh.add_done_callback(lambda _: tasks.pop(jira_id, None))
+    return refresh
+
+
+def schedule_refresh(jira_id, priority=Job.PRIORITY_LOW):
+    """
+    Queues a background refresh of a ticket unless one is already queued.
+
+    Returns (job, created); created is False if an existing job was reused.
+    """
+    return enqueue(refresh_ticket, jira_id, priority=priority, dedupe_key=f'ticket:{jira_id}')
@@ -1,39 +1,513 @@
+import asyncio
 import os
+import random
+import re
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from urllib.parse import quote
+
+import httpx
 import requests
+from requests.adapters import HTTPAdapter
 from requests.auth import HTTPBasicAuth
 from django.conf import settings
 
-def get_jira_issue(issue_key_or_id):
+from .upstream import get_circuit_breaker, get_rate_limiter, reset_upstream_guards
+
+# Statuses worth retrying. 429/503 are also the ones JIRA pairs with Retry-After.
+RETRY_STATUSES = {429, 502, 503, 504}
+# Non-idempotent requests are only retried when JIRA says it didn't process them.
+RETRY_STATUSES_UNSAFE = {429, 503}
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'}
+# Answers the circuit breaker counts as failures (besides connection errors and timeouts).
+BREAKER_FAILURE_STATUSES = {429} | set(range(500, 600))
+
+CIRCUIT_OPEN_ERROR = {"error": "JIRA is failing or too slow; calls are paused by the circuit breaker.", "status_code": 503, "circuit_open": True}
+RATE_LIMITED_ERROR = {"error": "Too many JIRA requests in flight; the local rate limit was reached.", "status_code": 429}
+
+
+def parse_retry_after(value):
+    """
+    Parses a Retry-After header (delta-seconds or HTTP-date) into seconds.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+class JiraClient:
+    """
+    Long-lived JIRA REST client sharing one keep-alive connection pool.
+
+    A single instance is safe to use from many threads. Failed requests are
+    retried with jittered exponential backoff, honouring Retry-After on 429
+    and 503 responses. Like the module-level helpers, request methods return
+    the decoded JSON body on success and an {"error": ...} dict on failure.
+
+    Each attempt first waits for a token from `limiter` (a TokenBucket), for
+    at most `rate_limit_wait` seconds, and is refused without a request
+    while `breaker` (a CircuitBreaker) is open.
+    """
+
+    def __init__(self, base_url, user_email, pat, pool_size=10, timeout=10,
+                 max_retries=3, backoff_base=0.5, backoff_max=30.0, sleep=time.sleep,
+                 breaker=None, limiter=None, rate_limit_wait=5.0):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._sleep = sleep
+        self.breaker = breaker
+        self.limiter = limiter
+        self.rate_limit_wait = rate_limit_wait
+
+        self.session = requests.Session()
+        # JIRA Cloud API expects Basic Auth with email and PAT as password
+        self.session.auth = HTTPBasicAuth(user_email, pat)
+        self.session.headers.update({"Accept": "application/json"})
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def close(self):
+        self.session.close()
+
+    def backoff_delay(self, attempt, response=None):
+        """
+        Returns how long to wait before retry number `attempt` (starting at 0).
+        """
+        if response is not None and response.status_code in (429, 503):
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            if retry_after is not None:
+                return retry_after
+        # "Full jitter": spreads retries from many threads over the whole window.
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def rate_limit_delay(self):
+        """
+        Returns (error, delay): an error dict if the attempt must not be made,
+        else how long to wait for the rate limiter first.
+        """
+        if self.breaker is not None and self.breaker.is_open():
+            return dict(CIRCUIT_OPEN_ERROR), 0
+        delay = self.limiter.reserve(self.rate_limit_wait) if self.limiter is not None else 0
+        if delay is None:
+            return dict(RATE_LIMITED_ERROR), 0
+        return None, delay
+
+    def admit(self):
+        """
+        Asks the breaker for the attempt, after any rate-limit wait. Returns
+        an error dict if it is refused, else the attempt's start time.
+        """
+        if self.breaker is not None and not self.breaker.allow():
+            return dict(CIRCUIT_OPEN_ERROR), None
+        return None, time.monotonic()
+
+    def record(self, started, failed):
+        if self.breaker is not None:
+            self.breaker.record(time.monotonic() - started, failed)
+
+    def request(self, method, path, params=None, json=None, timeout=None):
+        method = method.upper()
+        url = f"{self.base_url}{path}"
+        retry_statuses = RETRY_STATUSES if method in IDEMPOTENT_METHODS else RETRY_STATUSES_UNSAFE
+        attempt = 0
+
+        while True:
+            response = None
+            error, delay = self.rate_limit_delay()
+            if error is not None:
+                return error
+            if delay:
+                self._sleep(delay)
+            error, started = self.admit()
+            if error is not None:
+                return error
+            try:
+                response = self.session.request(
+                    method, url, params=params, json=json, timeout=timeout or self.timeout,
+                )
+                self.record(started, response.status_code in BREAKER_FAILURE_STATUSES)
+                if response.status_code in retry_statuses and attempt < self.max_retries:
+                    delay = self.backoff_delay(attempt, response)
+                    # A Retry-After longer than backoff_max is surfaced as an error
+                    # rather than parking the calling thread.
+                    if delay <= self.backoff_max:
+                        attempt += 1
+                        self._sleep(delay)
+                        continue
+                response.raise_for_status()  # Raises an HTTPError for bad responses (4XX or 5XX)
+                if response.status_code == 204 or not response.content:
+                    return {}
+                return response.json()
+            except requests.exceptions.HTTPError as http_err:
+                return {"error": f"HTTP error occurred: {http_err}", "status_code": response.status_code, "response_text": response.text}
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as err:
+                self.record(started, True)
+                if method in IDEMPOTENT_METHODS and attempt < self.max_retries:
+                    self._sleep(self.backoff_delay(attempt))
+                    attempt += 1
+                    continue
+                if isinstance(err, requests.exceptions.Timeout):
+                    return {"error": f"Request to JIRA timed out: {err}"}
+                return {"error": f"Error connecting to JIRA: {err}"}
+            except requests.exceptions.RequestException as req_err:
+                if response is None:
+                    self.record(started, True)
+                return {"error": f"An unexpected error occurred with the JIRA request: {req_err}"}
+
+    def get(self, path, params=None, timeout=None):
+        return self.request('GET', path, params=params, timeout=timeout)
+
+    def post(self, path, json=None, timeout=None):
+        return self.request('POST', path, json=json, timeout=timeout)
+
+    def put(self, path, json=None, timeout=None):
+        return self.request('PUT', path, json=json, timeout=timeout)
+
+
+class AsyncJiraClient:
+    """
+    asyncio counterpart of JiraClient, on an httpx connection pool of its own.
+
+    A request waiting on JIRA costs a coroutine rather than a thread, so one
+    process can hold thousands of slow upstream calls. Retries and return
+    values, and the breaker and rate limiter, work as in JiraClient. An
+    instance belongs to the event loop it is used on (see
+    get_async_jira_client()).
+    """
+
+    def __init__(self, base_url, user_email, pat, max_connections=100, timeout=10,
+                 max_retries=3, backoff_base=0.5, backoff_max=30.0, sleep=asyncio.sleep,
+                 breaker=None, limiter=None, rate_limit_wait=5.0):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._sleep = sleep
+        self.breaker = breaker
+        self.limiter = limiter
+        self.rate_limit_wait = rate_limit_wait
+
+        self.client = httpx.AsyncClient(
+            auth=(user_email, pat),
+            headers={"Accept": "application/json"},
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            follow_redirects=True,
+        )
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    backoff_delay = JiraClient.backoff_delay
+    rate_limit_delay = JiraClient.rate_limit_delay
+    admit = JiraClient.admit
+    record = JiraClient.record
+
+    async def request(self, method, path, params=None, json=None, timeout=None):
+        method = method.upper()
+        url = f"{self.base_url}{path}"
+        retry_statuses = RETRY_STATUSES if method in IDEMPOTENT_METHODS else RETRY_STATUSES_UNSAFE
+        attempt = 0
+
+        while True:
+            response = None
+            error, delay = self.rate_limit_delay()
+            if error is not None:
+                return error
+            if delay:
+                await self._sleep(delay)
+            error, started = self.admit()
+            if error is not None:
+                return error
+            try:
+                response = await self.client.request(
+                    method, url, params=params, json=json, timeout=timeout or self.timeout,
+                )
+                self.record(started, response.status_code in BREAKER_FAILURE_STATUSES)
+                if response.status_code in retry_statuses and attempt < self.max_retries:
+                    delay = self.backoff_delay(attempt, response)
+                    if delay <= self.backoff_max:
+                        attempt += 1
+                        await self._sleep(delay)
+                        continue
+                response.raise_for_status()
+                if response.status_code == 204 or not response.content:
+                    return {}
+                return response.json()
+            except httpx.HTTPStatusError as http_err:
+                return {"error": f"HTTP error occurred: {http_err}", "status_code": response.status_code, "response_text": response.text}
+            except httpx.TransportError as err:
+                self.record(started, True)
+                if method in IDEMPOTENT_METHODS and attempt < self.max_retries:
+                    await self._sleep(self.backoff_delay(attempt))
+                    attempt += 1
+                    continue
+                if isinstance(err, httpx.TimeoutException):
+                    return {"error": f"Request to JIRA timed out: {err!r}"}
+                return {"error": f"Error connecting to JIRA: {err!r}"}
+            except (httpx.HTTPError, ValueError) as req_err:
+                if response is None:
+                    self.record(started, True)
+                return {"error": f"An unexpected error occurred with the JIRA request: {req_err}"}
+
+    async def get(self, path, params=None, timeout=None):
+        return await self.request('GET', path, params=params, timeout=timeout)
+
+
+def jira_credentials():
     """
-    Fetches a JIRA issue by its key or ID.
+    Returns (base_url, user_email, pat) from the environment, or None if any is unset.
     """
     jira_base_url = os.getenv('JIRA_BASE_URL')
     jira_pat = os.getenv('JIRA_PAT')
-    jira_user_email = os.getenv('JIRA_USER_EMAIL') # Needed for Basic Auth with PAT
-
+    jira_user_email = os.getenv('JIRA_USER_EMAIL')  # Needed for Basic Auth with PAT
     if not all([jira_base_url, jira_pat, jira_user_email]):
-        # Consider logging this error as well
-        return {"error": "JIRA_BASE_URL, JIRA_PAT, or JIRA_USER_EMAIL environment variables not set."}
-
-    api_url = f"{jira_base_url}/rest/api/3/issue/{issue_key_or_id}"
-    
-    # JIRA Cloud API expects Basic Auth with email and PAT as password
-    auth = HTTPBasicAuth(jira_user_email, jira_pat)
-    
-    headers = {
-        "Accept": "application/json"
+        return None
+    return jira_base_url, jira_user_email, jira_pat
+
+
+_client = None
+_client_lock = threading.Lock()
+# One AsyncJiraClient per event loop: an httpx pool can't be shared between loops.
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_jira_client():
+    """
+    Returns the process-wide JiraClient, or None if JIRA isn't configured.
+
+    Credentials are read from the environment once, on first use.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                credentials = jira_credentials()
+                if credentials is None:
+                    return None
+                _client = JiraClient(
+                    *credentials,
+                    pool_size=settings.JIRA_POOL_SIZE,
+                    timeout=settings.JIRA_TIMEOUT,
+                    max_retries=settings.JIRA_MAX_RETRIES,
+                    backoff_base=settings.JIRA_BACKOFF_BASE,
+                    backoff_max=settings.JIRA_BACKOFF_MAX,
+                    breaker=get_circuit_breaker(),
+                    limiter=get_rate_limiter(),
+                    rate_limit_wait=settings.JIRA_RATE_LIMIT_WAIT,
+                )
+    return _client
+
+
+def get_async_jira_client():
+    """
+    Returns the running event loop's AsyncJiraClient, or None if JIRA isn't configured.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        credentials = jira_credentials()
+        if credentials is None:
+            return None
+        client = _async_clients[loop] = AsyncJiraClient(
+            *credentials,
+            max_connections=settings.JIRA_ASYNC_MAX_CONNECTIONS,
+            timeout=settings.JIRA_TIMEOUT,
+            max_retries=settings.JIRA_MAX_RETRIES,
+            backoff_base=settings.JIRA_BACKOFF_BASE,
+            backoff_max=settings.JIRA_BACKOFF_MAX,
+            breaker=get_circuit_breaker(),
+            limiter=get_rate_limiter(),
+            rate_limit_wait=settings.JIRA_RATE_LIMIT_WAIT,
+        )
+    return client
+
+
+def reset_jira_client():
+    """
+    Drops the shared clients, circuit breaker and rate limiter so the next
+    call re-reads configuration.
+    """
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+        _client = None
+        # Async clients can only be closed on their own loop; their
+        # connections go when the loop does.
+        _async_clients.clear()
+    reset_upstream_guards()
+
+
+NOT_CONFIGURED_ERROR = {"error": "JIRA_BASE_URL, JIRA_PAT, or JIRA_USER_EMAIL environment variables not set."}
+
+
+def get_jira_issue(issue_key_or_id, fields=None):
+    """
+    Fetches a JIRA issue by its key or ID, optionally only some of its fields.
+    """
+    client = get_jira_client()
+    if client is None:
+        return dict(NOT_CONFIGURED_ERROR)
+    params = {"fields": ",".join(fields)} if fields else None
+    return client.get(f"/rest/api/3/issue/{quote(str(issue_key_or_id), safe='')}", params=params)
+
+
+async def aget_jira_issue(issue_key_or_id, fields=None):
+    """
+    get_jira_issue() for async code, on the event loop's AsyncJiraClient.
+    """
+    client = get_async_jira_client()
+    if client is None:
+        return dict(NOT_CONFIGURED_ERROR)
+    params = {"fields": ",".join(fields)} if fields else None
+    return await client.get(f"/rest/api/3/issue/{quote(str(issue_key_or_id), safe='')}", params=params)
+
+
+def update_jira_issue(issue_key_or_id, fields):
+    """
+    Sets fields on an issue (e.g. priority or assignee). Returns {} on success.
+    """
+    client = get_jira_client()
+    if client is None:
+        return dict(NOT_CONFIGURED_ERROR)
+    return client.put(f"/rest/api/3/issue/{quote(str(issue_key_or_id), safe='')}", json={"fields": fields})
+
+
+def get_jira_transitions(issue_key_or_id):
+    """
+    Returns the workflow transitions currently available on an issue.
+    """
+    client = get_jira_client()
+    if client is None:
+        return dict(NOT_CONFIGURED_ERROR)
+    return client.get(f"/rest/api/3/issue/{quote(str(issue_key_or_id), safe='')}/transitions")
+
+
+def transition_jira_issue(issue_key_or_id, transition_id):
+    """
+    Moves an issue through a workflow transition. Returns {} on success.
+    """
+    client = get_jira_client()
+    if client is None:
+        return dict(NOT_CONFIGURED_ERROR)
+    payload = {"transition": {"id": str(transition_id)}}
+    return client.post(f"/rest/api/3/issue/{quote(str(issue_key_or_id), safe='')}/transitions", json=payload)
+
+
+def find_jira_users(query):
+    """
+    Searches JIRA users by display name or email; returns a list or an error dict.
+    """
+    client = get_jira_client()
+    if client is None:
+        return dict(NOT_CONFIGURED_ERROR)
+    return client.get("/rest/api/3/user/search", params={"query": query})
+
+
+def search_jira_issues(jql, start_at=0, max_results=100, fields=None):
+    """
+    Runs a JQL search and returns one page of results.
+    """
+    client = get_jira_client()
+    if client is None:
+        return dict(NOT_CONFIGURED_ERROR)
+    params = {
+        "jql": jql,
+        "startAt": start_at,
+        "maxResults": max_results,
     }
+    if fields:
+        params["fields"] = ",".join(fields)
+    return client.get("/rest/api/3/search", params=params, timeout=settings.JIRA_SEARCH_TIMEOUT)
 
-    try:
-        response = requests.get(api_url, headers=headers, auth=auth, timeout=10)
-        response.raise_for_status()  # Raises an HTTPError for bad responses (4XX or 5XX)
-        return response.json()
-    except requests.exceptions.HTTPError as http_err:
-        # Handle specific HTTP errors if needed
-        return {"error": f"HTTP error occurred: {http_err}", "status_code": response.status_code, "response_text": response.text}
-    except requests.exceptions.ConnectionError as conn_err:
-        return {"error": f"Error connecting to JIRA: {conn_err}"}
-    except requests.exceptions.Timeout as timeout_err:
-        return {"error": f"Request to JIRA timed out: {timeout_err}"}
-    except requests.exceptions.RequestException as req_err:
-        return {"error": f"An unexpected error occurred with the JIRA request: {req_err}"}
+
+def get_jira_comments(issue_key_or_id, start_at=0, max_results=100):
+    """
+    Returns one page of an issue's comments, oldest first.
+    """
+    client = get_jira_client()
+    if client is None:
+        return dict(NOT_CONFIGURED_ERROR)
+    params = {"startAt": start_at, "maxResults": max_results, "orderBy": "created"}
+    return client.get(f"/rest/api/3/issue/{quote(str(issue_key_or_id), safe='')}/comment", params=params)
+
+
+def add_jira_comment(issue_key_or_id, body):
+    """
+    Adds a plain-text comment to an issue and returns the created comment.
+    """
+    client = get_jira_client()
+    if client is None:
+        return dict(NOT_CONFIGURED_ERROR)
+    # API v3 only accepts ADF bodies; one paragraph per line.
+    paragraphs = [
+        {"type": "paragraph", "content": [{"type": "text", "text": line}] if line else []}
+        for line in body.split('\n')
+    ]
+    payload = {"body": {"type": "doc", "version": 1, "content": paragraphs}}
+    return client.post(f"/rest/api/3/issue/{quote(str(issue_key_or_id), safe='')}/comment", json=payload)
+
+
+# Issue keys that are safe to splice into a JQL `key in (...)` clause.
+ISSUE_KEY_RE = re.compile(r'^[A-Za-z][A-Za-z0-9_]*-[0-9]+$')
+
+
+def get_jira_issues(issue_keys, fields=None, batch_size=None, max_workers=None):
+    """
+    Fetches many JIRA issues concurrently.
+
+    Keys are folded into `key in (...)` JQL searches of up to `batch_size`
+    keys each, run on a bounded thread pool over the shared connection pool.
+    Keys a search can't answer (unknown or moved keys make JIRA reject or
+    skip them) fall back to individual issue fetches on the same pool.
+    Returns a dict mapping every requested key to its issue dict, or to an
+    {"error": ...} dict if that key couldn't be fetched.
+    """
+    batch_size = batch_size or settings.JIRA_BATCH_SIZE
+    max_workers = max_workers or settings.JIRA_BATCH_WORKERS
+    keys = list(dict.fromkeys(issue_keys))
+    results = {}
+    if not keys:
+        return results
+
+    foldable = [key for key in keys if ISSUE_KEY_RE.match(key)]
+    single = [key for key in keys if not ISSUE_KEY_RE.match(key)]
+    chunks = [foldable[i:i + batch_size] for i in range(0, len(foldable), batch_size)]
+
+    def search_chunk(chunk):
+        jql = f"key in ({','.join(chunk)})"
+        return chunk, search_jira_issues(jql, max_results=len(chunk), fields=fields)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for chunk, page in executor.map(search_chunk, chunks):
+            if page.get('error'):
+                single.extend(chunk)
+                continue
+            by_key = {issue.get('key', '').upper(): issue for issue in page.get('issues') or []}
+            for key in chunk:
+                issue = by_key.get(key.upper())
+                if issue is None:
+                    single.append(key)
+                else:
+                    results[key] = issue
+
+        for key, issue in zip(single, executor.map(get_jira_issue, single)):
+            results[key] = issue
+
+    return {key: results[key] for key in keys}
@@ -0,0 +1,387 @@
+import logging
+import os
+import random
+import socket
+import threading
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .events import prune_events
+from .models import DeadLetterJob, Job
+
+logger = logging.getLogger(__name__)
+
+
+class PermanentJobError(Exception):
+    """Raised by a task to dead-letter its job without further retries."""
+
+
+class JobFailed(Exception):
+    """Raised by wait() when the job was dead-lettered."""
+
+
+def task(fn):
+    """
+    Marks a function as runnable by the job queue.
+
+    Tasks take and return JSON-serializable values. Raising retries the
+    job with backoff; raising PermanentJobError dead-letters it at once.
+    """
+    fn.task_name = f'{fn.__module__}.{fn.__qualname__}'
+    fn.is_job_task = True
+    return fn
+
+
+def resolve_task(name):
+    try:
+        fn = import_string(name)
+    except ImportError as e:
+        raise PermanentJobError(str(e))
+    if not getattr(fn, 'is_job_task', False):
+        raise PermanentJobError(f"{name} is not a job task")
+    return fn
+
+
+def enqueue(fn, *args, priority=Job.PRIORITY_NORMAL, dedupe_key=None, max_attempts=None, delay=None):
+    """
+    Queues fn(*args) and returns (job, created).
+
+    With a `dedupe_key`, a job with the same key that is still queued or
+    running is returned instead of queueing another. `delay` (seconds)
+    holds the job back, e.g. to let more work pile up for it. In JOBS_EAGER
+    mode the job runs before this returns, delay or not.
+    """
+    if dedupe_key:
+        existing = Job.objects.filter(dedupe_key=dedupe_key).first()
+        if existing is not None:
+            return existing, False
+    try:
+        with transaction.atomic():
+            job = Job.objects.create(
+                task=fn.task_name,
+                args=list(args),
+                priority=priority,
+                dedupe_key=dedupe_key,
+                max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+                run_at=timezone.now() + timedelta(seconds=delay or 0),
+            )
+    except IntegrityError:
+        # Lost a race with another enqueue of the same key.
+        existing = Job.objects.filter(dedupe_key=dedupe_key).first()
+        if existing is None:
+            return enqueue(fn, *args, priority=priority, dedupe_key=dedupe_key, max_attempts=max_attempts, delay=delay)
+        return existing, False
+
+    if settings.JOBS_EAGER:
+        if claim(job.pk, 'eager'):
+            job.refresh_from_db()
+            run_job(job)
+    else:
+        transaction.on_commit(wake_workers)
+    return job, True
+
+
+def enqueue_many(fn, calls, priority=Job.PRIORITY_NORMAL):
+    """
+    Queues fn(*args) for every (args, dedupe_key) pair in `calls` with one
+    bulk insert.
+
+    As with enqueue(), a call whose dedupe_key is held by a queued or
+    running job is dropped. In JOBS_EAGER mode each call goes through
+    enqueue() and runs before this returns.
+    """
+    calls = list(calls)
+    if settings.JOBS_EAGER:
+        for args, dedupe_key in calls:
+            enqueue(fn, *args, priority=priority, dedupe_key=dedupe_key)
+        return
+    now = timezone.now()
+    Job.objects.bulk_create(
+        [
+            Job(task=fn.task_name, args=list(args), priority=priority, dedupe_key=dedupe_key,
+                max_attempts=settings.JOB_MAX_ATTEMPTS, run_at=now)
+            for args, dedupe_key in calls
+        ],
+        ignore_conflicts=True,
+    )
+    transaction.on_commit(wake_workers)
+
+
+def wait(job, timeout, run_after=None):
+    """
+    Blocks until `job` finishes and returns its result.
+
+    With `run_after`, a job no worker has claimed within that many seconds
+    (e.g. because none is running) is claimed and run in the calling
+    thread instead. Raises TimeoutError if it hasn't finished within
+    `timeout` seconds and JobFailed if it was dead-lettered.
+    """
+    deadline = time.monotonic() + timeout
+    run_at = None if run_after is None else time.monotonic() + run_after
+    delay = 0.01
+    while True:
+        job.refresh_from_db(fields=['status', 'result', 'last_error'])
+        if job.status == Job.STATUS_DONE:
+            return job.result
+        if job.status == Job.STATUS_FAILED:
+            raise JobFailed(job.last_error)
+        if run_at is not None and time.monotonic() >= run_at:
+            run_at = None
+            if claim(job.pk, 'inline'):
+                job.refresh_from_db()
+                run_job(job)
+                continue
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError(f"Job {job.pk} did not finish within {timeout}s")
+        time.sleep(min(delay, remaining))
+        delay = min(delay * 2, 0.25)
+
+
+def claim(job_id, worker_id):
+    """
+    Atomically moves a queued job to running. Returns True if this caller got it.
+    """
+    return bool(Job.objects.filter(pk=job_id, status=Job.STATUS_QUEUED).update(
+        status=Job.STATUS_RUNNING, locked_by=worker_id, locked_at=timezone.now(),
+        attempts=F('attempts') + 1,
+    ))
+
+
+def claim_next(worker_id):
+    """
+    Claims the highest-priority due job, or returns None if there is none.
+
+    Claiming is a conditional UPDATE, so any number of workers in any
+    number of processes can poll the same table without SELECT ... FOR UPDATE.
+    """
+    candidates = list(
+        Job.objects.filter(status=Job.STATUS_QUEUED, run_at__lte=timezone.now())
+        .order_by('-priority', 'run_at', 'pk')
+        .values_list('pk', flat=True)[:10]
+    )
+    for job_id in candidates:
+        if claim(job_id, worker_id):
+            return Job.objects.get(pk=job_id)
+    return None
+
+
+def backoff_delay(attempts):
+    # Full jitter, as in JiraClient.backoff_delay.
+    return random.uniform(0, min(settings.JOB_BACKOFF_MAX, settings.JOB_BACKOFF_BASE * (2 ** attempts)))
+
+
+_running = threading.local()
+
+
+def heartbeat():
+    """
+    Renews the lock of the job the calling thread is running, so
+    recover_stale_jobs() doesn't mistake it for an orphaned one.
+
+    Tasks that can outlast JOB_LOCK_TIMEOUT call this as they make
+    progress. Outside a job it does nothing.
+    """
+    job = getattr(_running, 'job', None)
+    if job is not None:
+        Job.objects.filter(pk=job.pk, status=Job.STATUS_RUNNING, locked_by=job.locked_by).update(
+            locked_at=timezone.now(),
+        )
+
+
+def run_job(job):
+    """
+    Runs a claimed job and records its outcome: done, retried or dead-lettered.
+    """
+    # Eager jobs can run inside another job; put the outer one back after.
+    outer, _running.job = getattr(_running, 'job', None), job
+    try:
+        result = resolve_task(job.task)(*job.args)
+    except Exception as e:
+        error = ''.join(traceback.format_exception(e))
+        if isinstance(e, PermanentJobError) or job.attempts >= job.max_attempts:
+            logger.error("Job %s %s failed permanently: %s", job.pk, job.task, e)
+            _dead_letter(job, error)
+        else:
+            logger.warning("Job %s %s failed (attempt %s): %s", job.pk, job.task, job.attempts, e)
+            Job.objects.filter(pk=job.pk).update(
+                status=Job.STATUS_QUEUED, locked_by='', locked_at=None, last_error=error,
+                run_at=timezone.now() + timedelta(seconds=backoff_delay(job.attempts)),
+            )
+        return
+    finally:
+        _running.job = outer
+    Job.objects.filter(pk=job.pk).update(
+        status=Job.STATUS_DONE, result=result, dedupe_key=None, finished_at=timezone.now(),
+    )
+
+
+def _dead_letter(job, error):
+    with transaction.atomic():
+        DeadLetterJob.objects.create(
+            job_id=job.pk, task=job.task, args=job.args, priority=job.priority,
+            attempts=job.attempts, error=error, enqueued_at=job.created_at,
+        )
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.STATUS_FAILED, last_error=error, dedupe_key=None, finished_at=timezone.now(),
+        )
+
+
+def requeue_dead_letter(dead):
+    """
+    Queues a dead-lettered job again and drops its dead-letter entry.
+    """
+    with transaction.atomic():
+        job = Job.objects.create(task=dead.task, args=dead.args, priority=dead.priority,
+                                 max_attempts=settings.JOB_MAX_ATTEMPTS)
+        dead.delete()
+    transaction.on_commit(wake_workers)
+    return job
+
+
+def recover_stale_jobs():
+    """
+    Requeues running jobs whose lock is older than JOB_LOCK_TIMEOUT, i.e.
+    whose worker was killed mid-job. Long tasks renew it with heartbeat().
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.JOB_LOCK_TIMEOUT)
+    return Job.objects.filter(status=Job.STATUS_RUNNING, locked_at__lt=cutoff).update(
+        status=Job.STATUS_QUEUED, locked_by='', locked_at=None,
+    )
+
+
+def prune_finished_jobs():
+    cutoff = timezone.now() - timedelta(seconds=settings.JOB_RESULT_TTL)
+    return Job.objects.filter(
+        status__in=[Job.STATUS_DONE, Job.STATUS_FAILED], finished_at__lt=cutoff,
+    ).delete()[0]
+
+
+def run_pending(worker_id='inline', limit=None):
+    """
+    Runs due jobs in the calling thread until none are left (or `limit` ran).
+    Returns the number of jobs run.
+    """
+    ran = 0
+    while limit is None or ran < limit:
+        job = claim_next(worker_id)
+        if job is None:
+            break
+        run_job(job)
+        ran += 1
+    return ran
+
+
+_wakeup = threading.Event()
+
+
+def wake_workers():
+    """Tells idle in-process workers to poll now rather than at their next interval."""
+    _wakeup.set()
+
+
+class Worker:
+    """
+    A pool of threads that claim and run jobs until stopped.
+
+    `run_workers` starts one per process; the web process may also run a
+    small embedded one (see JOB_EMBEDDED_WORKERS).
+    """
+
+    def __init__(self, threads=None, poll_interval=None, name=None):
+        self.threads = threads or settings.JOB_WORKER_THREADS
+        self.poll_interval = poll_interval or settings.JOB_POLL_INTERVAL
+        self.name = name or f'{socket.gethostname()}:{os.getpid()}'
+        self._stop = threading.Event()
+        self._threads = []
+        self._maintenance_lock = threading.Lock()
+        self._next_maintenance = 0
+
+    def start(self, daemon=False):
+        for i in range(self.threads):
+            thread = threading.Thread(
+                target=self._loop, args=(f'{self.name}:{i}',),
+                name=f'job-worker-{i}', daemon=daemon,
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        self._stop.set()
+        _wakeup.set()
+
+    def join(self):
+        for thread in self._threads:
+            thread.join()
+
+    def run(self):
+        self.start()
+        try:
+            self._stop.wait()
+        finally:
+            self.stop()
+            self.join()
+
+    def maintain(self):
+        # At most one thread per worker does housekeeping per interval.
+        now = time.monotonic()
+        with self._maintenance_lock:
+            if now < self._next_maintenance:
+                return
+            self._next_maintenance = now + settings.JOB_LOCK_TIMEOUT / 4
+        recovered = recover_stale_jobs()
+        if recovered:
+            logger.warning("Requeued %s stale jobs", recovered)
+        prune_finished_jobs()
+        prune_events()
+
+    def _loop(self, worker_id):
+        while not self._stop.is_set():
+            close_old_connections()
+            try:
+                job = claim_next(worker_id)
+                if job is not None:
+                    run_job(job)
+                    continue
+                self.maintain()
+            except Exception:
+                logger.exception("Job worker %s failed to claim or run a job", worker_id)
+            if _wakeup.wait(self.poll_interval):
+                _wakeup.clear()
+        connection.close()
+
+
+_embedded = None
+_embedded_lock = threading.Lock()
+
+
+def workers_running():
+    """
+    Whether anything besides the calling request works through the queue:
+    run_workers processes (JOB_EXTERNAL_WORKERS) or this process's embedded
+    worker threads.
+    """
+    return settings.JOB_EXTERNAL_WORKERS or _embedded is not None
+
+
+def ensure_embedded_workers():
+    """
+    Starts the in-process worker threads once, if JOB_EMBEDDED_WORKERS > 0.
+
+    Called from the WSGI/ASGI entry points, so only web processes (including
+    runserver) run them; management commands that merely enqueue don't.
+    """
+    global _embedded
+    if settings.JOBS_EAGER or settings.JOB_EMBEDDED_WORKERS <= 0:
+        return
+    with _embedded_lock:
+        if _embedded is None:
+            _embedded = Worker(threads=settings.JOB_EMBEDDED_WORKERS, name=f'embedded:{os.getpid()}')
+            _embedded.start(daemon=True)
@@ -0,0 +1,61 @@
+import multiprocessing
+import signal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from jira_integration.jobs import Worker, run_pending
+
+
+def _serve(threads, poll_interval):
+    worker = Worker(threads=threads, poll_interval=poll_interval)
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: worker.stop())
+    worker.run()
+
+
+class Command(BaseCommand):
+    help = "Run job queue workers (JIRA fetches, project syncs, webhook events) until stopped."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, help="Worker threads per process (default JOB_WORKER_THREADS).")
+        parser.add_argument('--processes', type=int, default=1, help="Worker processes to fork.")
+        parser.add_argument('--poll-interval', type=float, help="Seconds between polls while idle.")
+        parser.add_argument('--burst', action='store_true', help="Run every due job in this thread, then exit.")
+
+    def handle(self, *args, **options):
+        if options['burst']:
+            ran = run_pending()
+            self.stdout.write(f"Ran {ran} jobs")
+            return
+
+        threads = options['threads'] or settings.JOB_WORKER_THREADS
+        processes = options['processes']
+        if threads < 1 or processes < 1:
+            raise CommandError("--threads and --processes must be at least 1.")
+        self.stdout.write(f"Starting {processes} worker process(es) x {threads} thread(s)")
+
+        if processes == 1:
+            _serve(threads, options['poll_interval'])
+            return
+
+        # Children must not share the parent's database connections.
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        children = [
+            context.Process(target=_serve, args=(threads, options['poll_interval']), name=f'job-worker-{i}')
+            for i in range(processes)
+        ]
+        for child in children:
+            child.start()
+
+        def stop_children(*_):
+            for child in children:
+                if child.is_alive():
+                    child.terminate()
+
+        signal.signal(signal.SIGINT, stop_children)
+        signal.signal(signal.SIGTERM, stop_children)
+        for child in children:
+            child.join()
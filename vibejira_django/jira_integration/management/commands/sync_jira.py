@@ -0,0 +1,65 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from jira_integration.jobs import enqueue
+from jira_integration.models import Project
+from jira_integration.sync import sync_project_job, sync_projects
+
+
+class Command(BaseCommand):
+    help = "Sync JIRA issues into the local Ticket table, incrementally per project."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'projects', nargs='*',
+            help="JIRA project keys to sync. Defaults to every local project.",
+        )
+        parser.add_argument(
+            '--full', action='store_true',
+            help="Ignore the stored watermark and re-fetch every issue.",
+        )
+        parser.add_argument(
+            '--comments', action='store_true',
+            help="Also queue a comment sync for every issue the sync sees.",
+        )
+        parser.add_argument('--page-size', type=int, help="Issues requested per JIRA search page.")
+        parser.add_argument('--batch-size', type=int, help="Rows written per bulk insert/update batch.")
+        parser.add_argument(
+            '--enqueue', action='store_true',
+            help="Queue one sync job per project for run_workers instead of syncing here.",
+        )
+
+    def handle(self, *args, **options):
+        if options['enqueue']:
+            keys = options['projects'] or list(Project.objects.values_list('jira_key', flat=True))
+            # A queued incremental sync doesn't stand in for a full one (or one
+            # queuing comment syncs); the sizes only change how the work is done.
+            modes = [flag for flag in ('full', 'comments') if options[flag]]
+            for key in keys:
+                job, created = enqueue(
+                    sync_project_job, key, options['full'], options['comments'],
+                    options['page_size'], options['batch_size'],
+                    dedupe_key=':'.join(['sync', key, *modes]),
+                )
+                self.stdout.write(f"{key}: {'queued' if created else 'already queued'} as job {job.pk}")
+            return
+
+        results = sync_projects(
+            jira_keys=options['projects'],
+            full=options['full'],
+            page_size=options['page_size'],
+            batch_size=options['batch_size'],
+            comments=options['comments'],
+        )
+
+        failed = []
+        for key, stats in results.items():
+            if 'error' in stats:
+                failed.append(key)
+                self.stderr.write(f"{key}: {stats['error']}")
+            else:
+                self.stdout.write(
+                    f"{key}: fetched {stats['fetched']}, "
+                    f"created {stats['created']}, updated {stats['updated']}"
+                )
+        if failed:
+            raise CommandError(f"Sync failed for: {', '.join(failed)}")
@@ -0,0 +1,225 @@
+from datetime import date, datetime
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .adf import content_hash, render_description
+from .models import Comment, Project, Ticket
+
+
+def parse_jira_datetime(value):
+    """
+    Parses a JIRA timestamp such as '2024-03-01T10:00:00.000+0000'.
+
+    datetime.fromisoformat handles JIRA's format directly and is several
+    times faster than parse_datetime's regex, which is kept as a fallback.
+    """
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        parsed = parse_datetime(value)
+        if parsed is None:
+            return None
+    if parsed.tzinfo is None:
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def parse_jira_date(value):
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        return parse_date(value)
+
+
+def _text(value):
+    return value or ''
+
+
+def _name(value):
+    return (value or {}).get('name') or ''
+
+
+def _display_name(value):
+    return (value or {}).get('displayName')
+
+
+def _identity(value):
+    return value
+
+
+# (Ticket field, JIRA field, converter), applied in one pass over each issue's `fields`.
+FIELD_SPECS = (
+    ('title', 'summary', _text),
+    ('description', 'description', _identity),
+    ('status', 'status', _name),
+    ('priority', 'priority', _name),
+    ('assignee', 'assignee', _display_name),
+    ('reporter', 'reporter', _display_name),
+    ('created_date', 'created', parse_jira_datetime),
+    ('updated_date', 'updated', parse_jira_datetime),
+    ('due_date', 'duedate', parse_jira_date),
+)
+
+# Only ask JIRA for the fields we actually map onto Ticket.
+SEARCH_FIELDS = [jira_field for _, jira_field, _ in FIELD_SPECS] + ['project']
+
+# Column order of the tuples produced by IssueMapper.to_rows().
+ROW_FIELDS = ('jira_id', 'project_key') + tuple(field for field, _, _ in FIELD_SPECS)
+
+
+def map_fields(fields):
+    """
+    Converts a JIRA `fields` dict into Ticket field values.
+
+    A missing `updated` falls back to now and a missing `created` to `updated`.
+    """
+    values = {field: convert(fields.get(jira_field)) for field, jira_field, convert in FIELD_SPECS}
+    if values['updated_date'] is None:
+        values['updated_date'] = timezone.now()
+    if values['created_date'] is None:
+        values['created_date'] = values['updated_date']
+    return values
+
+
+def _ticket(values, **extra):
+    # The description is stored as its source plus a hash; rendering is left
+    # to render_descriptions, which can skip rows whose hash is unchanged.
+    source = values.pop('description')
+    if isinstance(source, dict):
+        extra.update(description=None, description_adf=source)
+    else:
+        extra.update(description=source or None, description_adf=None)
+    extra['description_hash'] = content_hash(source) if source else None
+    return Ticket(**extra, **values)
+
+
+def render_descriptions(tickets, known_hashes=None):
+    """
+    Renders the description text and HTML of mapped tickets.
+
+    Tickets whose description hash matches `known_hashes[jira_id]` (the
+    stored row's hash) are left unrendered; their jira_ids are returned so
+    the caller can leave the stored rendering alone.
+    """
+    known_hashes = known_hashes or {}
+    unchanged = set()
+    for ticket in tickets:
+        if ticket.description_hash and known_hashes.get(ticket.jira_id) == ticket.description_hash:
+            unchanged.add(ticket.jira_id)
+            continue
+        source = ticket.description_adf if ticket.description_adf is not None else ticket.description
+        rendered = render_description(source)
+        ticket.description, ticket.description_html = rendered.text, rendered.html
+    return unchanged
+
+
+def comment_from_jira(data, ticket, fallback_time=None):
+    """
+    Builds an unsaved Comment from a JIRA comment dict.
+
+    ADF bodies are stored as plaintext. A missing `updated` falls back to
+    `fallback_time`, then to now.
+    """
+    author = data.get('updateAuthor') or data.get('author') or {}
+    updated = parse_jira_datetime(data.get('updated')) or fallback_time or timezone.now()
+    return Comment(
+        ticket=ticket,
+        jira_id=str(data.get('id') or '') or None,
+        author_name=author.get('displayName'),
+        body=render_description(data.get('body')).text or '',
+        created_date=parse_jira_datetime(data.get('created')) or updated,
+        updated_date=updated,
+    )
+
+
+def project_key_of(issue):
+    return ((issue.get('fields') or {}).get('project') or {}).get('key')
+
+
+class IssueMapper:
+    """
+    Maps raw JIRA issue dicts onto Ticket instances or plain row tuples.
+
+    Projects are resolved once per batch: one query for every key the batch
+    mentions, plus one insert for the keys not stored yet. The mapper keeps
+    them cached, so reuse one instance across the pages of a sync.
+    """
+
+    def __init__(self, projects=None):
+        self._projects = {project.jira_key: project for project in projects or []}
+
+    def resolve_projects(self, issues):
+        """
+        Loads (creating if missing) the Project of every issue in `issues`.
+        """
+        wanted = {}
+        for issue in issues:
+            project_data = (issue.get('fields') or {}).get('project') or {}
+            key = project_data.get('key')
+            if key and key not in self._projects and key not in wanted:
+                wanted[key] = project_data.get('name') or 'Unnamed Project'
+        if not wanted:
+            return
+        found = {p.jira_key: p for p in Project.objects.filter(jira_key__in=wanted)}
+        missing = [Project(jira_key=key, name=name) for key, name in wanted.items() if key not in found]
+        if missing:
+            # Another writer may create the same project concurrently; reload after inserting.
+            Project.objects.bulk_create(missing, ignore_conflicts=True)
+            found.update((p.jira_key, p) for p in Project.objects.filter(jira_key__in=[p.jira_key for p in missing]))
+        self._projects.update(found)
+
+    def to_ticket(self, issue, project=None):
+        """
+        Builds an unsaved Ticket, or returns None if the issue has no known project.
+
+        Like to_tickets, the description is not rendered yet; see render_descriptions.
+        """
+        if project is None:
+            key = project_key_of(issue)
+            if key and key not in self._projects:
+                self.resolve_projects([issue])
+            project = self._projects.get(key)
+            if project is None:
+                return None
+        return _ticket(
+            map_fields(issue.get('fields') or {}),
+            project=project, jira_id=issue.get('key'), synced_at=timezone.now(),
+        )
+
+    def to_tickets(self, issues, project=None):
+        """
+        Maps a batch of issues onto unsaved Tickets in one pass.
+
+        With `project`, every issue is assigned to it; otherwise each issue's
+        own project is used and issues without one are skipped. Descriptions
+        are rendered by upsert_tickets, only for rows whose hash changed.
+        """
+        if project is None:
+            self.resolve_projects(issues)
+        now = timezone.now()
+        tickets = []
+        for issue in issues:
+            target = project or self._projects.get(project_key_of(issue))
+            if target is None:
+                continue
+            tickets.append(_ticket(
+                map_fields(issue.get('fields') or {}),
+                project=target, jira_id=issue.get('key'), synced_at=now,
+            ))
+        return tickets
+
+    def to_rows(self, issues):
+        """
+        Maps issues onto tuples ordered as ROW_FIELDS, without touching the database.
+        """
+        rows = []
+        for issue in issues:
+            fields = issue.get('fields') or {}
+            values = map_fields(fields)
+            rows.append((issue.get('key'), project_key_of(issue)) + tuple(values[field] for field in ROW_FIELDS[2:]))
+        return rows
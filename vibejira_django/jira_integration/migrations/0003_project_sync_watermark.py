@@ -0,0 +1,23 @@
+# Generated by Django 5.2.1 on 2026-10-16 22:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jira_integration', '0002_alter_comment_author_alter_comment_created_date_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='last_synced_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='sync_watermark',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
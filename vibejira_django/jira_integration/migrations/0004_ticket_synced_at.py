@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-16 22:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jira_integration', '0003_project_sync_watermark'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='synced_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.1 on 2026-10-16 22:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jira_integration', '0004_ticket_synced_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='ticket',
+            name='project',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tickets', to='jira_integration.project'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.1 on 2026-10-16 23:40
+
+from importlib import import_module
+
+import django.utils.timezone
+from django.db import migrations, models
+
+search_migration = import_module('jira_integration.migrations.0007_ticket_full_text_search')
+
+
+def restore_search_triggers(apps, schema_editor):
+    # Adding a NOT NULL column makes SQLite rebuild the ticket table, which
+    # drops the FTS5 sync triggers; recreate them and resync the index.
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in search_migration.SQLITE_BACKWARD[:3] + search_migration.SQLITE_FORWARD[1:]:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jira_integration', '0007_ticket_full_text_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, restore_search_triggers),
+        migrations.AddField(
+            model_name='comment',
+            name='modified_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='modified_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='modified_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(restore_search_triggers, migrations.RunPython.noop),
+    ]
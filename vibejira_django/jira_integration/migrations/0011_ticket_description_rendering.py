@@ -0,0 +1,57 @@
+# Generated by Django 5.2.1 on 2026-10-16 22:50
+
+import ast
+
+from django.db import migrations, models
+
+from jira_integration.adf import render_description
+
+
+def render_existing_descriptions(apps, schema_editor):
+    # Tickets fetched from API v3 before this migration hold the Python repr
+    # of their ADF document; recover it and render both forms.
+    Ticket = apps.get_model('jira_integration', 'Ticket')
+    pending = []
+    for ticket in Ticket.objects.exclude(description__isnull=True).exclude(description='').iterator(chunk_size=500):
+        source = ticket.description
+        if source.startswith('{') and "'type': 'doc'" in source:
+            try:
+                source = ast.literal_eval(source)
+            except (ValueError, SyntaxError):
+                pass
+        rendered = render_description(source)
+        ticket.description, ticket.description_html = rendered.text, rendered.html
+        ticket.description_adf, ticket.description_hash = rendered.adf, rendered.hash
+        pending.append(ticket)
+        if len(pending) >= 500:
+            Ticket.objects.bulk_update(pending, ['description', 'description_adf', 'description_html', 'description_hash'])
+            pending = []
+    Ticket.objects.bulk_update(pending, ['description', 'description_adf', 'description_html', 'description_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jira_integration', '0010_job_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='description_adf',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='description_hash',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='description_html',
+            field=models.TextField(blank=True, null=True),
+        ),
+        # The new columns are nullable without defaults, so SQLite adds them in
+        # place and the full-text search triggers survive.
+        migrations.RunPython(render_existing_descriptions, migrations.RunPython.noop),
+    ]
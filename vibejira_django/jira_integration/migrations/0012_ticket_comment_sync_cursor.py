@@ -0,0 +1,23 @@
+# Generated by Django 5.2.1 on 2026-10-16 22:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jira_integration', '0011_ticket_description_rendering'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='comment_sync_last_id',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='comment_sync_offset',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.1 on 2026-10-16 23:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jira_integration', '0013_outbox_entry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TicketEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type', models.CharField(max_length=32)),
+                ('ticket_id', models.BigIntegerField()),
+                ('jira_id', models.CharField(max_length=100)),
+                ('project_id', models.BigIntegerField()),
+                ('comment_id', models.BigIntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['project_id', 'id'], name='ticketevent_project_id_idx')],
+            },
+        ),
+    ]
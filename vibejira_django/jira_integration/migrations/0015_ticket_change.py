@@ -0,0 +1,37 @@
+# Generated by Django 5.2.1 on 2026-10-16 23:44
+
+from django.db import migrations, models
+
+
+def backfill_changes(apps, schema_editor):
+    # Existing tickets enter the log, so a client starting with no cursor gets them all.
+    Ticket = apps.get_model('jira_integration', 'Ticket')
+    TicketChange = apps.get_model('jira_integration', 'TicketChange')
+    batch = []
+    for pk, jira_id in Ticket.objects.order_by('pk').values_list('pk', 'jira_id').iterator(chunk_size=1000):
+        batch.append(TicketChange(ticket_id=pk, jira_id=jira_id))
+        if len(batch) == 1000:
+            TicketChange.objects.bulk_create(batch)
+            batch = []
+    TicketChange.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jira_integration', '0014_ticket_event'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TicketChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ticket_id', models.BigIntegerField(unique=True)),
+                ('jira_id', models.CharField(max_length=100)),
+                ('deleted', models.BooleanField(default=False)),
+                ('changed_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(backfill_changes, migrations.RunPython.noop),
+    ]
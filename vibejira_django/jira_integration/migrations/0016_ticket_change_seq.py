@@ -0,0 +1,22 @@
+# Generated by Django 5.2.1 on 2026-10-16 23:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jira_integration', '0015_ticket_change'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticketchange',
+            name='seq',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='ticketchange',
+            index=models.Index(fields=['seq', 'ticket_id'], name='ticketchange_seq_idx'),
+        ),
+    ]
@@ -1,18 +1,31 @@
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 
 class Project(models.Model):
     name = models.CharField(max_length=255)
     jira_key = models.CharField(max_length=100, unique=True)
     description = models.TextField(blank=True, null=True)
+    # High-water mark of JIRA's `updated` field seen by the sync engine.
+    # Incremental syncs only ask JIRA for issues updated at or after this.
+    sync_watermark = models.DateTimeField(blank=True, null=True)
+    last_synced_at = models.DateTimeField(blank=True, null=True)
+    # Bumped on every local write; feeds the ETag/Last-Modified validators.
+    modified_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
 
 class Ticket(models.Model):
-    project = models.ForeignKey(Project, on_delete=models.CASCADE)
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='tickets')
     jira_id = models.CharField(max_length=100, unique=True)
     title = models.CharField(max_length=255)
+    # Plaintext rendering of the JIRA description; what search and list previews use.
     description = models.TextField(blank=True, null=True)
+    # The ADF document as JIRA sent it (API v3), null for plain-text descriptions.
+    description_adf = models.JSONField(blank=True, null=True)
+    description_html = models.TextField(blank=True, null=True)
+    # Hash of the description source; rendering is redone only when it changes.
+    description_hash = models.CharField(max_length=64, blank=True, null=True)
     status = models.CharField(max_length=100)
     priority = models.CharField(max_length=100)
     assignee = models.CharField(max_length=255, blank=True, null=True)
@@ -20,6 +33,33 @@ class Ticket(models.Model):
     created_date = models.DateTimeField()
     updated_date = models.DateTimeField()
     due_date = models.DateField(blank=True, null=True)
+    # When this row was last refreshed from JIRA; null for tickets never synced.
+    synced_at = models.DateTimeField(blank=True, null=True)
+    # Bumped on every local write (bulk writes set it explicitly); feeds the
+    # ETag/Last-Modified validators.
+    modified_at = models.DateTimeField(auto_now=True)
+    # Comment sync cursor: JIRA comments seen so far (oldest first) and the id
+    # of the last one. Null until the ticket's comments are first synced.
+    comment_sync_offset = models.PositiveIntegerField(blank=True, null=True)
+    comment_sync_last_id = models.CharField(max_length=100, blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination order of the ticket list: (-updated_date, -id).
+            models.Index(fields=['updated_date', 'id'], name='ticket_updated_id_idx'),
+            # Equality filters, each followed by the list's sort key.
+            models.Index(fields=['project', 'updated_date'], name='ticket_project_updated_idx'),
+            models.Index(fields=['status', 'updated_date'], name='ticket_status_updated_idx'),
+            models.Index(fields=['priority', 'updated_date'], name='ticket_priority_updated_idx'),
+            models.Index(fields=['assignee', 'updated_date'], name='ticket_assignee_updated_idx'),
+            # Covers the dashboard's GROUP BY (status, priority).
+            models.Index(fields=['status', 'priority'], name='ticket_status_priority_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # The post_save receivers log the change; it commits with the row.
+        with transaction.atomic(using=kwargs.get('using'), savepoint=False):
+            super().save(*args, **kwargs)
 
     def __str__(self):
         return self.title
@@ -28,9 +68,232 @@ from django.conf import settings # For AUTH_USER_MODEL
 
 class Comment(models.Model):
     ticket = models.ForeignKey(Ticket, on_delete=models.CASCADE, related_name='comments')
-    author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='jira_comments')
+    # Null for comments ingested from JIRA; author_name then holds the JIRA display name.
+    author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='jira_comments', blank=True, null=True)
+    author_name = models.CharField(max_length=255, blank=True, null=True)
+    # JIRA comment id; null for comments that only exist locally.
+    jira_id = models.CharField(max_length=100, unique=True, blank=True, null=True)
     body = models.TextField()
-    created_date = models.DateTimeField(auto_now_add=True)
+    created_date = models.DateTimeField(default=timezone.now)
+    # JIRA's `updated` for ingested comments; orders out-of-order webhook deliveries.
+    updated_date = models.DateTimeField(blank=True, null=True)
+    modified_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Comments are always read per ticket in creation order.
+            models.Index(fields=['ticket', 'created_date'], name='comment_ticket_created_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # The post_save receivers log the change; it commits with the row.
+        with transaction.atomic(using=kwargs.get('using'), savepoint=False):
+            super().save(*args, **kwargs)
+
+    @property
+    def author_display_name(self):
+        return self.author.username if self.author else self.author_name
+
+    def __str__(self):
+        return f"Comment by {self.author_display_name or 'Unknown author'} on {self.ticket.title}"
+
+
+class WebhookEvent(models.Model):
+    STATUS_PENDING = 'pending'
+    STATUS_APPLIED = 'applied'
+    STATUS_SKIPPED = 'skipped'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_APPLIED, 'Applied'),
+        (STATUS_SKIPPED, 'Skipped'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    # X-Atlassian-Webhook-Identifier, which JIRA repeats on redelivery (or a
+    # hash of the body if absent). Unique, so duplicates are dropped on insert.
+    delivery_id = models.CharField(max_length=255, unique=True)
+    event_type = models.CharField(max_length=100)
+    issue_key = models.CharField(max_length=100, blank=True, default='')
+    comment_id = models.CharField(max_length=100, blank=True, default='')
+    payload = models.JSONField()
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(blank=True, null=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    error = models.TextField(blank=True, default='')
+
+    class Meta:
+        indexes = [
+            # Tombstone lookups: has this issue or comment been deleted already?
+            models.Index(fields=['issue_key', 'event_type'], name='webhook_issue_event_idx'),
+            models.Index(fields=['comment_id', 'event_type'], name='webhook_comment_event_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.event_type} {self.issue_key or self.comment_id} ({self.status})"
+
+
+class Job(models.Model):
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+    # Higher runs first.
+    PRIORITY_HIGH = 10
+    PRIORITY_NORMAL = 0
+    PRIORITY_LOW = -10
+
+    # Dotted path of a function decorated with jobs.task.
+    task = models.CharField(max_length=255)
+    args = models.JSONField(default=list)
+    priority = models.SmallIntegerField(default=PRIORITY_NORMAL)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    # Set while the job is queued or running; a second enqueue with the same
+    # key returns this job instead of adding another.
+    dedupe_key = models.CharField(max_length=255, unique=True, blank=True, null=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    # Not picked up before this time; pushed back by retry backoff.
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=255, blank=True, default='')
+    locked_at = models.DateTimeField(blank=True, null=True)
+    result = models.JSONField(blank=True, null=True)
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            # Workers claim the next due job by (status, -priority, run_at).
+            models.Index(fields=['status', '-priority', 'run_at'], name='job_claim_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.task}{tuple(self.args)!r} ({self.status})"
+
+
+class DeadLetterJob(models.Model):
+    # Jobs that failed permanently or ran out of attempts, kept for inspection and requeueing.
+    job_id = models.BigIntegerField()
+    task = models.CharField(max_length=255)
+    args = models.JSONField(default=list)
+    priority = models.SmallIntegerField(default=0)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True, default='')
+    enqueued_at = models.DateTimeField()
+    failed_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.task}{tuple(self.args)!r} failed after {self.attempts} attempts"
+
+
+class OutboxEntry(models.Model):
+    """
+    Local ticket edits waiting to be pushed to JIRA.
+
+    A ticket has at most one pending entry; further edits are merged into
+    it, so a burst of clicks becomes a single push.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_SENDING = 'sending'
+    STATUS_CONFLICT = 'conflict'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_SENDING, 'Sending'),
+        (STATUS_CONFLICT, 'Conflict'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    ticket = models.ForeignKey(Ticket, on_delete=models.CASCADE, related_name='outbox_entries')
+    # Field -> new value, and field -> value before the first local edit.
+    changes = models.JSONField(default=dict)
+    original = models.JSONField(default=dict)
+    # The ticket's JIRA `updated` when it was first edited; a newer one in
+    # JIRA means someone else may have changed the same fields.
+    base_updated_date = models.DateTimeField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # Not pushed before this time; pushed back by retry backoff.
+    run_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    modified_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = 'outbox entries'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['ticket'], condition=models.Q(status='pending'), name='outbox_one_pending_per_ticket',
+            ),
+        ]
+        indexes = [
+            # The flusher claims due entries by (status, run_at).
+            models.Index(fields=['status', 'run_at'], name='outbox_status_run_at_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.ticket_id}: {self.changes!r} ({self.status})"
+
+
+class TicketEvent(models.Model):
+    """
+    Bounded log of ticket and comment changes, streamed by
+    GET /api/tickets/stream/. The id is the SSE event id clients resume from;
+    rows beyond the newest TICKET_EVENT_LOG_SIZE are pruned.
+    """
+    TICKET_CREATED = 'ticket.created'
+    TICKET_UPDATED = 'ticket.updated'
+    TICKET_DELETED = 'ticket.deleted'
+    COMMENT_CREATED = 'comment.created'
+    COMMENT_UPDATED = 'comment.updated'
+    COMMENT_DELETED = 'comment.deleted'
+
+    type = models.CharField(max_length=32)
+    # Plain columns rather than foreign keys: deletion events outlive their rows.
+    ticket_id = models.BigIntegerField()
+    jira_id = models.CharField(max_length=100)
+    project_id = models.BigIntegerField()
+    comment_id = models.BigIntegerField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Streams filtered by project read (project_id, id > last seen).
+            models.Index(fields=['project_id', 'id'], name='ticketevent_project_id_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.id} {self.type} {self.jira_id}"
+
+
+class TicketChange(models.Model):
+    """
+    Change log behind GET /api/tickets/changes/: one row per ticket, upserted
+    in the transaction that changes the ticket (or one of its comments).
+    `seq` is then the id of the ticket's latest TicketEvent, so it only
+    grows. Rows for deleted tickets are tombstones, kept so clients learn
+    of the deletion.
+    """
+    # Plain columns rather than a foreign key: tombstones outlive their tickets.
+    ticket_id = models.BigIntegerField(unique=True)
+    jira_id = models.CharField(max_length=100)
+    deleted = models.BooleanField(default=False)
+    # 0 for tickets logged when the table was created.
+    seq = models.BigIntegerField(default=0)
+    changed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Delta sync reads (seq, ticket_id) past the client's cursor.
+            models.Index(fields=['seq', 'ticket_id'], name='ticketchange_seq_idx'),
+        ]
 
     def __str__(self):
-        return f"Comment by {self.author.username if self.author else 'Unknown author'} on {self.ticket.title}"
+        return f"{self.seq} {self.jira_id}{' (deleted)' if self.deleted else ''}"
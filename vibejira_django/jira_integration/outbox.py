@@ -0,0 +1,341 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Min
+from django.utils import timezone
+
+from .jira_utils import (
+    find_jira_users, get_jira_issue, get_jira_transitions, transition_jira_issue, update_jira_issue,
+)
+from .jobs import backoff_delay, enqueue, task
+from .mapper import map_fields
+from .models import Job, OutboxEntry
+from .sync import store_jira_issues
+
+logger = logging.getLogger(__name__)
+
+# Ticket fields whose local edits are pushed to JIRA.
+OUTBOX_FIELDS = ('status', 'priority', 'assignee')
+FLUSH_DEDUPE_KEY = 'outbox:flush'
+
+APPLIED = 'applied'
+CONFLICT = 'conflict'
+RETRY = 'retry'
+FAILED = 'failed'
+
+
+def snapshot(ticket):
+    """
+    Captures what record_edit() needs to know about a ticket before it is edited.
+    """
+    state = {field: getattr(ticket, field) for field in OUTBOX_FIELDS}
+    state['updated_date'] = ticket.updated_date
+    return state
+
+
+def record_edit(ticket, before):
+    """
+    Queues the changes between `before` (a snapshot()) and `ticket` for JIRA.
+
+    Edits are merged into the ticket's pending entry, and a field edited
+    back to its original value drops out. Tickets never synced from JIRA
+    are local-only and skipped. Call it in the transaction that saved the
+    ticket. Returns the pending entry, or None if there is nothing to push.
+    """
+    entries = record_edits([(ticket, before)])
+    return entries[0] if entries else None
+
+
+def record_edits(edits):
+    """
+    record_edit() for many (ticket, before) pairs, reading and writing the
+    pending entries in bulk. Returns the pending entries.
+    """
+    changed = []
+    for ticket, before in edits:
+        if ticket.synced_at is None:
+            continue
+        changes = {field: getattr(ticket, field) for field in OUTBOX_FIELDS if getattr(ticket, field) != before[field]}
+        if changes:
+            changed.append((ticket, before, changes))
+    if not changed:
+        return []
+
+    pending = {
+        entry.ticket_id: entry for entry in OutboxEntry.objects.select_for_update().filter(
+            ticket__in=[ticket for ticket, _, _ in changed], status=OutboxEntry.STATUS_PENDING,
+        )
+    }
+    for ticket, before, changes in changed:
+        entry = pending.get(ticket.pk)
+        if entry is None:
+            entry = pending[ticket.pk] = OutboxEntry(ticket=ticket, base_updated_date=before['updated_date'])
+        for field, value in changes.items():
+            entry.original.setdefault(field, before[field])
+            entry.changes[field] = value
+        entry.changes = {field: value for field, value in entry.changes.items() if value != entry.original[field]}
+
+    # bulk_update doesn't apply auto_now, so stamp modified_at by hand.
+    now = timezone.now()
+    to_create, to_update, to_delete = [], [], []
+    for entry in pending.values():
+        if not entry.changes:
+            if entry.pk:
+                to_delete.append(entry.pk)
+            continue
+        entry.run_at = entry.modified_at = now
+        (to_update if entry.pk else to_create).append(entry)
+    try:
+        with transaction.atomic():
+            OutboxEntry.objects.bulk_create(to_create)
+    except IntegrityError:
+        # Another request created a pending entry first; merge into it.
+        return record_edits(edits)
+    OutboxEntry.objects.bulk_update(to_update, ['changes', 'original', 'run_at', 'modified_at'])
+    OutboxEntry.objects.filter(pk__in=to_delete).delete()
+
+    entries = to_create + to_update
+    if entries:
+        transaction.on_commit(schedule_flush)
+    return entries
+
+
+def schedule_flush(delay=None):
+    """
+    Queues an outbox flush, joining one already queued. The delay lets a
+    burst of edits coalesce into one push per ticket.
+    """
+    delay = settings.OUTBOX_FLUSH_DELAY if delay is None else delay
+    return enqueue(flush_outbox, dedupe_key=FLUSH_DEDUPE_KEY, delay=delay)
+
+
+_transitions = {}
+_account_ids = {}
+_cache_lock = threading.Lock()
+
+
+def transition_id_for(issue_key, project_key, from_status, to_status):
+    """
+    Returns (transition id, error) for moving an issue between two statuses.
+
+    Available transitions depend on the project's workflow and the current
+    status, so they are cached per (project, status) for
+    JIRA_TRANSITION_CACHE_TTL seconds. The id is None if the workflow has
+    no such transition.
+    """
+    key = (project_key, from_status.lower())
+    with _cache_lock:
+        cached = _transitions.get(key)
+    if cached is None or cached[0] < time.monotonic():
+        result = get_jira_transitions(issue_key)
+        if result.get('error'):
+            return None, result
+        by_status = {}
+        for transition in result.get('transitions') or []:
+            target = ((transition.get('to') or {}).get('name') or transition.get('name') or '').lower()
+            by_status.setdefault(target, transition.get('id'))
+        cached = (time.monotonic() + settings.JIRA_TRANSITION_CACHE_TTL, by_status)
+        with _cache_lock:
+            _transitions[key] = cached
+    return cached[1].get(to_status.lower()), None
+
+
+def forget_transitions(project_key, from_status):
+    with _cache_lock:
+        _transitions.pop((project_key, from_status.lower()), None)
+
+
+def account_id_for(display_name):
+    """
+    Returns (JIRA account id, error) for a user's display name; the id is
+    None if no user has exactly that name.
+    """
+    with _cache_lock:
+        if display_name in _account_ids:
+            return _account_ids[display_name], None
+    users = find_jira_users(display_name)
+    if isinstance(users, dict) and users.get('error'):
+        return None, users
+    account_id = next((u.get('accountId') for u in users if u.get('displayName') == display_name), None)
+    if account_id:
+        with _cache_lock:
+            _account_ids[display_name] = account_id
+    return account_id, None
+
+
+def _error_outcome(result):
+    # Client errors other than rate limiting won't succeed on retry.
+    status_code = result.get('status_code')
+    permanent = status_code and 400 <= status_code < 500 and status_code != 429
+    return (FAILED if permanent else RETRY), result.get('error', 'Unknown JIRA error')
+
+
+def push_changes(issue_key, project_key, changes, original, base_updated_date):
+    """
+    Applies one entry's changes to a JIRA issue. Does no database work, so
+    it can run on any thread.
+
+    The issue's `updated` is checked first: if JIRA's copy is newer than the
+    one the edit was made against, each changed field is compared with its
+    original value, and one changed in JIRA to something else is a conflict.
+    Returns (outcome, detail); detail is the refreshed issue when applied.
+    """
+    current = get_jira_issue(issue_key, fields=['status', 'priority', 'assignee', 'updated'])
+    if current.get('error'):
+        return _error_outcome(current)
+    remote = map_fields(current.get('fields') or {})
+
+    if remote['updated_date'] > base_updated_date:
+        conflicts = [
+            field for field, value in changes.items()
+            if remote[field] != original[field] and remote[field] != value
+        ]
+        if conflicts:
+            detail = ', '.join(
+                f"{field}: JIRA has {remote[field]!r}, local edit {original[field]!r} -> {changes[field]!r}"
+                for field in conflicts
+            )
+            return CONFLICT, f"Changed in JIRA since the local edit ({detail})"
+
+    if 'status' in changes and remote['status'] != changes['status']:
+        transition_id, error = transition_id_for(issue_key, project_key, remote['status'], changes['status'])
+        if error:
+            return _error_outcome(error)
+        if transition_id is None:
+            return FAILED, f"No workflow transition from {remote['status']!r} to {changes['status']!r}"
+        result = transition_jira_issue(issue_key, transition_id)
+        if result.get('error'):
+            # The workflow may have changed under the cached id.
+            forget_transitions(project_key, remote['status'])
+            return _error_outcome(result)
+
+    fields = {}
+    if 'priority' in changes and remote['priority'] != changes['priority']:
+        fields['priority'] = {'name': changes['priority']}
+    if 'assignee' in changes and remote['assignee'] != changes['assignee']:
+        account_id = None
+        if changes['assignee']:
+            account_id, error = account_id_for(changes['assignee'])
+            if error:
+                return _error_outcome(error)
+            if account_id is None:
+                return FAILED, f"No JIRA user named {changes['assignee']!r}"
+        fields['assignee'] = {'accountId': account_id}
+    if fields:
+        result = update_jira_issue(issue_key, fields)
+        if result.get('error'):
+            return _error_outcome(result)
+
+    issue = get_jira_issue(issue_key)
+    return APPLIED, None if issue.get('error') else issue
+
+
+def _push(entry_data):
+    try:
+        return push_changes(*entry_data)
+    except Exception as e:
+        logger.exception("Pushing outbox changes for %s failed", entry_data[0])
+        return RETRY, str(e)
+
+
+def claim_entries(limit):
+    """
+    Claims up to `limit` due entries, at most one per ticket, by moving them
+    from pending to sending one conditional UPDATE at a time. The claim
+    stamps modified_at, which recover_stale_entries() ages claims by.
+    """
+    sending = OutboxEntry.objects.filter(status=OutboxEntry.STATUS_SENDING).values('ticket_id')
+    candidates = list(
+        OutboxEntry.objects.filter(status=OutboxEntry.STATUS_PENDING, run_at__lte=timezone.now())
+        .exclude(ticket_id__in=sending)
+        .order_by('run_at', 'pk')
+        .values_list('pk', flat=True)[:limit]
+    )
+    claimed = [
+        pk for pk in candidates
+        if OutboxEntry.objects.filter(pk=pk, status=OutboxEntry.STATUS_PENDING).update(
+            status=OutboxEntry.STATUS_SENDING, attempts=F('attempts') + 1, modified_at=timezone.now(),
+        )
+    ]
+    return list(OutboxEntry.objects.filter(pk__in=claimed).select_related('ticket__project'))
+
+
+def _apply_outcomes(entries, outcomes, stats):
+    now = timezone.now()
+    refreshed = []
+    for entry, (outcome, detail) in zip(entries, outcomes):
+        if outcome == RETRY and entry.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+            outcome = FAILED
+        stats[outcome] += 1
+        if outcome == APPLIED:
+            entry.delete()
+            if detail:
+                refreshed.append(detail)
+            continue
+        entry.last_error = detail
+        if outcome == RETRY:
+            entry.status = OutboxEntry.STATUS_PENDING
+            entry.run_at = now + timedelta(seconds=backoff_delay(entry.attempts))
+        else:
+            logger.warning("Outbox entry %s for %s: %s", entry.pk, entry.ticket.jira_id, detail)
+            entry.status = OutboxEntry.STATUS_CONFLICT if outcome == CONFLICT else OutboxEntry.STATUS_FAILED
+        try:
+            entry.save(update_fields=['status', 'run_at', 'last_error', 'modified_at'])
+        except IntegrityError:
+            # A new edit opened a pending entry meanwhile; it supersedes this retry.
+            entry.status = OutboxEntry.STATUS_FAILED
+            entry.save(update_fields=['status', 'last_error', 'modified_at'])
+
+    # Store JIRA's copy of the pushed tickets; newer local edits already
+    # waiting are kept by store_jira_issues.
+    store_jira_issues(refreshed)
+
+
+def recover_stale_entries():
+    """Returns entries left sending by a killed worker to pending."""
+    cutoff = timezone.now() - timedelta(seconds=settings.JOB_LOCK_TIMEOUT)
+    return OutboxEntry.objects.filter(status=OutboxEntry.STATUS_SENDING, modified_at__lt=cutoff).update(
+        status=OutboxEntry.STATUS_PENDING,
+    )
+
+
+@task
+def flush_outbox():
+    """
+    Job task: pushes due outbox entries to JIRA.
+
+    Entries are claimed OUTBOX_BATCH_SIZE at a time and pushed with at most
+    OUTBOX_CONCURRENCY requests in flight; the database is only touched from
+    this thread. Returns counts per outcome.
+    """
+    recover_stale_entries()
+    stats = {APPLIED: 0, CONFLICT: 0, RETRY: 0, FAILED: 0}
+    released = False
+    with ThreadPoolExecutor(max_workers=settings.OUTBOX_CONCURRENCY) as executor:
+        while True:
+            entries = claim_entries(settings.OUTBOX_BATCH_SIZE)
+            if not entries and not released:
+                # Give up our dedupe key before looking one last time, so an
+                # edit committed from now on queues a new flush rather than
+                # joining this finishing one.
+                Job.objects.filter(dedupe_key=FLUSH_DEDUPE_KEY, status=Job.STATUS_RUNNING).update(dedupe_key=None)
+                released = True
+                entries = claim_entries(settings.OUTBOX_BATCH_SIZE)
+            if not entries:
+                break
+            snapshots = [
+                (e.ticket.jira_id, e.ticket.project.jira_key, e.changes, e.original, e.base_updated_date)
+                for e in entries
+            ]
+            _apply_outcomes(entries, list(executor.map(_push, snapshots)), stats)
+
+    # Entries backing off after a transient error need a later flush.
+    next_run = OutboxEntry.objects.filter(status=OutboxEntry.STATUS_PENDING).aggregate(Min('run_at'))['run_at__min']
+    if next_run is not None:
+        schedule_flush(delay=max(0.0, (next_run - timezone.now()).total_seconds()))
+    return stats
@@ -0,0 +1,161 @@
+import base64
+import binascii
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from .events import committed_horizon
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset ("seek") pagination over a fixed, unique ordering.
+
+    The opaque cursor carries the ordering values of the last row on the
+    previous page, so every page is one range scan on the ordering index and
+    page 1,000 costs the same as page 1. `ordering` must end in a unique
+    field so rows with equal leading values are never skipped or repeated.
+    """
+    ordering = ('-updated_date', '-id')
+    page_size = 50
+    max_page_size = 500
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        rows = list(self.page_queryset(queryset, request))
+        self.has_next = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        self.next_position = self.position_of(rows[-1]) if self.has_next else None
+        return rows
+
+    def page_queryset(self, queryset, request):
+        """
+        Returns the slice of `queryset` backing the requested page.
+
+        It holds one row more than the page size; that extra row tells us
+        whether there is a next page without a COUNT.
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.model = queryset.model
+
+        queryset = queryset.order_by(*self.ordering)
+        position = self.decode_cursor(request)
+        if position is not None:
+            queryset = queryset.filter(self.after(position))
+        return queryset[:self.page_size + 1]
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def position_of(self, obj):
+        position = []
+        for name in self.ordering:
+            value = getattr(obj, name.lstrip('-'))
+            position.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+        return position
+
+    def after(self, position):
+        """
+        Builds the filter selecting rows strictly after `position`.
+        """
+        condition = Q()
+        equal_so_far = Q()
+        for name, value in zip(self.ordering, position):
+            field = name.lstrip('-')
+            lookup = 'lt' if name.startswith('-') else 'gt'
+            condition |= equal_so_far & Q(**{f'{field}__{lookup}': value})
+            equal_so_far &= Q(**{field: value})
+        # The redundant inclusive bound on the leading field lets the planner
+        # turn the OR chain into a single index range scan.
+        leading = self.ordering[0]
+        bound = 'lte' if leading.startswith('-') else 'gte'
+        return Q(**{f'{leading.lstrip("-")}__{bound}': position[0]}) & condition
+
+    def encode_cursor(self, position):
+        raw = json.dumps(position, separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4))
+            position = json.loads(raw)
+            if not isinstance(position, list) or len(position) != len(self.ordering):
+                raise ValueError
+            return [
+                self.model._meta.get_field(name.lstrip('-')).to_python(value)
+                for name, value in zip(self.ordering, position)
+            ]
+        except (binascii.Error, ValueError, TypeError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+
+class TicketPagination(KeysetPagination):
+    ordering = ('-updated_date', '-id')
+    page_size = settings.TICKET_PAGE_SIZE
+    max_page_size = settings.TICKET_MAX_PAGE_SIZE
+
+
+class CommentPagination(KeysetPagination):
+    ordering = ('created_date', 'id')
+    page_size = settings.COMMENT_PAGE_SIZE
+    max_page_size = settings.COMMENT_MAX_PAGE_SIZE
+
+
+class TicketChangePagination(KeysetPagination):
+    """
+    Pages through the ticket change log in sequence order, after the
+    `since` cursor. Every page carries the cursor to resume from in
+    `cursor`, including an empty one (which returns the cursor it was given).
+    """
+    ordering = ('seq', 'ticket_id')
+    cursor_query_param = 'since'
+    page_size = settings.TICKET_CHANGES_PAGE_SIZE
+    max_page_size = settings.TICKET_CHANGES_MAX_PAGE_SIZE
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.model = queryset.model
+        since = self.decode_cursor(request)
+        # Changes past a sequence value whose transaction may yet commit are
+        # held back, so the cursor never skips it.
+        queryset = queryset.filter(seq__lte=committed_horizon(since[0] if since else 0))
+        rows = super().paginate_queryset(queryset, request, view)
+        self.cursor = self.encode_cursor(self.position_of(rows[-1]) if rows else since or [0, 0])
+        return rows
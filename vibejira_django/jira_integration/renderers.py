@@ -0,0 +1,32 @@
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.renderers import BaseRenderer
+
+
+class ErrorAsJSONRenderer(BaseRenderer):
+    """
+    Base for endpoints that stream their own body (exports, event streams).
+
+    Only error responses (e.g. a bad filter) go through the renderer, and
+    they are sent as JSON.
+    """
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data, cls=DjangoJSONEncoder).encode()
+
+
+class NDJSONRenderer(ErrorAsJSONRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+
+class CSVRenderer(ErrorAsJSONRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+
+class EventStreamRenderer(ErrorAsJSONRenderer):
+    media_type = 'text/event-stream'
+    format = 'event-stream'
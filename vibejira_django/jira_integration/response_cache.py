@@ -0,0 +1,228 @@
+import hashlib
+import json
+import threading
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Comment, Project, Ticket
+
+
+class MemoryBackend:
+    """
+    In-process LRU capped at `max_bytes` of JSON-encoded values.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get_many(self, keys):
+        found = {}
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    found[key] = entry[1]
+        return found
+
+    def set_many(self, mapping):
+        sized = {key: (len(json.dumps(value, cls=DjangoJSONEncoder)), value) for key, value in mapping.items()}
+        with self._lock:
+            for key, entry in sized.items():
+                old = self._entries.pop(key, None)
+                if old is not None:
+                    self.size -= old[0]
+                self._entries[key] = entry
+                self.size += entry[0]
+            while self.size > self.max_bytes and self._entries:
+                self.size -= self._entries.popitem(last=False)[1][0]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+
+class DjangoCacheBackend:
+    """
+    One of the CACHES aliases (e.g. the default local-memory cache, or Redis
+    to share fragments between processes). Entries expire after `ttl` seconds.
+    """
+
+    def __init__(self, alias, ttl):
+        self.cache = caches[alias]
+        self.ttl = ttl
+
+    def get_many(self, keys):
+        return self.cache.get_many(keys)
+
+    def set_many(self, mapping):
+        self.cache.set_many(mapping, self.ttl)
+
+    def clear(self):
+        self.cache.clear()
+
+
+class ResponseCache:
+    """
+    Serialized representations ("fragments") keyed by object, version and stamp.
+
+    Each object has a version token, replaced by the model signals below
+    whenever it or a related row that is part of its representation changes.
+    The stamp holds the row's own validators (modified_at and friends),
+    which bulk writes keep current too, although they send no signals.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def versions(self, kind, pks):
+        keys = {pk: f'rc:v:{kind}:{pk}' for pk in pks}
+        found = self.backend.get_many(list(keys.values()))
+        # A version that was never set (or was evicted) gets a fresh token, so
+        # fragments cached under an older one can't be picked up again.
+        missing = {key: uuid.uuid4().hex[:12] for key in keys.values() if key not in found}
+        if missing:
+            self.backend.set_many(missing)
+            found.update(missing)
+        return {pk: found[key] for pk, key in keys.items()}
+
+    def bump(self, kind, *pks):
+        self.backend.set_many({f'rc:v:{kind}:{pk}': uuid.uuid4().hex[:12] for pk in pks if pk is not None})
+
+    def fragment_keys(self, namespace, kind, stamped):
+        """
+        Maps each (pk, stamp) in `stamped` to its fragment key.
+        """
+        versions = self.versions(kind, {pk for pk, _ in stamped})
+        return [
+            f'rc:{namespace}:{pk}:{versions[pk]}:{hashlib.sha1(repr(stamp).encode()).hexdigest()}'
+            for pk, stamp in stamped
+        ]
+
+    def get_many(self, keys):
+        return self.backend.get_many(keys)
+
+    def set_many(self, mapping):
+        if mapping:
+            self.backend.set_many(mapping)
+
+
+_cache = None
+_cache_config = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """
+    Returns the ResponseCache configured by RESPONSE_CACHE_BACKEND, or None
+    when caching is off.
+    """
+    global _cache, _cache_config
+    config = (
+        settings.RESPONSE_CACHE_BACKEND, settings.RESPONSE_CACHE_MAX_BYTES,
+        settings.RESPONSE_CACHE_ALIAS, settings.RESPONSE_CACHE_TTL,
+    )
+    with _cache_lock:
+        if config != _cache_config:
+            backend_name, max_bytes, alias, ttl = config
+            if backend_name == 'memory':
+                _cache = ResponseCache(MemoryBackend(max_bytes))
+            elif backend_name == 'django':
+                _cache = ResponseCache(DjangoCacheBackend(alias, ttl))
+            elif backend_name is None:
+                _cache = None
+            else:
+                raise ValueError(f"Unknown RESPONSE_CACHE_BACKEND {backend_name!r}")
+            _cache_config = config
+        return _cache
+
+
+class CachedRepresentationMixin:
+    """
+    Serves a serializer's to_representation() from the response cache.
+
+    Subclasses set `cache_kind` (the model whose version the fragments
+    follow) and may override cache_stamp(); a stamp of None skips the cache
+    for that instance. The fragment also depends on the serializer class
+    and its (possibly trimmed) field set. The stamp has to change whenever
+    anything serialized does, so columns written without bumping it (like
+    Ticket.synced_at) must stay out of the representation.
+    """
+    cache_kind = None
+
+    def cache_stamp(self, instance):
+        return (instance.modified_at,)
+
+    def _fragment_keys(self, cache, instances):
+        namespace = f'{type(self).__name__}:{hashlib.sha1(repr(tuple(self.fields)).encode()).hexdigest()[:12]}'
+        return cache.fragment_keys(namespace, self.cache_kind, [(i.pk, self.cache_stamp(i)) for i in instances])
+
+    def cached_representation(self, instance):
+        """
+        Returns the cached fragment for `instance`, or None. Only the pk and
+        stamp fields are read, so `instance` can be a partially loaded row.
+        """
+        cache = get_response_cache()
+        if cache is None or self.cache_stamp(instance) is None:
+            return None
+        key = self._fragment_keys(cache, [instance])[0]
+        return cache.get_many([key]).get(key)
+
+    def to_representations(self, instances):
+        """
+        to_representation() for many instances with one cache read and one write.
+        """
+        cache = get_response_cache()
+        cacheable = [i for i in instances if cache is not None and self.cache_stamp(i) is not None]
+        keys = dict(zip((i.pk for i in cacheable), self._fragment_keys(cache, cacheable))) if cacheable else {}
+        found = cache.get_many(list(keys.values())) if keys else {}
+
+        results, missed = [], {}
+        for instance in instances:
+            key = keys.get(instance.pk)
+            fragment = found.get(key) if key else None
+            if fragment is None:
+                fragment = super().to_representation(instance)
+                if key:
+                    missed[key] = fragment
+            results.append(fragment)
+        if missed:
+            cache.set_many(missed)
+        return results
+
+    def to_representation(self, instance):
+        return self.to_representations([instance])[0]
+
+
+@receiver([post_save, post_delete], sender=Ticket, dispatch_uid='response_cache_ticket_changed')
+def _ticket_changed(sender, instance, **kwargs):
+    cache = get_response_cache()
+    if cache is not None:
+        cache.bump('ticket', instance.pk)
+        # Projects nest their tickets.
+        cache.bump('project', instance.project_id)
+
+
+@receiver([post_save, post_delete], sender=Comment, dispatch_uid='response_cache_comment_changed')
+def _comment_changed(sender, instance, **kwargs):
+    cache = get_response_cache()
+    if cache is not None:
+        # Ticket details embed their latest comments.
+        cache.bump('ticket', instance.ticket_id)
+
+
+@receiver([post_save, post_delete], sender=Project, dispatch_uid='response_cache_project_changed')
+def _project_changed(sender, instance, **kwargs):
+    cache = get_response_cache()
+    if cache is not None:
+        cache.bump('project', instance.pk)
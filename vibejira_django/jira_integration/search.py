@@ -0,0 +1,63 @@
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+# External-content FTS5 table kept in sync with jira_integration_ticket by
+# triggers (see migration 0007). Only exists on SQLite. Migrations that make
+# SQLite rebuild the ticket table drop those triggers and must recreate them
+# (see migration 0008).
+SQLITE_FTS_TABLE = 'jira_integration_ticket_fts'
+# Text search configuration shared by the Postgres GIN index and queries.
+POSTGRES_SEARCH_CONFIG = 'english'
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def fts5_match_expression(text):
+    """
+    Turns free text into a safe FTS5 MATCH expression.
+
+    Every word must match (implicit AND); the last word also matches as a
+    prefix so search-as-you-type works. FTS5 operators typed by the user
+    are treated as plain words.
+    """
+    tokens = _TOKEN_RE.findall(text)
+    if not tokens:
+        return None
+    terms = [f'"{token}"' for token in tokens]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def ticket_search_vector():
+    from django.contrib.postgres.search import SearchVector
+    return SearchVector('title', 'description', config=POSTGRES_SEARCH_CONFIG)
+
+
+def search_tickets(queryset, text):
+    """
+    Filters a Ticket queryset to full-text matches on title and description.
+
+    Uses the FTS5 index on SQLite and the tsvector GIN index on Postgres;
+    other backends fall back to a (non-indexed) substring match.
+    """
+    text = (text or '').strip()
+    if not text:
+        return queryset
+
+    vendor = connection.vendor
+    if vendor == 'sqlite':
+        expression = fts5_match_expression(text)
+        if expression is None:
+            return queryset.none()
+        return queryset.filter(id__in=RawSQL(
+            f'SELECT rowid FROM {SQLITE_FTS_TABLE} WHERE {SQLITE_FTS_TABLE} MATCH %s', [expression],
+        ))
+    if vendor == 'postgresql':
+        from django.contrib.postgres.search import SearchQuery
+        return queryset.annotate(search_vector=ticket_search_vector()).filter(
+            search_vector=SearchQuery(text, config=POSTGRES_SEARCH_CONFIG, search_type='websearch'),
+        )
+    return queryset.filter(Q(title__icontains=text) | Q(description__icontains=text))
@@ -1,13 +1,65 @@
+from django.conf import settings
 from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+from django.db import models
+from .adf import render_description
 from .models import Project, Ticket, Comment
+from .response_cache import CachedRepresentationMixin
 
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
+
+def requested_fields(request):
+    """
+    Returns the set of names in a `?fields=a,b,c` query parameter, or None if absent.
+
+    Writes always use the full field set, so validation is never trimmed.
+    """
+    if request is None or request.method not in SAFE_METHODS:
+        return None
+    raw = request.query_params.get('fields')
+    if not raw:
+        return None
+    return {name.strip() for name in raw.split(',') if name.strip()}
+
+
+class SparseFieldsetMixin:
+    """
+    Lets clients trim responses with `?fields=a,b,c`.
+
+    Fields not listed are dropped before serialization, so skipped nested
+    fields (like comments) cost nothing. Unknown names are ignored.
+    Without `?fields`, names in the `omit_fields` context entry are dropped
+    instead. Only applies when this serializer is the root of the response.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields = requested_fields(self.context.get('request'))
+        if fields is not None:
+            for name in set(self.fields) - fields:
+                self.fields.pop(name)
+        else:
+            for name in self.context.get('omit_fields', ()):
+                self.fields.pop(name, None)
+
+
+class CachedListSerializer(serializers.ListSerializer):
+    """
+    Builds a list from its child's cached per-row fragments, reading and
+    filling the cache once for the whole list.
+    """
+
+    def to_representation(self, data):
+        items = data.all() if isinstance(data, models.manager.BaseManager) else data
+        return self.child.to_representations(list(items))
+
+
 class CommentSerializer(serializers.ModelSerializer):
     # author will be set in the view, so make it read-only here or use CurrentUserDefault
-    author = serializers.ReadOnlyField(source='author.username') 
+    author = serializers.ReadOnlyField(source='author_display_name')
     # Alternatively, to show more author details (if UserSerializer exists):
     # author = UserSerializer(read_only=True) 
     created_date = serializers.ReadOnlyField()
@@ -22,17 +74,108 @@ class CommentSerializer(serializers.ModelSerializer):
         # extra_kwargs = {'author': {'default': serializers.CurrentUserDefault()}}
 
 
-class TicketSerializer(serializers.ModelSerializer):
-    comments = CommentSerializer(many=True, read_only=True)
+class TicketCommentSerializer(CommentSerializer):
+    # Posted to /tickets/{id}/comments/, which supplies the ticket itself.
+    ticket = serializers.PrimaryKeyRelatedField(read_only=True)
+
+
+class TicketSerializer(SparseFieldsetMixin, CachedRepresentationMixin, serializers.ModelSerializer):
     project = serializers.PrimaryKeyRelatedField(queryset=Project.objects.all())
+    cache_kind = 'ticket'
 
     class Meta:
         model = Ticket
-        fields = '__all__'
+        # The ADF source, its hash, the comment sync cursors and the write
+        # stamps are bookkeeping for ingest, not part of the API. synced_at
+        # in particular is rewritten by refreshes that leave the ticket (and
+        # so its ETag and cache stamp) unchanged.
+        exclude = [
+            'description_adf', 'description_hash', 'comment_sync_offset', 'comment_sync_last_id',
+            'synced_at', 'modified_at',
+        ]
+        list_serializer_class = CachedListSerializer
+        read_only_fields = ['description_html']
+
+    def validate(self, attrs):
+        # A description edited here is plain text; render it like an ingested one.
+        if 'description' in attrs:
+            rendered = render_description(attrs['description'])
+            attrs.update(
+                description_adf=None, description_html=rendered.html or None,
+                description_hash=rendered.hash,
+            )
+        return attrs
 
-class ProjectSerializer(serializers.ModelSerializer):
+
+class TicketImportSerializer(serializers.ModelSerializer):
+    """
+    Validates one row of a ticket import (see bulk.import_tickets).
+
+    `project` is the project's JIRA key, resolved by the importer in bulk.
+    `description` is plain text or an ADF document. Rows upsert on jira_id,
+    so its uniqueness isn't validated. Missing dates default like synced
+    issues: `updated_date` to now and `created_date` to `updated_date`.
+    """
+    project = serializers.CharField()
+    description = serializers.JSONField(required=False, allow_null=True)
+
+    class Meta:
+        model = Ticket
+        fields = [
+            'jira_id', 'project', 'title', 'description', 'status', 'priority',
+            'assignee', 'reporter', 'created_date', 'updated_date', 'due_date',
+        ]
+        extra_kwargs = {
+            'jira_id': {'validators': []},
+            'created_date': {'required': False},
+            'updated_date': {'required': False},
+        }
+
+    def validate_description(self, value):
+        if value is not None and not isinstance(value, (str, dict)):
+            raise serializers.ValidationError("Must be text or an ADF document.")
+        return value
+
+
+class TicketDetailSerializer(TicketSerializer):
+    """
+    A ticket with its comment count and latest comments (oldest first).
+
+    The full thread is paged through /tickets/{id}/comments/. The view
+    annotates `comment_count` and `comments_modified` and prefetches
+    `latest_comments`; without them each costs a query, and the
+    representation isn't cached.
+    """
+    comment_count = serializers.SerializerMethodField()
+    comments = serializers.SerializerMethodField()
+
+    def cache_stamp(self, ticket):
+        if not {'comments', 'comment_count'} & set(self.fields):
+            return super().cache_stamp(ticket)
+        if not hasattr(ticket, 'comments_modified'):
+            return None
+        return (ticket.modified_at, ticket.comment_count, ticket.comments_modified)
+
+    def get_comment_count(self, ticket):
+        count = getattr(ticket, 'comment_count', None)
+        return ticket.comments.count() if count is None else count
+
+    def get_comments(self, ticket):
+        latest = getattr(ticket, 'latest_comments', None)
+        if latest is None:
+            latest = ticket.comments.select_related('author').order_by('-created_date', '-id')[:settings.TICKET_DETAIL_COMMENTS]
+        return CommentSerializer(many=True, context=self.context).to_representation(reversed(list(latest)))
+
+
+class ProjectSerializer(CachedRepresentationMixin, serializers.ModelSerializer):
     tickets = TicketSerializer(many=True, read_only=True)
+    cache_kind = 'project'
 
     class Meta:
         model = Project
         fields = '__all__'
+        list_serializer_class = CachedListSerializer
+
+    def cache_stamp(self, project):
+        # The nested tickets are part of the representation; the view prefetches them.
+        return (project.modified_at, [(t.pk, t.modified_at) for t in project.tickets.all()])
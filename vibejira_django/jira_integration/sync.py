@@ -0,0 +1,413 @@
+import logging
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .events import record_events
+from .jira_utils import add_jira_comment, get_jira_client, get_jira_comments, search_jira_issues
+from .jobs import PermanentJobError, enqueue, enqueue_many, heartbeat, task
+from .mapper import SEARCH_FIELDS, IssueMapper, comment_from_jira, parse_jira_datetime, render_descriptions
+from .models import Comment, Job, OutboxEntry, Project, Ticket, TicketEvent
+
+logger = logging.getLogger(__name__)
+
+# Ticket columns rewritten when an existing row is refreshed from JIRA.
+TICKET_SYNC_FIELDS = [
+    'project', 'title', 'description', 'status', 'priority', 'assignee',
+    'reporter', 'created_date', 'updated_date', 'due_date', 'synced_at',
+    'modified_at', 'description_adf', 'description_html', 'description_hash',
+]
+# The rendered description columns, left alone when the source hash is unchanged.
+DESCRIPTION_FIELDS = ['description', 'description_adf', 'description_html', 'description_hash']
+
+# Comment columns rewritten when a newer version of a JIRA comment arrives.
+COMMENT_SYNC_FIELDS = ['ticket', 'author_name', 'body', 'created_date', 'updated_date']
+
+
+class JiraSyncError(Exception):
+    """Raised when a page of JIRA search results cannot be fetched."""
+
+
+def upsert_tickets(tickets, batch_size=None, fields=None):
+    """
+    Writes tickets keyed on jira_id using bulk_create/bulk_update.
+
+    Existing rows get `fields` rewritten (TICKET_SYNC_FIELDS by default),
+    but only if one of them differs from the stored row; identical rows
+    just have synced_at stamped, and log no change event. Descriptions are
+    rendered here, and only for new rows and rows whose description hash
+    differs from the stored one. Returns a (created, updated) count tuple.
+    """
+    batch_size = batch_size or settings.JIRA_SYNC_BATCH_SIZE
+    fields = fields or TICKET_SYNC_FIELDS
+    # Later entries win if the same issue shows up twice in one batch.
+    by_jira_id = {ticket.jira_id: ticket for ticket in tickets}
+    jira_ids = list(by_jira_id)
+    columns = compared_columns(fields)
+
+    existing = {}
+    for i in range(0, len(jira_ids), batch_size):
+        chunk = jira_ids[i:i + batch_size]
+        existing.update(
+            (jira_id, (pk, dict(zip(columns, values)))) for jira_id, pk, *values
+            in Ticket.objects.filter(jira_id__in=chunk).values_list('jira_id', 'pk', *columns)
+        )
+    unchanged = render_descriptions(
+        by_jira_id.values(), {jira_id: stored['description_hash'] for jira_id, (_, stored) in existing.items()},
+    )
+
+    now = timezone.now()
+    to_create, to_update, to_update_kept, to_touch = [], [], [], []
+    for jira_id, ticket in by_jira_id.items():
+        if jira_id in existing:
+            ticket.pk, stored = existing[jira_id]
+            if all(getattr(ticket, column) == value for column, value in stored.items()):
+                # modified_at feeds the ETag and the response cache, so
+                # a refresh that changed nothing must leave it alone.
+                to_touch.append(ticket.pk)
+                continue
+        # bulk_update doesn't apply auto_now, so stamp modified_at by hand.
+        ticket.modified_at = now
+        if jira_id not in existing:
+            to_create.append(ticket)
+        else:
+            (to_update_kept if jira_id in unchanged else to_update).append(ticket)
+
+    kept_fields = [field for field in fields if field not in DESCRIPTION_FIELDS]
+    with transaction.atomic():
+        Ticket.objects.bulk_create(to_create, batch_size=batch_size)
+        Ticket.objects.bulk_update(to_update, fields, batch_size=batch_size)
+        Ticket.objects.bulk_update(to_update_kept, kept_fields, batch_size=batch_size)
+        if 'synced_at' in fields:
+            for i in range(0, len(to_touch), batch_size):
+                Ticket.objects.filter(pk__in=to_touch[i:i + batch_size]).update(synced_at=now)
+        record_events(TicketEvent.TICKET_CREATED, to_create)
+        record_events(TicketEvent.TICKET_UPDATED, to_update + to_update_kept)
+    return len(to_create), len(to_update) + len(to_update_kept)
+
+
+def compared_columns(fields):
+    """
+    Returns the columns upsert_tickets compares to tell whether a row
+    changed: `fields` less the write stamps, with the description compared
+    through its source hash.
+    """
+    columns = [
+        Ticket._meta.get_field(field).attname for field in fields
+        if field not in ('synced_at', 'modified_at') and field not in DESCRIPTION_FIELDS
+    ]
+    return columns + ['description_hash']
+
+
+def keep_pending_edits(tickets):
+    """
+    Puts local edits still waiting in the outbox back onto tickets mapped
+    from JIRA.
+
+    Until an edit has been pushed, JIRA's copy of the field is the value
+    it replaced; ingesting it would revert the edit. Entries being pushed
+    count too, with the pending one (made later) winning. Returns `tickets`.
+    """
+    by_jira_id = {ticket.jira_id: ticket for ticket in tickets}
+    if by_jira_id:
+        edits = (
+            OutboxEntry.objects.filter(
+                ticket__jira_id__in=list(by_jira_id),
+                status__in=[OutboxEntry.STATUS_SENDING, OutboxEntry.STATUS_PENDING],
+            )
+            .order_by('pk')
+            .values_list('ticket__jira_id', 'changes')
+        )
+        for jira_id, changes in edits:
+            for field, value in changes.items():
+                setattr(by_jira_id[jira_id], field, value)
+    return tickets
+
+
+def store_jira_issues(issues, batch_size=None, mapper=None):
+    """
+    Upserts raw JIRA issues from any number of projects.
+
+    Projects are resolved once per batch and created if missing, and
+    edits waiting to be pushed are kept. Returns the (created, updated)
+    counts from upsert_tickets.
+    """
+    mapper = mapper or IssueMapper()
+    return upsert_tickets(keep_pending_edits(mapper.to_tickets(list(issues))), batch_size=batch_size)
+
+
+def build_sync_jql(project, since=None):
+    """
+    Builds the JQL for a project sync, optionally limited to issues updated since `since`.
+    """
+    jql = f'project = "{project.jira_key}"'
+    if since is not None:
+        # JQL dates have minute precision and are read in the JIRA user's
+        # timezone, so convert and round down rather than risk skipping issues.
+        local_since = since.astimezone(ZoneInfo(settings.JIRA_TIMEZONE))
+        jql += f' AND updated >= "{local_since:%Y-%m-%d %H:%M}"'
+    return jql + ' ORDER BY updated ASC, key ASC'
+
+
+def sync_project(project, full=False, page_size=None, batch_size=None, comments=False):
+    """
+    Pages through JIRA search results for a project and upserts them locally.
+
+    Unless `full` is set, only issues updated at or after the project's
+    sync watermark are requested. The watermark is advanced after every
+    flushed batch, so an interrupted sync resumes where it stopped.
+
+    Pages are keyset-paginated: each full page restarts the search at the
+    newest `updated` seen, skipping issues already fetched with the same
+    `updated`. An issue edited mid-sync moves to the end of the results;
+    with startAt offsets that shifted later issues past a page boundary,
+    where they were never fetched. Only a page of issues all updated in the
+    same minute (JQL's precision) falls back to an offset. With
+    `comments`, a comment sync is also queued for every issue seen, one
+    insert per batch. Returns a dict with `fetched`, `created` and
+    `updated` counts.
+    """
+    page_size = page_size or settings.JIRA_SYNC_PAGE_SIZE
+    batch_size = batch_size or settings.JIRA_SYNC_BATCH_SIZE
+    jql = build_sync_jql(project, None if full else project.sync_watermark)
+    stats = {'fetched': 0, 'created': 0, 'updated': 0}
+    mapper = IssueMapper(projects=[project])
+
+    pending = []
+
+    def flush():
+        nonlocal pending
+        if not pending:
+            return
+        created, updated = upsert_tickets(keep_pending_edits(pending), batch_size=batch_size)
+        stats['created'] += created
+        stats['updated'] += updated
+        newest = max(ticket.updated_date for ticket in pending)
+        if project.sync_watermark is None or newest > project.sync_watermark:
+            project.sync_watermark = newest
+        project.save(update_fields=['sync_watermark', 'modified_at'])
+        if comments:
+            # Adding a comment bumps the issue's `updated`, so the issues an
+            # incremental sync sees are exactly those whose threads may have changed.
+            schedule_comment_syncs(ticket.jira_id for ticket in pending)
+        pending = []
+
+    # (key, updated) of every issue fetched, so restarted pages skip them
+    # but an issue edited since it was fetched is stored again.
+    seen = set()
+    start_at = 0
+    while True:
+        # A full sync can outlast JOB_LOCK_TIMEOUT; keep its job from being
+        # requeued (and run twice) while it is still making progress.
+        heartbeat()
+        page = search_jira_issues(jql, start_at=start_at, max_results=page_size, fields=SEARCH_FIELDS)
+        if page.get('error'):
+            flush()
+            raise JiraSyncError(page['error'])
+
+        issues = page.get('issues') or []
+        fresh = []
+        for issue in issues:
+            version = (issue.get('key'), (issue.get('fields') or {}).get('updated'))
+            if version not in seen:
+                seen.add(version)
+                fresh.append(issue)
+        tickets = mapper.to_tickets(fresh, project=project)
+        pending.extend(tickets)
+        stats['fetched'] += len(fresh)
+        if len(pending) >= batch_size:
+            flush()
+
+        if not issues or start_at + len(issues) >= page.get('total', 0):
+            break
+        newest = max((ticket.updated_date for ticket in tickets), default=None)
+        restart = build_sync_jql(project, newest) if newest else jql
+        if restart != jql:
+            jql, start_at = restart, 0
+        else:
+            start_at += len(issues)
+
+    flush()
+    project.last_synced_at = timezone.now()
+    project.save(update_fields=['last_synced_at', 'modified_at'])
+    logger.info("Synced project %s: %s", project.jira_key, stats)
+    return stats
+
+
+def sync_projects(jira_keys=None, full=False, page_size=None, batch_size=None, comments=False):
+    """
+    Syncs the given projects (all local projects by default).
+
+    Projects named in `jira_keys` that don't exist locally yet are created.
+    Returns a dict mapping each project key to its stats or error message.
+    """
+    if jira_keys:
+        projects = [
+            Project.objects.get_or_create(jira_key=key, defaults={'name': key})[0]
+            for key in jira_keys
+        ]
+    else:
+        projects = list(Project.objects.all())
+
+    results = {}
+    for project in projects:
+        try:
+            results[project.jira_key] = sync_project(
+                project, full=full, page_size=page_size, batch_size=batch_size, comments=comments,
+            )
+        except JiraSyncError as e:
+            logger.error("Sync of project %s failed: %s", project.jira_key, e)
+            results[project.jira_key] = {'error': str(e)}
+    return results
+
+
+@task
+def sync_project_job(jira_key, full=False, comments=False, page_size=None, batch_size=None):
+    """
+    Job task: syncs one project. JiraSyncError propagates so the job is retried.
+    """
+    project, _ = Project.objects.get_or_create(jira_key=jira_key, defaults={'name': jira_key})
+    return sync_project(project, full=full, page_size=page_size, batch_size=batch_size, comments=comments)
+
+
+def upsert_comments(ticket, comments):
+    """
+    Stores a page of JIRA comments for `ticket`.
+
+    New comments are bulk-inserted; known ones are rewritten only if JIRA's
+    copy is newer. Returns a (created, updated) count tuple.
+    """
+    by_jira_id = {}
+    for data in comments:
+        comment = comment_from_jira(data, ticket)
+        if comment.jira_id:
+            by_jira_id[comment.jira_id] = comment
+    existing = dict(Comment.objects.filter(jira_id__in=list(by_jira_id)).values_list('jira_id', 'updated_date'))
+    existing_pks = {}
+    to_create, to_update = [], []
+    for jira_id, comment in by_jira_id.items():
+        if jira_id not in existing:
+            to_create.append(comment)
+        elif existing[jira_id] is None or comment.updated_date > existing[jira_id]:
+            to_update.append(comment)
+    if to_update:
+        existing_pks = dict(Comment.objects.filter(jira_id__in=[c.jira_id for c in to_update]).values_list('jira_id', 'pk'))
+
+    # bulk_update doesn't apply auto_now, so stamp modified_at by hand.
+    now = timezone.now()
+    for comment in to_create + to_update:
+        comment.modified_at = now
+        comment.pk = existing_pks.get(comment.jira_id)
+    with transaction.atomic():
+        # A webhook may insert the same comment concurrently; its copy wins.
+        Comment.objects.bulk_create(to_create, ignore_conflicts=True)
+        Comment.objects.bulk_update(to_update, COMMENT_SYNC_FIELDS + ['modified_at'])
+        record_events(TicketEvent.COMMENT_CREATED, to_create)
+        record_events(TicketEvent.COMMENT_UPDATED, to_update)
+    return len(to_create), len(to_update)
+
+
+def sync_ticket_comments(ticket, full=False, page_size=None):
+    """
+    Pages through a ticket's JIRA comments, oldest first, and stores them.
+
+    Unless `full` is set, paging resumes at the ticket's comment offset,
+    one comment early: if that comment isn't the last one seen (comments
+    were deleted in JIRA, shifting the pages), the sync restarts from the
+    first page. Edits to older comments arrive through webhooks or a full
+    sync. Returns a dict with `fetched`, `created` and `updated` counts.
+    """
+    page_size = page_size or settings.JIRA_COMMENT_PAGE_SIZE
+    stats = {'fetched': 0, 'created': 0, 'updated': 0}
+    resume = not full and ticket.comment_sync_offset and ticket.comment_sync_last_id
+    start_at = ticket.comment_sync_offset - 1 if resume else 0
+    last_id = ticket.comment_sync_last_id if resume else None
+
+    while True:
+        page = get_jira_comments(ticket.jira_id, start_at=start_at, max_results=page_size)
+        if page.get('error'):
+            raise JiraSyncError(page['error'])
+        comments = page.get('comments') or []
+        if resume:
+            resume = False
+            if not comments or str(comments[0].get('id')) != last_id:
+                start_at, last_id = 0, None
+                continue
+
+        created, updated = upsert_comments(ticket, comments)
+        stats['fetched'] += len(comments)
+        stats['created'] += created
+        stats['updated'] += updated
+        if comments:
+            last_id = str(comments[-1].get('id'))
+        start_at += len(comments)
+        if not comments or start_at >= page.get('total', 0):
+            break
+
+    ticket.comment_sync_offset, ticket.comment_sync_last_id = start_at, last_id
+    Ticket.objects.filter(pk=ticket.pk).update(comment_sync_offset=start_at, comment_sync_last_id=last_id)
+    return stats
+
+
+@task
+def sync_comments_job(jira_id, full=False):
+    """
+    Job task: syncs one ticket's comments. JiraSyncError propagates so the job is retried.
+    """
+    ticket = Ticket.objects.filter(jira_id=jira_id).first()
+    if ticket is None:
+        return None
+    return sync_ticket_comments(ticket, full=full)
+
+
+def schedule_comment_sync(jira_id, priority=Job.PRIORITY_LOW):
+    """
+    Queues a comment sync for a ticket, sharing any sync already queued for it.
+    """
+    return enqueue(sync_comments_job, jira_id, priority=priority, dedupe_key=f'comments:{jira_id}')
+
+
+def schedule_comment_syncs(jira_ids, priority=Job.PRIORITY_LOW):
+    """
+    schedule_comment_sync() for many tickets, queued with one insert.
+    """
+    enqueue_many(sync_comments_job, [((jira_id,), f'comments:{jira_id}') for jira_id in jira_ids], priority=priority)
+
+
+def schedule_comment_push(comment_id):
+    """
+    Queues pushing a locally created comment to JIRA.
+    """
+    return enqueue(push_comment, comment_id, dedupe_key=f'push-comment:{comment_id}')
+
+
+@task
+def push_comment(comment_id):
+    """
+    Job task: creates a locally written comment in JIRA and records its JIRA id.
+    """
+    comment = Comment.objects.select_related('ticket').filter(pk=comment_id).first()
+    if comment is None or comment.jira_id:
+        return None
+    if get_jira_client() is None:
+        # Dead-lettered, so it can be requeued once JIRA is configured.
+        raise PermanentJobError("JIRA is not configured")
+    result = add_jira_comment(comment.ticket.jira_id, comment.body)
+    if result.get('error'):
+        status_code = result.get('status_code')
+        # Client errors other than rate limiting won't succeed on retry.
+        if status_code and 400 <= status_code < 500 and status_code != 429:
+            raise PermanentJobError(result['error'])
+        raise JiraSyncError(result['error'])
+
+    jira_id = str(result.get('id'))
+    with transaction.atomic():
+        # A webhook or comment sync may already have stored JIRA's copy of
+        # this comment; keep the local row, which has the author.
+        Comment.objects.filter(jira_id=jira_id).exclude(pk=comment.pk).delete()
+        Comment.objects.filter(pk=comment.pk).update(
+            jira_id=jira_id, updated_date=parse_jira_datetime(result.get('updated')), modified_at=timezone.now(),
+        )
+    return jira_id
@@ -1,10 +1,52 @@
+import asyncio
+import csv
+import gzip
+import hashlib
+import hmac
+import json
+import os
+import re
+import threading
+import time
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from django.urls import reverse
 from django.contrib.auth.models import User
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.serializers import Serializer
 from unittest.mock import patch, MagicMock # Added MagicMock
 
-from .models import Project, Ticket, Comment
+from .models import Project, Ticket, Comment, DeadLetterJob, Job, OutboxEntry, TicketChange, TicketEvent, WebhookEvent
+from . import outbox
+from .adf import render_description
+from .authentication import token_cache
+from .bulk import bulk_update_tickets
+from .events import EventStream, prune_events
+from .freshness import SingleFlight, arefresh_ticket, is_fresh, schedule_refresh
+from .jira_utils import (
+    AsyncJiraClient, JiraClient, get_jira_client, get_jira_issue, get_jira_issues, parse_retry_after, reset_jira_client,
+    search_jira_issues,
+)
+from .jobs import JobFailed, PermanentJobError, Worker, enqueue, recover_stale_jobs, run_pending, task, wait
+from .mapper import ROW_FIELDS, IssueMapper, parse_jira_datetime
+from .outbox import flush_outbox
+from .response_cache import get_response_cache
+from .search import fts5_match_expression
+from .sync import (
+    JiraSyncError, store_jira_issues, sync_comments_job, sync_project, sync_project_job, sync_ticket_comments,
+    upsert_tickets,
+)
+from .upstream import CircuitBreaker, TokenBucket
+from .webhooks import apply_issue, process_event
 # Serializers are not directly used in these tests but good to have for reference
 # from .serializers import ProjectSerializer, TicketSerializer, CommentSerializer
 
@@ -156,10 +198,11 @@ class TicketAPITests(BaseAPITestCase):
     def test_get_ticket_list_authenticated(self):
         response = self.client.get(self.tickets_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), Ticket.objects.count())
+        # The list is paginated; results hold the first page.
+        self.assertEqual(len(response.data['results']), Ticket.objects.count())
         # Ensure serializer is working by checking a known field.
-        # Note: response.data is a list of OrderedDicts.
-        self.assertTrue(any(t['title'] == self.ticket1.title for t in response.data))
+        # Note: response.data['results'] is a list of OrderedDicts.
+        self.assertTrue(any(t['title'] == self.ticket1.title for t in response.data['results']))
 
 
     def test_create_ticket_authenticated_valid_data(self):
@@ -311,148 +354,2453 @@ class CommentAPITests(BaseAPITestCase):
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertIn('ticket', response.data) # DRF validation error for invalid foreign key
 
-# Instructions for running tests:
-# (These would typically be in a README.md, but included here as per prompt)
-#
-# ## Running Tests
-#
-# To run the automated tests for the `jira_integration` app, navigate to the
-# `vibejira_django` project root directory (where `manage.py` is located)
-# and execute the following command in your terminal:
-#
-# ```bash
-# python manage.py test jira_integration
-# ```
-#
-# This command will discover and run all tests within the `jira_integration/tests.py` file.
-# Ensure your virtual environment is activated and all dependencies from
-# `requirements.txt` are installed.
-#
-# The tests use `unittest.mock.patch` to mock external JIRA API calls made via
-# `jira_utils.get_jira_issue` (which is imported into `views.py`). This allows
-# tests for JIRA interaction logic (like fetching a ticket not in the local DB)
-# to run reliably without a live JIRA connection or valid JIRA credentials.
-#
-# Test results will indicate success or failure for each test case, along with
-# any errors or tracebacks.
-#
-# To run a specific test class or method:
-# ```bash
-# python manage.py test jira_integration.tests.TicketAPITests
-# python manage.py test jira_integration.tests.TicketAPITests.test_get_ticket_retrieve_authenticated_fetch_from_jira_success
-# ```
-#
-# Note on URL Naming:
-# The tests rely on Django's `reverse()` function to generate URLs for API endpoints.
-# This requires that your URL patterns in `urls.py` are named. For example:
-# - `router.register(r'projects', ProjectViewSet, basename='project')`
-# - `router.register(r'tickets', TicketViewSet, basename='ticket')`
-# - `router.register(r'comments', CommentViewSet, basename='comment')`
-# - `path('api-token-auth/', authtoken_views.obtain_auth_token, name='api-token-auth')`
-# The test code uses names like 'project-list', 'project-detail', 'ticket-list', 'ticket-detail', etc.
-# These are default names generated by DRF's DefaultRouter. If you've customized these names,
-# update the `reverse()` calls in the tests accordingly.
-# For the `CommentAPITests`, the `list` view for comments is assumed to be named `comment-list` and
-# allows filtering by `ticket` PK in query parameters (e.g., `/api/comments/?ticket=<pk>`).
-# If your comment endpoint is nested (e.g., `/api/tickets/<ticket_pk>/comments/`), the URL reversing
-# and test logic for fetching comments would need to be adjusted.
-# The test `test_update_ticket_patch_authenticated_status` and `test_delete_ticket_authenticated`
-# currently assume that the detail URL for tickets (`ticket-detail`) uses the database primary key (PK)
-# for `PATCH` and `DELETE` operations, as `TicketViewSet` does not override `update` or `destroy` methods.
-# However, `retrieve` is overridden to use `jira_id`. This means:
-# - `GET /api/tickets/{jira_id}/` is handled by the overridden `retrieve`.
-# - `PATCH /api/tickets/{db_pk}/` and `DELETE /api/tickets/{db_pk}/` use the database PK.
-# This distinction is important for writing correct tests.
-#
-#
-# A note on `vibejira_django.jira_integration.views.get_jira_issue`:
-# The patch target `@patch('vibejira_django.jira_integration.views.get_jira_issue')` assumes that
-# `get_jira_issue` is imported directly into the `views.py` module. If it's imported differently
-# (e.g., `from . import jira_utils` and then called as `jira_utils.get_jira_issue`), the patch
-# target must be adjusted accordingly (e.g., `@patch('vibejira_django.jira_integration.jira_utils.get_jira_issue')`
-# if `views.py` calls it that way, or more precisely, where it's looked up at runtime).
-# The current path is based on the common pattern of `from .jira_utils import get_jira_issue` in `views.py`.
-#
-# The test `test_get_comment_list_for_ticket_authenticated` assumes that the listing
-# of comments can be filtered by `ticket` (PK) as a query parameter.
-# e.g. `GET /api/comments/?ticket=1`. This is a common way to implement filtering
-# with DRF if comments are not a nested resource.
-#
-# The `setUpTestData` class method is used for setting up data that is shared across
-# all test methods in a class and is created once per class. This is more efficient
-# than `setUp` for data that doesn't need to be reset for each test.
-# `setUp` is then used for objects that might be modified by tests or need to be
-# fresh for each test, like the `APIClient`.
-#
-# Ensure your `CommentSerializer` is configured to correctly handle the `ticket` field
-# (e.g., using `PrimaryKeyRelatedField`) for creating comments.
-# The `author` field for comments is populated with `self.user.email` in `test_create_comment_authenticated_valid_data`.
-# Ensure your `Comment` model and serializer can handle this or adjust as needed.
-#
-# The `TicketAPITests` for `retrieve` are specifically designed to test both local DB hits
-# and fallbacks to JIRA (mocked). The `pk` in the URL for `ticket-detail` is the `jira_id`
-# because the `TicketViewSet.retrieve` method is overridden to use `kwargs.get('pk')` as `jira_id`.
-# However, for `update` and `delete`, DRF's default `ModelViewSet` behavior uses the actual
-# database primary key. The tests reflect this distinction.
-#
-# For `test_get_ticket_list_authenticated`, the assertion `self.assertTrue(any(t['title'] == self.ticket1.title for t in response.data))`
-# is a robust way to check if the ticket is present in the list, as the order might not be guaranteed.
-#
-# One final check for `TicketAPITests.test_create_ticket_authenticated_valid_data`:
-# The number of tickets before creation is 1 (self.ticket1). After creation, it should be 2.
-# The test `self.assertEqual(Ticket.objects.count(), 2)` was in the original template for Project,
-# it should be adapted if there are more tickets created in setUpTestData or other tests.
-# Given `setUpTestData`, there's only `self.ticket1`. So, after creating one more, count should be 2.
-# This seems correct.
-# Similarly for `CommentAPITests.test_create_comment_authenticated_valid_data`:
-# `self.comment1` is created in `setUpTestData`.
-# `test_get_comment_list_for_ticket_authenticated` creates one more comment on `ticket2`.
-# So, before `test_create_comment_authenticated_valid_data` runs, there are 2 comments.
-# After creating one more, the count becomes 3. This also seems correct.
-#
-# The test file is quite comprehensive.
-# Make sure all necessary imports are present and correct.
-# `from unittest.mock import patch, MagicMock` was added to the template.
-# Serializers are not directly used but can be helpful for understanding data structure.
-# The `setUpTestData` is a good optimization.
-# The instructions for running tests are clear.I have overwritten `vibejira_django/jira_integration/tests.py` with a comprehensive suite of unit tests.
+def make_jira_issue(key, project_key='SYN', updated='2024-03-01T10:00:00.000+0000', **fields):
+    issue_fields = {
+        'summary': f'Summary of {key}', 'description': None,
+        'status': {'name': 'Open'}, 'priority': {'name': 'Medium'},
+        'project': {'key': project_key, 'name': 'Sync Project'},
+        'assignee': None, 'reporter': {'displayName': 'Reporter'},
+        'created': '2024-03-01T09:00:00.000+0000', 'updated': updated,
+        'duedate': None,
+    }
+    issue_fields.update(fields)
+    return {'key': key, 'fields': issue_fields}
+
+
+class SyncEngineTests(TestCase):
+    def setUp(self):
+        self.project = Project.objects.create(name='Sync Project', jira_key='SYN')
+
+    def _pages(self, issues, page_size):
+        pages = []
+        for start in range(0, len(issues), page_size):
+            pages.append({'startAt': start, 'total': len(issues), 'issues': issues[start:start + page_size]})
+        return pages
+
+    def _search(self, issues):
+        """
+        A search_jira_issues stand-in over `issues` (all in UTC) that applies
+        the sync JQL's `updated >=` bound and order.
+        """
+        def search(jql, start_at=0, max_results=100, fields=None):
+            since = re.search(r'updated >= "([^"]+)"', jql)
+            rows = sorted(
+                (issue for issue in issues
+                 if not since or issue['fields']['updated'][:16].replace('T', ' ') >= since[1]),
+                key=lambda issue: (issue['fields']['updated'], issue['key']),
+            )
+            return {'startAt': start_at, 'total': len(rows), 'issues': rows[start_at:start_at + max_results]}
+        return search
+
+    @patch('jira_integration.sync.search_jira_issues')
+    def test_full_sync_pages_and_bulk_creates(self, mock_search):
+        issues = [
+            make_jira_issue(f'SYN-{i}', updated=f'2024-03-0{i}T10:00:00.000+0000')
+            for i in range(1, 6)
+        ]
+        mock_search.side_effect = self._search(issues)
+
+        stats = sync_project(self.project, page_size=2, batch_size=2)
+
+        self.assertEqual(stats, {'fetched': 5, 'created': 5, 'updated': 0})
+        # Each full page restarts the search from the newest issue it held.
+        self.assertEqual(
+            [re.findall(r'updated >= "([^"]+)"', c.args[0]) for c in mock_search.call_args_list],
+            [[], ['2024-03-02 10:00'], ['2024-03-03 10:00'], ['2024-03-04 10:00']],
+        )
+        self.assertEqual({c.kwargs['start_at'] for c in mock_search.call_args_list}, {0})
+        self.assertEqual(Ticket.objects.filter(project=self.project).count(), 5)
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.sync_watermark.isoformat(), '2024-03-05T10:00:00+00:00')
+        self.assertIsNotNone(self.project.last_synced_at)
+
+    @patch('jira_integration.sync.search_jira_issues')
+    def test_incremental_sync_uses_watermark_and_updates_rows(self, mock_search):
+        mock_search.side_effect = self._pages([make_jira_issue('SYN-1')], 100)
+        sync_project(self.project)
+
+        changed = make_jira_issue('SYN-1', updated='2024-03-02T08:30:00.000+0000', status={'name': 'Done'})
+        mock_search.side_effect = self._pages([changed, make_jira_issue('SYN-2')], 100)
+        stats = sync_project(self.project)
+
+        jql = mock_search.call_args.args[0]
+        self.assertIn('updated >= "2024-03-01 10:00"', jql)
+        self.assertTrue(jql.endswith('ORDER BY updated ASC, key ASC'))
+        self.assertEqual(stats['created'], 1)
+        self.assertEqual(stats['updated'], 1)
+        self.assertEqual(Ticket.objects.get(jira_id='SYN-1').status, 'Done')
+
+    @patch('jira_integration.sync.search_jira_issues')
+    def test_issue_edited_mid_sync_shifts_no_issue_out_of_reach(self, mock_search):
+        issues = [
+            make_jira_issue(f'SYN-{i}', updated=f'2024-03-0{i}T10:00:00.000+0000')
+            for i in range(1, 6)
+        ]
+        search = self._search(issues)
+
+        def search_then_edit(jql, **kwargs):
+            page = search(jql, **kwargs)
+            # SYN-1, already fetched, is edited and moves to the end of the results.
+            issues[0] = make_jira_issue('SYN-1', updated='2024-03-09T10:00:00.000+0000', status={'name': 'Done'})
+            return page
+
+        mock_search.side_effect = search_then_edit
+        stats = sync_project(self.project, page_size=2, batch_size=2)
+
+        self.assertEqual(stats['created'], 5)
+        self.assertEqual(
+            sorted(Ticket.objects.filter(project=self.project).values_list('jira_id', flat=True)),
+            [f'SYN-{i}' for i in range(1, 6)],
+        )
+        self.assertEqual(Ticket.objects.get(jira_id='SYN-1').status, 'Done')
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.sync_watermark.isoformat(), '2024-03-09T10:00:00+00:00')
+
+    @override_settings(JOBS_EAGER=False, JOB_EMBEDDED_WORKERS=0)
+    @patch('jira_integration.sync.search_jira_issues')
+    def test_long_sync_job_is_not_requeued_as_stale(self, mock_search):
+        search = self._search([
+            make_jira_issue(f'SYN-{i}', updated=f'2024-03-0{i}T10:00:00.000+0000') for i in range(1, 4)
+        ])
+        recovered = []
+
+        def slow_search(jql, **kwargs):
+            recovered.append(recover_stale_jobs())
+            # As far as the lock is concerned, every page takes a day.
+            Job.objects.filter(status=Job.STATUS_RUNNING).update(locked_at=timezone.now() - timedelta(days=1))
+            return search(jql, **kwargs)
+
+        mock_search.side_effect = slow_search
+        job, _ = enqueue(sync_project_job, 'SYN', False, False, 2)
+        run_pending()
 
-**Summary of `tests.py` Content:**
+        self.assertEqual(recovered, [0, 0])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.STATUS_DONE, 1))
 
-1.  **`AuthTokenTests`:**
-    *   Tests token generation with valid and invalid credentials.
-    *   Ensures that `rest_framework.authtoken.views.obtain_auth_token` (or its equivalent if customized) works as expected.
+    @patch('jira_integration.sync.search_jira_issues')
+    def test_same_minute_pages_fall_back_to_offsets(self, mock_search):
+        issues = [make_jira_issue(f'SYN-{i}') for i in range(1, 6)]
+        mock_search.side_effect = self._search(issues)
 
-2.  **`BaseAPITestCase`:**
-    *   Uses `setUpTestData` for efficient creation of common test data (user, project, ticket, comment).
-    *   `setUp` method initializes an authenticated `APIClient` for use in derived test classes.
+        stats = sync_project(self.project, page_size=2)
 
-3.  **`ProjectAPITests(BaseAPITestCase)`:**
-    *   Covers GET (list, retrieve), POST, PUT, PATCH, and DELETE operations for projects.
-    *   Tests for unauthenticated access, valid/invalid data, duplicate keys, and non-existent resources.
+        self.assertEqual(stats['created'], 5)
+        self.assertEqual([c.kwargs['start_at'] for c in mock_search.call_args_list], [0, 0, 2, 4])
 
-4.  **`TicketAPITests(BaseAPITestCase)`:**
-    *   Covers GET (list, retrieve), POST, PATCH, and DELETE for tickets.
-    *   **Mocking for `retrieve`:** Critically, the `retrieve` tests for tickets include:
-        *   Fetching a ticket that exists locally (mocked `get_jira_issue` should not be called).
-        *   Fetching a ticket not in the local DB, successfully from JIRA (mocked `get_jira_issue` returns valid data, ticket is created locally).
-        *   Fetching a ticket not in the local DB, where JIRA API call fails (mocked `get_jira_issue` returns an error).
-    *   The tests for `update` (PATCH) and `delete` assume that the `ticket-detail` URL uses the database PK for these operations, as the `TicketViewSet` does not override the default `update`/`destroy` methods which use the model's PK. The `retrieve` method, however, is overridden to use `jira_id` from the URL's `pk` kwarg.
+    @patch('jira_integration.sync.search_jira_issues')
+    def test_error_keeps_progress_of_previous_pages(self, mock_search):
+        first_page = {'startAt': 0, 'total': 4, 'issues': [make_jira_issue('SYN-1'), make_jira_issue('SYN-2')]}
+        mock_search.side_effect = [first_page, {'error': 'HTTP error occurred: 500'}]
+
+        with self.assertRaises(JiraSyncError):
+            sync_project(self.project, page_size=2)
+
+        self.assertEqual(Ticket.objects.filter(project=self.project).count(), 2)
+        self.project.refresh_from_db()
+        self.assertIsNotNone(self.project.sync_watermark)
+
+    @patch('jira_integration.sync.search_jira_issues')
+    def test_sync_jira_command_creates_missing_project(self, mock_search):
+        mock_search.side_effect = self._pages([make_jira_issue('NEW-1', project_key='NEW')], 100)
+        out = StringIO()
+
+        call_command('sync_jira', 'NEW', stdout=out)
+
+        self.assertTrue(Ticket.objects.filter(jira_id='NEW-1', project__jira_key='NEW').exists())
+        self.assertIn('NEW: fetched 1, created 1, updated 0', out.getvalue())
+
+    @override_settings(JOBS_EAGER=False, JOB_EMBEDDED_WORKERS=0)
+    @patch('jira_integration.sync.search_jira_issues')
+    def test_sync_jira_enqueue_keeps_full_syncs_and_sizes(self, mock_search):
+        call_command('sync_jira', 'SYN', '--enqueue', stdout=StringIO())
+        call_command('sync_jira', 'SYN', '--enqueue', '--full', '--page-size', '2', '--batch-size', '3', stdout=StringIO())
+        call_command('sync_jira', 'SYN', '--enqueue', '--full', stdout=StringIO())
+
+        self.assertEqual(Job.objects.count(), 2)
+        full = Job.objects.get(dedupe_key='sync:SYN:full')
+        self.assertEqual(full.args, ['SYN', True, False, 2, 3])
+
+        Job.objects.exclude(pk=full.pk).delete()
+        mock_search.side_effect = self._search([make_jira_issue(f'SYN-{i}') for i in range(1, 4)])
+        run_pending()
+        self.assertEqual(Ticket.objects.filter(project=self.project).count(), 3)
+        self.assertEqual({c.kwargs['max_results'] for c in mock_search.call_args_list}, {2})
+
+class StubJiraHandler(BaseHTTPRequestHandler):
+    """Replays the server's scripted (status, headers, body) responses in order."""
+    protocol_version = 'HTTP/1.1'  # keep-alive, so connection reuse is observable
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append((self.path, self.client_address))
+        status_code, headers, body = server.responses.pop(0) if server.responses else (200, {}, {})
+        payload = json.dumps(body).encode()
+        self.send_response(status_code)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubJiraServerMixin:
+    def start_stub_server(self, responses=()):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), StubJiraHandler)
+        server.responses = list(responses)
+        server.requests = []
+        thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+class JiraClientTests(StubJiraServerMixin, SimpleTestCase):
+    def make_client(self, base_url, **kwargs):
+        self.sleeps = []
+        client = JiraClient(base_url, 'bot@example.com', 'pat', sleep=self.sleeps.append, **kwargs)
+        self.addCleanup(client.close)
+        return client
+
+    def test_reuses_keep_alive_connection(self):
+        server, base_url = self.start_stub_server([(200, {}, {'key': f'KA-{i}'}) for i in range(3)])
+        client = self.make_client(base_url)
+
+        keys = [client.get(f'/rest/api/3/issue/KA-{i}')['key'] for i in range(3)]
+
+        self.assertEqual(keys, ['KA-0', 'KA-1', 'KA-2'])
+        self.assertEqual(len({address for _, address in server.requests}), 1)
+
+    def test_retries_429_honouring_retry_after(self):
+        server, base_url = self.start_stub_server([
+            (429, {'Retry-After': '2'}, {}),
+            (200, {}, {'key': 'RA-1'}),
+        ])
+        client = self.make_client(base_url)
+
+        self.assertEqual(client.get('/rest/api/3/issue/RA-1'), {'key': 'RA-1'})
+        self.assertEqual(self.sleeps, [2.0])
+
+    def test_retries_503_with_bounded_jittered_backoff(self):
+        server, base_url = self.start_stub_server([(503, {}, {})] * 3 + [(200, {}, {'key': 'BO-1'})])
+        client = self.make_client(base_url, backoff_base=1.0, backoff_max=3.0)
+
+        self.assertEqual(client.get('/rest/api/3/issue/BO-1'), {'key': 'BO-1'})
+        self.assertEqual(len(self.sleeps), 3)
+        for attempt, delay in enumerate(self.sleeps):
+            self.assertLessEqual(delay, min(3.0, 2 ** attempt))
+
+    def test_gives_up_after_max_retries(self):
+        server, base_url = self.start_stub_server([(503, {}, {})] * 5)
+        client = self.make_client(base_url, max_retries=2)
+
+        result = client.get('/rest/api/3/issue/GU-1')
+
+        self.assertEqual(result['status_code'], 503)
+        self.assertEqual(len(server.requests), 3)
+
+    def test_client_errors_are_not_retried(self):
+        server, base_url = self.start_stub_server([(404, {}, {'errorMessages': ['Issue does not exist']})])
+        client = self.make_client(base_url)
+
+        result = client.get('/rest/api/3/issue/NF-1')
+
+        self.assertEqual(result['status_code'], 404)
+        self.assertIn('error', result)
+        self.assertEqual(self.sleeps, [])
+
+    def test_parse_retry_after_accepts_http_date(self):
+        self.assertEqual(parse_retry_after('5'), 5.0)
+        self.assertEqual(parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT'), 0.0)
+        self.assertIsNone(parse_retry_after('soon'))
+
+    def test_module_helpers_use_shared_client(self):
+        server, base_url = self.start_stub_server([(200, {}, {'key': 'SH-1'}), (200, {}, {'total': 0, 'issues': []})])
+        env = {'JIRA_BASE_URL': base_url, 'JIRA_USER_EMAIL': 'bot@example.com', 'JIRA_PAT': 'pat'}
+        reset_jira_client()
+        self.addCleanup(reset_jira_client)
+        with patch.dict(os.environ, env):
+            self.assertEqual(get_jira_issue('SH-1'), {'key': 'SH-1'})
+            self.assertEqual(search_jira_issues('project = SH')['total'], 0)
+            self.assertIs(get_jira_client(), get_jira_client())
+        self.assertEqual(len({address for _, address in server.requests}), 1)
+
+class BatchFetchTests(SimpleTestCase):
+    @patch('jira_integration.jira_utils.get_jira_issue')
+    @patch('jira_integration.jira_utils.search_jira_issues')
+    def test_folds_keys_into_jql_batches(self, mock_search, mock_get):
+        keys = [f'BF-{i}' for i in range(1, 6)]
+        mock_search.side_effect = lambda jql, **kwargs: {
+            'issues': [make_jira_issue(k, project_key='BF') for k in jql[len('key in ('):-1].split(',')]
+        }
+
+        results = get_jira_issues(keys, batch_size=2, max_workers=2)
+
+        self.assertEqual(list(results), keys)
+        self.assertEqual(mock_search.call_count, 3)
+        self.assertEqual(results['BF-3']['key'], 'BF-3')
+        mock_get.assert_not_called()
+
+    @patch('jira_integration.jira_utils.get_jira_issue')
+    @patch('jira_integration.jira_utils.search_jira_issues')
+    def test_rejected_batches_and_odd_keys_fall_back_to_single_fetches(self, mock_search, mock_get):
+        mock_search.return_value = {'error': 'HTTP error occurred: 400', 'status_code': 400}
+        mock_get.side_effect = lambda key: (
+            {'error': 'HTTP error occurred: 404', 'status_code': 404} if key == 'BF-404' else make_jira_issue(key)
+        )
+
+        results = get_jira_issues(['BF-1', 'BF-404', '10042'])
+
+        mock_search.assert_called_once()
+        self.assertEqual(mock_get.call_count, 3)
+        self.assertEqual(results['BF-1']['key'], 'BF-1')
+        self.assertEqual(results['10042']['key'], '10042')
+        self.assertEqual(results['BF-404']['status_code'], 404)
+
+
+class TicketBatchRetrieveTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='batch_user', password='pw')
+        self.client.force_authenticate(user=self.user)
+        self.project = Project.objects.create(name='Batch', jira_key='BR')
+        Ticket.objects.create(
+            project=self.project, jira_id='BR-1', title='Local', status='Open', priority='High',
+            created_date='2024-01-01T00:00:00Z', updated_date='2024-01-01T00:00:00Z',
+        )
+        self.url = reverse('ticket-batch-retrieve')
+
+    @patch('jira_integration.views.get_jira_issues')
+    def test_serves_hits_locally_and_fetches_only_misses(self, mock_get_issues):
+        mock_get_issues.return_value = {
+            'BR-2': make_jira_issue('BR-2', project_key='BR'),
+            'BR-9': {'error': 'HTTP error occurred: 404', 'status_code': 404, 'response_text': '...'},
+        }
+
+        response = self.client.post(self.url, {'keys': ['BR-1', 'BR-2', 'BR-9']}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        mock_get_issues.assert_called_once_with(['BR-2', 'BR-9'])
+        self.assertEqual([t['jira_id'] for t in response.data['tickets']], ['BR-1', 'BR-2'])
+        self.assertEqual(response.data['errors'], {'BR-9': {'error': 'HTTP error occurred: 404', 'status_code': 404}})
+        self.assertTrue(Ticket.objects.filter(jira_id='BR-2').exists())
+
+    @patch('jira_integration.views.get_jira_issues')
+    def test_all_local_hits_make_no_jira_calls(self, mock_get_issues):
+        response = self.client.post(self.url, {'keys': ['BR-1']}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['tickets']), 1)
+        mock_get_issues.assert_not_called()
+
+    def test_rejects_invalid_key_lists(self):
+        for payload in ({}, {'keys': []}, {'keys': 'BR-1'}, {'keys': [1, 2]}):
+            response = self.client.post(self.url, payload, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, payload)
+
+class SingleFlightTests(SimpleTestCase):
+    def test_concurrent_calls_share_one_execution(self):
+        flight = SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def slow_fetch():
+            calls.append(1)
+            release.wait(5)
+            return 'result'
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(flight.do('HOT-1', slow_fetch))) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        while not calls:
+            time.sleep(0.001)
+        time.sleep(0.05)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ['result'] * 20)
+
+    def test_exceptions_reach_every_waiter_and_clear_the_key(self):
+        flight = SingleFlight()
+        with self.assertRaises(ValueError):
+            flight.do('K', lambda: (_ for _ in ()).throw(ValueError('boom')))
+        self.assertEqual(flight.do('K', lambda: 'retried'), 'retried')
+
+
+@override_settings(TICKET_TTL=60, TICKET_COLD_AFTER=3600, TICKET_COLD_TTL=600, JOBS_EAGER=True)
+class TicketFreshnessTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='swr_user', password='pw')
+        self.client.force_authenticate(user=self.user)
+        self.project = Project.objects.create(name='SWR', jira_key='SWR')
+        self.now = timezone.now()
+
+    def make_ticket(self, jira_id, synced_ago, updated_ago):
+        return Ticket.objects.create(
+            project=self.project, jira_id=jira_id, title=jira_id, status='Open', priority='High',
+            created_date=self.now - updated_ago, updated_date=self.now - updated_ago,
+            synced_at=None if synced_ago is None else self.now - synced_ago,
+        )
+
+    def test_ttl_depends_on_ticket_activity(self):
+        hot = self.make_ticket('SWR-1', timedelta(seconds=120), timedelta(minutes=5))
+        cold = self.make_ticket('SWR-2', timedelta(seconds=120), timedelta(days=2))
+        never = self.make_ticket('SWR-3', None, timedelta(minutes=5))
+
+        self.assertFalse(is_fresh(hot, self.now))
+        self.assertTrue(is_fresh(cold, self.now))
+        self.assertTrue(is_fresh(never, self.now))
+
+    @patch('jira_integration.views.schedule_refresh')
+    def test_stale_row_is_served_and_refresh_queued(self, mock_schedule):
+        self.make_ticket('SWR-1', timedelta(seconds=120), timedelta(minutes=5))
+
+        response = self.client.get(reverse('ticket-detail', kwargs={'pk': 'SWR-1'}))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['jira_id'], 'SWR-1')
+        mock_schedule.assert_called_once_with('SWR-1')
+
+    @patch('jira_integration.views.schedule_refresh')
+    def test_fresh_row_is_served_without_refresh(self, mock_schedule):
+        self.make_ticket('SWR-1', timedelta(seconds=10), timedelta(minutes=5))
+
+        response = self.client.get(reverse('ticket-detail', kwargs={'pk': 'SWR-1'}))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        mock_schedule.assert_not_called()
+
+    @patch('jira_integration.views.schedule_refresh')
+    def test_local_only_row_is_served_without_refresh(self, mock_schedule):
+        self.make_ticket('SWR-1', None, timedelta(minutes=5))
+
+        for _ in range(2):
+            response = self.client.get(reverse('ticket-detail', kwargs={'pk': 'SWR-1'}))
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        mock_schedule.assert_not_called()
+
+    @patch('jira_integration.freshness.get_jira_issue')
+    def test_miss_fetches_stores_and_marks_synced(self, mock_get_issue):
+        mock_get_issue.return_value = make_jira_issue('SWR-9', project_key='SWR')
+
+        response = self.client.get(reverse('ticket-detail', kwargs={'pk': 'SWR-9'}))
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        mock_get_issue.assert_called_once_with('SWR-9')
+        self.assertIsNotNone(Ticket.objects.get(jira_id='SWR-9').synced_at)
+
+    @override_settings(JOBS_EAGER=False, JOB_EMBEDDED_WORKERS=0, JIRA_SYNC_COMMENTS=False)
+    @patch('jira_integration.freshness.get_jira_issue')
+    def test_schedule_refresh_deduplicates_queued_refreshes(self, mock_get_issue):
+        mock_get_issue.return_value = make_jira_issue('SWR-5', project_key='SWR')
+
+        job, created = schedule_refresh('SWR-5')
+        self.assertTrue(created)
+        self.assertEqual(schedule_refresh('SWR-5'), (job, False))
+        self.assertEqual(run_pending(), 1)
+        mock_get_issue.assert_called_once_with('SWR-5')
+        # Once finished, the key is free for the next refresh.
+        self.assertTrue(schedule_refresh('SWR-5')[1])
+
+    @override_settings(JOBS_EAGER=False, JOB_EXTERNAL_WORKERS=True, TICKET_FETCH_WAIT=0.05)
+    def test_miss_answers_202_while_fetch_is_pending(self):
+        response = self.client.get(reverse('ticket-detail', kwargs={'pk': 'SWR-7'}))
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        job = Job.objects.get()
+        self.assertEqual((job.args, job.priority), (['SWR-7'], Job.PRIORITY_HIGH))
+
+    @override_settings(JOBS_EAGER=False, JOB_EMBEDDED_WORKERS=0, JOB_EXTERNAL_WORKERS=False, JIRA_SYNC_COMMENTS=False)
+    @patch('jira_integration.jobs.time.sleep')
+    @patch('jira_integration.freshness.get_jira_issue')
+    def test_miss_is_fetched_at_once_without_workers(self, mock_get_issue, mock_sleep):
+        mock_get_issue.return_value = make_jira_issue('SWR-8', project_key='SWR')
+
+        response = self.client.get(reverse('ticket-detail', kwargs={'pk': 'SWR-8'}))
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        self.assertEqual(Job.objects.get().status, Job.STATUS_DONE)
+        mock_sleep.assert_not_called()
+
+    @override_settings(JOBS_EAGER=False, JOB_EXTERNAL_WORKERS=True, TICKET_FETCH_INLINE_AFTER=0.05, JIRA_SYNC_COMMENTS=False)
+    @patch('jira_integration.freshness.get_jira_issue')
+    def test_miss_is_fetched_inline_when_no_worker_claims_it(self, mock_get_issue):
+        mock_get_issue.return_value = make_jira_issue('SWR-8', project_key='SWR')
+
+        started = time.monotonic()
+        response = self.client.get(reverse('ticket-detail', kwargs={'pk': 'SWR-8'}))
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        self.assertGreaterEqual(time.monotonic() - started, 0.05)
+        self.assertEqual(Job.objects.get().locked_by, 'inline')
+
+class TicketListPaginationTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='page_user', password='pw')
+        cls.project = Project.objects.create(name='Paging', jira_key='PG')
+        base = timezone.now()
+        tickets = []
+        for i in range(7):
+            # Pairs of tickets share an updated_date so ties must be broken by id.
+            updated = base - timedelta(hours=i // 2)
+            tickets.append(Ticket(
+                project=cls.project, jira_id=f'PG-{i}', title=f'Ticket {i}', description='Long text',
+                status='Open', priority='High', created_date=updated, updated_date=updated,
+            ))
+        Ticket.objects.bulk_create(tickets)
+
+    def setUp(self):
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('ticket-list')
+
+    def collect_pages(self, params):
+        seen, url, pages = [], self.url, 0
+        while url:
+            response = self.client.get(url, params if pages == 0 else None)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen.extend(t['jira_id'] for t in response.data['results'])
+            url, pages = response.data['next'], pages + 1
+        return seen, pages
+
+    def test_walks_every_ticket_once_in_keyset_order(self):
+        seen, pages = self.collect_pages({'page_size': 2})
+
+        expected = list(Ticket.objects.order_by('-updated_date', '-id').values_list('jira_id', flat=True))
+        self.assertEqual(seen, expected)
+        self.assertEqual(pages, 4)
+
+    def test_page_query_count_does_not_grow_with_depth(self):
+        first = self.client.get(self.url, {'page_size': 2, 'fields': 'jira_id'})
+        cursor_url = first.data['next']
+        for _ in range(2):
+            cursor_url = self.client.get(cursor_url).data['next']
+        with self.assertNumQueries(1):
+            self.client.get(cursor_url)
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get(self.url, {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_sparse_fieldset_trims_response(self):
+        response = self.client.get(self.url, {'fields': 'jira_id,title,status'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data['results'][0]), {'jira_id', 'title', 'status'})
+
+    def test_sparse_fieldset_skips_unrequested_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url, {'fields': 'jira_id,title'})
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('"description"', queries[0]['sql'])
+
+class QueryCountRegressionTests(APITestCase):
+    """
+    List endpoints must issue a constant number of queries, however many
+    projects, tickets, comments and comment authors there are.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='qc_user', password='pw')
+        self.client.force_authenticate(user=self.user)
+        self.seed_count = 0
+
+    def seed(self, projects, tickets_per_project, comments_per_ticket):
+        now = timezone.now()
+        for _ in range(projects):
+            self.seed_count += 1
+            project = Project.objects.create(name=f'QC {self.seed_count}', jira_key=f'QC{self.seed_count}')
+            for t in range(tickets_per_project):
+                ticket = Ticket.objects.create(
+                    project=project, jira_id=f'QC{self.seed_count}-{t}', title='t', status='Open',
+                    priority='High', created_date=now, updated_date=now,
+                )
+                for c in range(comments_per_ticket):
+                    # A distinct author per comment would expose a per-author query.
+                    author = User.objects.create_user(username=f'qc_{ticket.jira_id}_{c}')
+                    Comment.objects.create(ticket=ticket, author=author, body='c')
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(queries)
+
+    def assert_constant_queries(self, url, expected):
+        self.seed(1, 1, 1)
+        small = self.count_queries(url)
+        self.seed(3, 4, 3)
+        large = self.count_queries(url)
+        self.assertEqual(small, large, f"{url} grew from {small} to {large} queries")
+        self.assertEqual(large, expected)
+
+    def test_project_list(self):
+        # 2 validator aggregates; projects, tickets (comments aren't nested)
+        self.assert_constant_queries(reverse('project-list'), 4)
+
+    def test_ticket_list(self):
+        # tickets page only (comments aren't nested)
+        self.assert_constant_queries(reverse('ticket-list'), 1)
+
+    def test_ticket_comments(self):
+        self.seed(1, 1, 1)
+        url = reverse('ticket-comments', kwargs={'pk': 'QC1-0'})
+        small = self.count_queries(url)
+        Comment.objects.bulk_create(Comment(ticket_id=Ticket.objects.get(jira_id='QC1-0').pk, body='c') for _ in range(60))
+        # ticket lookup, comment page (+authors joined)
+        self.assertEqual((small, self.count_queries(url)), (2, 2))
+
+    def test_comment_list(self):
+        # comments (+authors joined)
+        self.assert_constant_queries(reverse('comment-list'), 1)
+
+    def test_ticket_detail(self):
+        self.seed(1, 1, 5)
+        ticket = Ticket.objects.get()
+        ticket.synced_at = timezone.now()
+        ticket.save()
+        # validators; ticket with comment count, latest comments (+authors joined)
+        self.assertEqual(self.count_queries(reverse('ticket-detail', kwargs={'pk': ticket.jira_id})), 3)
+
+class DashboardSummaryTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='dash_user', password='pw')
+        cls.project = Project.objects.create(name='Dash', jira_key='DSH')
+        cls.other_project = Project.objects.create(name='Other', jira_key='OTH')
+        base = timezone.now()
+        rows = [
+            ('Open', 'Highest', 'ann'), ('Open', 'High', 'bob'), ('Ongoing', 'High', 'ann'),
+            ('Done', 'Medium', 'bob'), ('Waiting', 'Low', 'ann'), ('Blocked', '', 'ann'),
+            ('Open', 'Weird', 'bob'),
+        ]
+        for i, (ticket_status, priority, assignee) in enumerate(rows):
+            Ticket.objects.create(
+                project=cls.project, jira_id=f'DSH-{i}', title=f'Dash {i}', status=ticket_status,
+                priority=priority, assignee=assignee,
+                created_date=base, updated_date=base - timedelta(minutes=i),
+            )
+        Ticket.objects.create(
+            project=cls.other_project, jira_id='OTH-1', title='Other', status='Open', priority='High',
+            created_date=base, updated_date=base,
+        )
+
+    def setUp(self):
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('dashboard-summary')
+
+    def test_counts_and_groups_in_constant_queries(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, {'project': 'DSH'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.data
+        self.assertEqual(data['total'], 7)
+        self.assertEqual(data['status_counts'], {'Open': 3, 'Ongoing': 1, 'Done': 1, 'Waiting': 1, 'Blocked': 1})
+        groups = data['priority_groups']
+        self.assertEqual({g: groups[g]['count'] for g in groups}, {'P1': 3, 'P2': 1, 'Other': 3})
+        self.assertEqual([t['jira_id'] for t in groups['P1']['tickets']], ['DSH-0', 'DSH-1', 'DSH-2'])
 
-5.  **`CommentAPITests(BaseAPITestCase)`:**
-    *   Covers GET (list, filtered by ticket) and POST (create) for comments.
-    *   Assumes comments are listed via `/api/comments/` and can be filtered using a query parameter (e.g., `/api/comments/?ticket=<ticket_pk>`).
-    *   Tests creation with valid data, missing body, and for a non-existent ticket.
+    def test_top_n_limits_tickets_not_counts(self):
+        response = self.client.get(self.url, {'project': 'DSH', 'top': 1})
 
-6.  **Mocking:**
-    *   `@patch('vibejira_django.jira_integration.views.get_jira_issue')` is used to mock the JIRA API interaction within the `TicketViewSet`'s `retrieve` method. This ensures tests are isolated and don't make real network calls.
+        p1 = response.data['priority_groups']['P1']
+        self.assertEqual(p1['count'], 3)
+        self.assertEqual([t['jira_id'] for t in p1['tickets']], ['DSH-0'])
 
-7.  **URL Reversing and Naming:**
-    *   Tests use `django.urls.reverse` with standard DRF `DefaultRouter` generated names (e.g., `project-list`, `ticket-detail`). Notes are included in the file's docstring about ensuring these names match the project's URL configuration.
+    def test_filters_by_project_pk_and_assignee(self):
+        response = self.client.get(self.url, {'project': self.project.pk, 'assignee': 'bob'})
 
-8.  **Test Execution Instructions:**
-    *   The file ends with a comprehensive comment block explaining how to run the tests using `python manage.py test jira_integration`, how to run specific tests, and notes on the test setup (mocking, URL naming, PK vs. `jira_id` usage in `TicketViewSet`).
+        self.assertEqual(response.data['total'], 3)
+        self.assertEqual(response.data['status_counts'], {'Open': 2, 'Done': 1})
 
-The testing environment is implicitly set up by Django's test runner when `manage.py test` is called. All necessary utilities like `APITestCase`, `APIClient`, and `unittest.mock.patch` are standard parts of Django REST Framework and Python, respectively, and should be available if the project dependencies are correctly installed.
+    def test_unfiltered_summary_covers_all_projects(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['total'], 8)
 
-This set of tests should provide good coverage for the specified API endpoints and their core functionalities.
+class TicketFilterAndSearchTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='filter_user', password='pw')
+        cls.alpha = Project.objects.create(name='Alpha', jira_key='ALP')
+        cls.beta = Project.objects.create(name='Beta', jira_key='BET')
+        rows = [
+            (cls.alpha, 'ALP-1', 'Login page crashes', 'Safari users see a blank screen', 'Open', 'High', 'ann', '2024-01-10T00:00:00Z'),
+            (cls.alpha, 'ALP-2', 'Slow dashboard', 'Aggregation takes seconds', 'Done', 'Medium', 'bob', '2024-02-10T00:00:00Z'),
+            (cls.beta, 'BET-1', 'Crash on export', None, 'Open', 'Low', 'ann', '2024-03-10T00:00:00Z'),
+            (cls.beta, 'BET-2', 'Typo in footer', 'Minor copy fix', 'Waiting', 'High', None, '2024-04-10T00:00:00Z'),
+        ]
+        for project, jira_id, title, description, ticket_status, priority, assignee, updated in rows:
+            Ticket.objects.create(
+                project=project, jira_id=jira_id, title=title, description=description, status=ticket_status,
+                priority=priority, assignee=assignee, created_date=updated, updated_date=updated,
+            )
+
+    def setUp(self):
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('ticket-list')
+
+    def jira_ids(self, params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        return sorted(t['jira_id'] for t in response.data['results'])
+
+    def test_exact_and_multi_value_filters(self):
+        self.assertEqual(self.jira_ids({'status': 'Open'}), ['ALP-1', 'BET-1'])
+        self.assertEqual(self.jira_ids({'priority': 'High,Medium'}), ['ALP-1', 'ALP-2', 'BET-2'])
+        self.assertEqual(self.jira_ids({'assignee': 'ann', 'status': 'Open'}), ['ALP-1', 'BET-1'])
+
+    def test_project_filter_accepts_keys_and_pks(self):
+        self.assertEqual(self.jira_ids({'project': 'BET'}), ['BET-1', 'BET-2'])
+        self.assertEqual(self.jira_ids({'project': str(self.alpha.pk)}), ['ALP-1', 'ALP-2'])
+        self.assertEqual(self.jira_ids({'project': f'{self.alpha.pk},BET'}), ['ALP-1', 'ALP-2', 'BET-1', 'BET-2'])
+
+    def test_updated_date_range(self):
+        params = {'updated_after': '2024-02-01T00:00:00Z', 'updated_before': '2024-04-10T00:00:00+00:00'}
+        self.assertEqual(self.jira_ids(params), ['ALP-2', 'BET-1'])
+
+    def test_invalid_date_is_a_bad_request(self):
+        response = self.client.get(self.url, {'updated_after': 'yesterday'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('updated_after', response.data)
+
+    def test_full_text_search_over_title_and_description(self):
+        self.assertEqual(self.jira_ids({'search': 'export'}), ['BET-1'])
+        # The last word also matches as a prefix ("crash" -> "crashes").
+        self.assertEqual(self.jira_ids({'search': 'crash'}), ['ALP-1', 'BET-1'])
+        self.assertEqual(self.jira_ids({'search': 'crash on'}), ['BET-1'])
+        self.assertEqual(self.jira_ids({'search': 'safari blank'}), ['ALP-1'])
+        self.assertEqual(self.jira_ids({'search': 'aggregation', 'project': 'BET'}), [])
+
+    def test_search_index_follows_updates_and_deletes(self):
+        ticket = Ticket.objects.get(jira_id='BET-2')
+        ticket.title = 'Footer renders upside down'
+        ticket.save()
+        self.assertEqual(self.jira_ids({'search': 'upside'}), ['BET-2'])
+        self.assertEqual(self.jira_ids({'search': 'typo'}), [])
+
+        ticket.delete()
+        self.assertEqual(self.jira_ids({'search': 'upside'}), [])
+
+    def test_search_operators_are_treated_as_words(self):
+        self.assertEqual(self.jira_ids({'search': 'crash -"export'}), ['BET-1'])
+        self.assertEqual(fts5_match_expression('NEAR(a b)'), '"NEAR" "a" "b"*')
+        self.assertIsNone(fts5_match_expression('!!!'))
+
+class ConditionalGetTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='etag_user', password='pw')
+        self.client.force_authenticate(user=self.user)
+        self.project = Project.objects.create(name='ETag', jira_key='ETG')
+        now = timezone.now()
+        self.tickets = [
+            Ticket.objects.create(
+                project=self.project, jira_id=f'ETG-{i}', title=f'ETag {i}', status='Open', priority='High',
+                created_date=now, updated_date=now - timedelta(minutes=i), synced_at=now,
+            )
+            for i in range(3)
+        ]
+        self.detail_url = reverse('ticket-detail', kwargs={'pk': 'ETG-0'})
+        self.list_url = reverse('ticket-list')
+
+    def assert_not_modified(self, url, etag, queries=None):
+        if queries is None:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        else:
+            with self.assertNumQueries(queries):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(response.content, b'')
+
+    def test_detail_revalidates_without_serializing(self):
+        response = self.client.get(self.detail_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['ETag'].startswith('"'))
+        self.assertIn('Last-Modified', response)
+        self.assertIn('no-cache', response['Cache-Control'])
+        # Only the validator query runs; no ticket or comment load.
+        self.assert_not_modified(self.detail_url, response['ETag'], queries=1)
+        response = self.client.get(self.detail_url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_detail_etag_follows_ticket_and_comment_changes(self):
+        etag = self.client.get(self.detail_url)['ETag']
+        Comment.objects.create(ticket=self.tickets[0], author=self.user, body='new')
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['comments']), 1)
+
+        etag = response['ETag']
+        self.tickets[0].status = 'Done'
+        self.tickets[0].save()
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['status'], 'Done')
+
+    def test_list_revalidates_per_page(self):
+        etag = self.client.get(self.list_url)['ETag']
+        # The page query only.
+        self.assert_not_modified(self.list_url, etag, queries=1)
+        # Different fieldsets or pages are different representations.
+        self.assertNotEqual(self.client.get(self.list_url, {'fields': 'jira_id'})['ETag'], etag)
+        self.assertNotEqual(self.client.get(self.list_url, {'page_size': 1})['ETag'], etag)
+
+        self.tickets[2].delete()
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_list_etag_ignores_changes_outside_the_page(self):
+        url = f'{self.list_url}?page_size=1'
+        etag = self.client.get(url)['ETag']
+        self.tickets[2].title = 'Elsewhere'
+        self.tickets[2].save()
+        self.assert_not_modified(url, etag)
+        self.tickets[0].title = 'Here'
+        self.tickets[0].save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+    def test_project_detail_follows_nested_changes(self):
+        url = reverse('project-detail', kwargs={'pk': self.project.pk})
+        etag = self.client.get(url)['ETag']
+        self.assert_not_modified(url, etag, queries=2)
+        self.tickets[1].title = 'Nested change'
+        self.tickets[1].save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+    def test_bulk_sync_bumps_modified_at(self):
+        before = Ticket.objects.get(jira_id='ETG-1').modified_at
+        store_jira_issues([make_jira_issue('ETG-1', project_key='ETG', summary='Synced')])
+        self.assertGreater(Ticket.objects.get(jira_id='ETG-1').modified_at, before)
+
+    def test_refresh_without_changes_keeps_validators(self):
+        store_jira_issues([make_jira_issue('ETG-0', project_key='ETG')])
+        ticket = Ticket.objects.get(jira_id='ETG-0')
+        response = self.client.get(self.detail_url)
+
+        store_jira_issues([make_jira_issue('ETG-0', project_key='ETG')])
+
+        self.assertEqual(Ticket.objects.get(jira_id='ETG-0').modified_at, ticket.modified_at)
+        self.assert_not_modified(self.detail_url, response['ETag'])
+
+    def test_resync_of_unchanged_issue_keeps_body_matching_etag(self):
+        store_jira_issues([make_jira_issue('ETG-0', project_key='ETG')])
+        synced_at = Ticket.objects.get(jira_id='ETG-0').synced_at
+        first = self.client.get(self.detail_url)
+
+        with patch('django.utils.timezone.now', return_value=timezone.now() + timedelta(seconds=1)):
+            store_jira_issues([make_jira_issue('ETG-0', project_key='ETG')])
+        self.assertGreater(Ticket.objects.get(jira_id='ETG-0').synced_at, synced_at)
+
+        # The ETag is unchanged, so the body must be too.
+        with override_settings(RESPONSE_CACHE_BACKEND=None):
+            second = self.client.get(self.detail_url)
+        self.assertEqual(second['ETag'], first['ETag'])
+        self.assertEqual(second.json(), first.json())
+        self.assertNotIn('synced_at', second.json())
+
+@override_settings(JOBS_EAGER=True)
+@patch.dict(os.environ, {'JIRA_WEBHOOK_SECRET': 'hook-secret'})
+class JiraWebhookTests(APITestCase):
+    def setUp(self):
+        self.url = reverse('jira-webhook')
+        self.deliveries = 0
+
+    def deliver(self, payload, delivery_id=None, signed=True):
+        self.deliveries += 1
+        body = json.dumps(payload).encode()
+        headers = {'HTTP_X_ATLASSIAN_WEBHOOK_IDENTIFIER': delivery_id or f'delivery-{self.deliveries}'}
+        if signed:
+            digest = hmac.new(b'hook-secret', body, hashlib.sha256).hexdigest()
+            headers['HTTP_X_HUB_SIGNATURE'] = f'sha256={digest}'
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(self.url, body, content_type='application/json', **headers)
+
+    def issue_event(self, event, key, updated, **fields):
+        return {
+            'webhookEvent': event, 'timestamp': 1709287200000,
+            'issue': make_jira_issue(key, project_key='HOOK', updated=updated, **fields),
+        }
+
+    def comment_event(self, event, comment_id, updated, body='Looks good'):
+        return {
+            'webhookEvent': event, 'timestamp': 1709287200000,
+            'issue': {'key': 'HOOK-1', 'fields': {'summary': 'Hooked'}},
+            'comment': {
+                'id': comment_id, 'body': body, 'author': {'displayName': 'Jira Person'},
+                'created': '2024-03-01T09:00:00.000+0000', 'updated': updated,
+            },
+        }
+
+    def test_rejects_unsigned_and_badly_signed_deliveries(self):
+        payload = self.issue_event('jira:issue_created', 'HOOK-1', '2024-03-01T10:00:00.000+0000')
+        self.assertEqual(self.deliver(payload, signed=False).status_code, status.HTTP_403_FORBIDDEN)
+        response = self.client.post(
+            self.url, json.dumps(payload), content_type='application/json', HTTP_X_HUB_SIGNATURE='sha256=bad',
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        response = self.client.post(f'{self.url}?secret=hook-secret', json.dumps(payload), content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+
+    def test_issue_events_upsert_and_duplicates_are_dropped(self):
+        payload = self.issue_event('jira:issue_created', 'HOOK-1', '2024-03-01T10:00:00.000+0000')
+        self.assertEqual(self.deliver(payload, 'same').status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(self.deliver(payload, 'same').data, {'status': 'duplicate'})
+        self.assertEqual(WebhookEvent.objects.get().status, WebhookEvent.STATUS_APPLIED)
+
+        self.deliver(self.issue_event('jira:issue_updated', 'HOOK-1', '2024-03-01T11:00:00.000+0000', status={'name': 'Done'}))
+        ticket = Ticket.objects.get(jira_id='HOOK-1')
+        self.assertEqual(ticket.status, 'Done')
+        self.assertEqual(ticket.project.jira_key, 'HOOK')
+
+    def test_out_of_order_updates_keep_the_newest(self):
+        self.deliver(self.issue_event('jira:issue_updated', 'HOOK-1', '2024-03-01T12:00:00.000+0000', status={'name': 'Done'}))
+        self.deliver(self.issue_event('jira:issue_updated', 'HOOK-1', '2024-03-01T11:00:00.000+0000', status={'name': 'Open'}))
+        self.assertEqual(Ticket.objects.get(jira_id='HOOK-1').status, 'Done')
+        self.assertEqual(WebhookEvent.objects.order_by('pk').last().status, WebhookEvent.STATUS_SKIPPED)
+
+    def test_late_update_does_not_resurrect_deleted_issue(self):
+        self.deliver(self.issue_event('jira:issue_created', 'HOOK-1', '2024-03-01T10:00:00.000+0000'))
+        self.deliver(self.issue_event('jira:issue_deleted', 'HOOK-1', '2024-03-01T12:00:00.000+0000'))
+        self.assertFalse(Ticket.objects.filter(jira_id='HOOK-1').exists())
+        self.deliver(self.issue_event('jira:issue_updated', 'HOOK-1', '2024-03-01T11:00:00.000+0000'))
+        self.assertFalse(Ticket.objects.filter(jira_id='HOOK-1').exists())
+
+    def test_comment_events(self):
+        self.deliver(self.issue_event('jira:issue_created', 'HOOK-1', '2024-03-01T10:00:00.000+0000'))
+        self.deliver(self.comment_event('comment_created', '10001', '2024-03-01T10:00:00.000+0000'))
+        self.deliver(self.comment_event('comment_updated', '10001', '2024-03-01T12:00:00.000+0000', body='Edited'))
+        self.deliver(self.comment_event('comment_updated', '10001', '2024-03-01T11:00:00.000+0000', body='Older'))
+        comment = Comment.objects.get(jira_id='10001')
+        self.assertEqual((comment.body, comment.author, comment.author_display_name), ('Edited', None, 'Jira Person'))
+
+        self.deliver(self.comment_event('comment_deleted', '10001', '2024-03-01T13:00:00.000+0000'))
+        self.assertFalse(Comment.objects.exists())
+
+    @override_settings(JOBS_EAGER=False, JOB_EMBEDDED_WORKERS=0)
+    def test_applying_is_queued_not_inline(self):
+        response = self.deliver(self.issue_event('jira:issue_created', 'HOOK-1', '2024-03-01T10:00:00.000+0000'))
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertFalse(Ticket.objects.exists())
+        job = Job.objects.get()
+        self.assertEqual((job.task, job.args), (process_event.task_name, [WebhookEvent.objects.get().pk]))
+
+        self.assertEqual(run_pending(), 1)
+        self.assertTrue(Ticket.objects.filter(jira_id='HOOK-1').exists())
+
+job_calls = []
+
+
+@task
+def record_call(name):
+    job_calls.append(name)
+    return name.upper()
+
+
+@task
+def fail_until(name, successes_after):
+    job_calls.append(name)
+    if len(job_calls) <= successes_after:
+        raise RuntimeError(f'{name} failed')
+    return 'ok'
+
+
+@task
+def fail_permanently():
+    raise PermanentJobError('bad input')
+
+
+@override_settings(JOBS_EAGER=False, JOB_EMBEDDED_WORKERS=0, JOB_BACKOFF_BASE=0)
+class JobQueueTests(TestCase):
+    def setUp(self):
+        job_calls.clear()
+
+    def test_higher_priority_runs_first(self):
+        enqueue(record_call, 'low', priority=Job.PRIORITY_LOW)
+        enqueue(record_call, 'normal')
+        enqueue(record_call, 'high', priority=Job.PRIORITY_HIGH)
+        self.assertEqual(run_pending(), 3)
+        self.assertEqual(job_calls, ['high', 'normal', 'low'])
+
+    def test_wait_returns_result_or_times_out(self):
+        job, _ = enqueue(record_call, 'x')
+        with self.assertRaises(TimeoutError):
+            wait(job, timeout=0.02)
+        run_pending()
+        self.assertEqual(wait(job, timeout=1), 'X')
+
+    def test_failures_are_retried_with_backoff(self):
+        job, _ = enqueue(fail_until, 'flaky', 2)
+        run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.result), (Job.STATUS_DONE, 3, 'ok'))
+        self.assertIn('flaky failed', job.last_error)
+
+    def test_exhausted_and_permanent_failures_are_dead_lettered(self):
+        exhausted, _ = enqueue(fail_until, 'doomed', 99, max_attempts=2)
+        permanent, _ = enqueue(fail_permanently)
+        run_pending()
+
+        dead = {d.job_id: d for d in DeadLetterJob.objects.all()}
+        self.assertEqual(dead[exhausted.pk].attempts, 2)
+        self.assertEqual(dead[permanent.pk].attempts, 1)
+        self.assertIn('bad input', dead[permanent.pk].error)
+        with self.assertRaises(JobFailed):
+            wait(permanent, timeout=1)
+
+    def test_dedupe_key_reuses_active_job(self):
+        job, created = enqueue(record_call, 'a', dedupe_key='same')
+        self.assertEqual(enqueue(record_call, 'b', dedupe_key='same'), (job, False))
+        run_pending()
+        self.assertEqual(job_calls, ['a'])
+        self.assertTrue(enqueue(record_call, 'c', dedupe_key='same')[1])
+
+    def test_orphaned_running_jobs_are_requeued(self):
+        job, _ = enqueue(record_call, 'orphan')
+        Job.objects.filter(pk=job.pk).update(status=Job.STATUS_RUNNING, locked_at=timezone.now() - timedelta(days=1))
+        self.assertEqual(recover_stale_jobs(), 1)
+        self.assertEqual(run_pending(), 1)
+
+    @override_settings(JOBS_EAGER=True)
+    def test_eager_mode_runs_on_enqueue(self):
+        job, _ = enqueue(record_call, 'now')
+        self.assertEqual(wait(job, timeout=0), 'NOW')
+
+class IssueMapperTests(TestCase):
+    def test_parses_jira_timestamps(self):
+        parsed = parse_jira_datetime('2024-03-01T10:00:00.000+0530')
+        self.assertEqual(parsed.isoformat(), '2024-03-01T10:00:00+05:30')
+        self.assertEqual(parse_jira_datetime('2024-03-01T10:00:00Z').utcoffset(), timedelta(0))
+        self.assertTrue(timezone.is_aware(parse_jira_datetime('2024-03-01T10:00:00')))
+        self.assertIsNone(parse_jira_datetime('not a date'))
+        self.assertIsNone(parse_jira_datetime(None))
+
+    def test_batch_resolves_projects_once(self):
+        Project.objects.create(name='Existing', jira_key='OLD')
+        issues = [
+            make_jira_issue('OLD-1', project_key='OLD'),
+            make_jira_issue('NEW-1', project_key='NEW'),
+            make_jira_issue('NEW-2', project_key='NEW'),
+            {'key': 'ORPHAN-1', 'fields': {'summary': 'No project'}},
+        ]
+        mapper = IssueMapper()
+        # Lookup, insert of the missing project, reload.
+        with self.assertNumQueries(3):
+            tickets = mapper.to_tickets(issues)
+        with self.assertNumQueries(0):
+            mapper.to_tickets(issues)
+
+        self.assertEqual([t.jira_id for t in tickets], ['OLD-1', 'NEW-1', 'NEW-2'])
+        self.assertEqual(tickets[1].project.name, 'Sync Project')
+        self.assertEqual(tickets[0].updated_date.isoformat(), '2024-03-01T10:00:00+00:00')
+
+    def test_rows_follow_row_fields(self):
+        issue = make_jira_issue('ROW-1', project_key='ROW', duedate='2024-04-01', assignee={'displayName': 'Ann'})
+        with self.assertNumQueries(0):
+            row = dict(zip(ROW_FIELDS, IssueMapper().to_rows([issue])[0]))
+        self.assertEqual(row['jira_id'], 'ROW-1')
+        self.assertEqual(row['project_key'], 'ROW')
+        self.assertEqual((row['status'], row['assignee'], str(row['due_date'])), ('Open', 'Ann', '2024-04-01'))
+
+ADF_DESCRIPTION = {
+    'type': 'doc', 'version': 1,
+    'content': [
+        {'type': 'heading', 'attrs': {'level': 2}, 'content': [{'type': 'text', 'text': 'Steps'}]},
+        {'type': 'paragraph', 'content': [
+            {'type': 'text', 'text': 'Open the '},
+            {'type': 'text', 'text': 'settings', 'marks': [{'type': 'strong'}]},
+            {'type': 'text', 'text': ' page <now>', 'marks': [{'type': 'link', 'attrs': {'href': 'javascript:alert(1)'}}]},
+        ]},
+        {'type': 'bulletList', 'content': [
+            {'type': 'listItem', 'content': [{'type': 'paragraph', 'content': [{'type': 'text', 'text': 'kaleidoscope'}]}]},
+        ]},
+    ],
+}
+
+
+class DescriptionRenderingTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='adf_user', password='pw')
+        self.client.force_authenticate(user=self.user)
+
+    def test_renders_adf_to_text_and_html(self):
+        rendered = render_description(ADF_DESCRIPTION)
+        self.assertEqual(rendered.text, 'Steps\n\nOpen the settings page <now>\n\n- kaleidoscope')
+        self.assertEqual(
+            rendered.html,
+            '<h2>Steps</h2><p>Open the <strong>settings</strong> page &lt;now&gt;</p>'
+            '<ul><li><p>kaleidoscope</p></li></ul>',
+        )
+        # Key order doesn't change the hash.
+        reordered = json.loads(json.dumps(ADF_DESCRIPTION), object_pairs_hook=lambda pairs: dict(reversed(pairs)))
+        self.assertEqual(render_description(reordered).hash, rendered.hash)
+        self.assertEqual(render_description('a\nb').html, '<p>a<br>b</p>')
+
+    def test_ingest_renders_once_per_hash(self):
+        store_jira_issues([make_jira_issue('ADF-1', description=ADF_DESCRIPTION)])
+        ticket = Ticket.objects.get(jira_id='ADF-1')
+        self.assertTrue(ticket.description.endswith('- kaleidoscope'))
+        self.assertIn('<strong>settings</strong>', ticket.description_html)
+        self.assertEqual(ticket.description_adf, ADF_DESCRIPTION)
+
+        with patch('jira_integration.mapper.render_description', wraps=render_description) as render:
+            store_jira_issues([make_jira_issue('ADF-1', summary='Renamed', description=ADF_DESCRIPTION)])
+            render.assert_not_called()
+            store_jira_issues([make_jira_issue('ADF-1', description='Now plain text')])
+            render.assert_called_once_with('Now plain text')
+        ticket.refresh_from_db()
+        self.assertEqual((ticket.description, ticket.description_html), ('Now plain text', '<p>Now plain text</p>'))
+
+    def test_search_and_list_use_plaintext(self):
+        store_jira_issues([make_jira_issue('ADF-2', description=ADF_DESCRIPTION)])
+        response = self.client.get(reverse('ticket-list'), {'search': 'kaleidoscope'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        [row] = response.data['results']
+        self.assertIn('kaleidoscope', row['description'])
+        self.assertNotIn('description_html', row)
+        self.assertNotIn('description_adf', row)
+
+        detail = self.client.get(reverse('ticket-detail', args=['ADF-2'])).data
+        self.assertIn('<ul>', detail['description_html'])
+
+    def test_ingest_bookkeeping_is_not_exposed(self):
+        store_jira_issues([make_jira_issue('ADF-4', description=ADF_DESCRIPTION)])
+        private = {'description_adf', 'description_hash', 'comment_sync_offset', 'comment_sync_last_id'}
+        detail = self.client.get(reverse('ticket-detail', args=['ADF-4'])).data
+        self.assertFalse(private & set(detail))
+        [row] = self.client.get(reverse('ticket-list'), {'fields': ','.join(private | {'jira_id'})}).data['results']
+        self.assertEqual(set(row), {'jira_id'})
+
+    def test_local_edit_renders_plain_description(self):
+        store_jira_issues([make_jira_issue('ADF-3', description=ADF_DESCRIPTION)])
+        ticket = Ticket.objects.get(jira_id='ADF-3')
+        response = self.client.patch(reverse('ticket-detail', args=[ticket.pk]), {'description': 'Edited <b>'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        ticket.refresh_from_db()
+        self.assertEqual(ticket.description_html, '<p>Edited &lt;b&gt;</p>')
+        self.assertIsNone(ticket.description_adf)
+
+def make_jira_comment(comment_id, body='A comment', created='2024-03-01T09:00:00.000+0000', updated=None):
+    return {
+        'id': str(comment_id), 'body': body, 'author': {'displayName': 'JIRA User'},
+        'created': created, 'updated': updated or created,
+    }
+
+
+class CommentSyncTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='comment_sync_user', password='pw')
+        self.client.force_authenticate(user=self.user)
+        project = Project.objects.create(name='Sync Project', jira_key='SYN')
+        self.ticket = Ticket.objects.create(
+            project=project, jira_id='SYN-1', title='Busy ticket', status='Open', priority='High',
+            created_date=timezone.now(), updated_date=timezone.now(),
+        )
+
+    def _pages(self, comments, start_at=0, page_size=100):
+        return [
+            {'startAt': start, 'total': len(comments), 'comments': comments[start:start + page_size]}
+            for start in range(start_at, max(len(comments), start_at + 1), page_size)
+        ]
+
+    @patch('jira_integration.sync.get_jira_comments')
+    def test_pages_and_bulk_inserts_comments(self, mock_comments):
+        comments = [make_jira_comment(1000 + i) for i in range(250)]
+        mock_comments.side_effect = self._pages(comments)
+
+        stats = sync_ticket_comments(self.ticket)
+
+        self.assertEqual(stats, {'fetched': 250, 'created': 250, 'updated': 0})
+        self.assertEqual([c.kwargs['start_at'] for c in mock_comments.call_args_list], [0, 100, 200])
+        self.ticket.refresh_from_db()
+        self.assertEqual((self.ticket.comment_sync_offset, self.ticket.comment_sync_last_id), (250, '1249'))
+        self.assertEqual(self.ticket.comments.filter(author_name='JIRA User').count(), 250)
+
+    @patch('jira_integration.sync.get_jira_comments')
+    def test_resumes_after_last_seen_comment(self, mock_comments):
+        comments = [make_jira_comment(1), make_jira_comment(2), make_jira_comment(3)]
+        mock_comments.side_effect = self._pages(comments)
+        sync_ticket_comments(self.ticket)
+
+        comments += [make_jira_comment(4), make_jira_comment(5, updated='2024-03-02T09:00:00.000+0000')]
+        mock_comments.reset_mock()
+        mock_comments.side_effect = self._pages(comments, start_at=2)
+        stats = sync_ticket_comments(self.ticket)
+
+        mock_comments.assert_called_once_with('SYN-1', start_at=2, max_results=100)
+        self.assertEqual(stats, {'fetched': 3, 'created': 2, 'updated': 0})
+        self.assertEqual(self.ticket.comments.count(), 5)
+
+    @patch('jira_integration.sync.get_jira_comments')
+    def test_restarts_when_comments_were_deleted(self, mock_comments):
+        comments = [make_jira_comment(1), make_jira_comment(2), make_jira_comment(3)]
+        mock_comments.side_effect = self._pages(comments)
+        sync_ticket_comments(self.ticket)
+
+        # Comment 2 was deleted and 4 added: the old offset now lands on 4.
+        comments = [comments[0], comments[2], make_jira_comment(4, body='Edited later')]
+        mock_comments.reset_mock()
+        mock_comments.side_effect = self._pages(comments, start_at=2) + self._pages(comments)
+        stats = sync_ticket_comments(self.ticket)
+
+        self.assertEqual([c.kwargs['start_at'] for c in mock_comments.call_args_list], [2, 0])
+        self.assertEqual(stats['created'], 1)
+        self.ticket.refresh_from_db()
+        self.assertEqual((self.ticket.comment_sync_offset, self.ticket.comment_sync_last_id), (3, '4'))
+
+    @patch('jira_integration.sync.get_jira_comments')
+    def test_only_newer_edits_overwrite(self, mock_comments):
+        mock_comments.side_effect = self._pages([make_jira_comment(1, updated='2024-03-02T00:00:00.000+0000')])
+        sync_ticket_comments(self.ticket)
+        mock_comments.side_effect = self._pages([
+            make_jira_comment(1, body='Older copy', updated='2024-03-01T12:00:00.000+0000'),
+        ]) + self._pages([make_jira_comment(1, body='Edited', updated='2024-03-03T00:00:00.000+0000')])
+
+        sync_ticket_comments(self.ticket, full=True)
+        self.assertEqual(Comment.objects.get(jira_id='1').body, 'A comment')
+        self.assertEqual(sync_ticket_comments(self.ticket, full=True)['updated'], 1)
+        self.assertEqual(Comment.objects.get(jira_id='1').body, 'Edited')
+
+    @patch('jira_integration.sync.search_jira_issues')
+    def test_project_sync_queues_comment_syncs(self, mock_search):
+        mock_search.return_value = {'startAt': 0, 'total': 2, 'issues': [make_jira_issue('SYN-1'), make_jira_issue('SYN-2')]}
+        sync_project(self.ticket.project)
+        self.assertFalse(Job.objects.exists())
+
+        sync_project(self.ticket.project, comments=True)
+        sync_project(self.ticket.project, comments=True)
+        self.assertEqual(
+            sorted(Job.objects.filter(task=sync_comments_job.task_name).values_list('args', flat=True)),
+            [['SYN-1'], ['SYN-2']],
+        )
+
+    @override_settings(JOBS_EAGER=True)
+    @patch('jira_integration.sync.get_jira_client', return_value=MagicMock())
+    @patch('jira_integration.sync.add_jira_comment')
+    def test_local_comments_are_pushed_to_jira(self, mock_add, _client):
+        mock_add.return_value = {'id': '777', 'updated': '2024-03-05T10:00:00.000+0000'}
+        # JIRA's copy arrived first, e.g. through a webhook.
+        Comment.objects.create(ticket=self.ticket, jira_id='777', author_name='JIRA User', body='Hello')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('comment-list'), {'ticket': self.ticket.pk, 'body': 'Hello'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        mock_add.assert_called_once_with('SYN-1', 'Hello')
+        comment = Comment.objects.get(jira_id='777')
+        self.assertEqual((comment.pk, comment.author), (response.data['id'], self.user))
+
+@override_settings(TICKET_DETAIL_COMMENTS=3)
+class TicketCommentsEndpointTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='thread_user', password='pw')
+        self.client.force_authenticate(user=self.user)
+        project = Project.objects.create(name='Thread', jira_key='THR')
+        now = timezone.now()
+        self.ticket = Ticket.objects.create(
+            project=project, jira_id='THR-1', title='Long thread', status='Open', priority='High',
+            created_date=now, updated_date=now, synced_at=now,
+        )
+        Comment.objects.bulk_create(
+            Comment(ticket=self.ticket, author_name='JIRA User', body=f'Comment {i}', created_date=now + timedelta(seconds=i))
+            for i in range(7)
+        )
+        self.url = reverse('ticket-comments', kwargs={'pk': 'THR-1'})
+
+    def test_pages_comments_oldest_first(self):
+        bodies = []
+        url, params = self.url, {'page_size': 3}
+        while url:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            bodies += [comment['body'] for comment in response.data['results']]
+            url, params = response.data['next'], None
+        self.assertEqual(bodies, [f'Comment {i}' for i in range(7)])
+        # The database PK addresses the same thread.
+        by_pk = self.client.get(reverse('ticket-comments', kwargs={'pk': self.ticket.pk}))
+        self.assertEqual(len(by_pk.data['results']), 7)
+        self.assertEqual(self.client.get(reverse('ticket-comments', kwargs={'pk': 'NOPE-1'})).status_code, 404)
+
+    def test_detail_embeds_count_and_latest_comments_only(self):
+        response = self.client.get(reverse('ticket-detail', kwargs={'pk': 'THR-1'}))
+        self.assertEqual(response.data['comment_count'], 7)
+        self.assertEqual([c['body'] for c in response.data['comments']], ['Comment 4', 'Comment 5', 'Comment 6'])
+
+        listed = self.client.get(reverse('ticket-list')).data['results'][0]
+        self.assertNotIn('comments', listed)
+        batch = self.client.post(reverse('ticket-batch-retrieve'), {'keys': ['THR-1']}, format='json')
+        self.assertEqual(len(batch.data['tickets'][0]['comments']), 3)
+
+    @patch('jira_integration.views.schedule_comment_push')
+    def test_post_adds_comment_and_queues_push(self, mock_push):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, {'body': 'Nested reply'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        comment = Comment.objects.get(pk=response.data['id'])
+        self.assertEqual((comment.ticket, comment.author, response.data['author']), (self.ticket, self.user, 'thread_user'))
+        mock_push.assert_called_once_with(comment.pk)
+
+class FakeJira:
+    """In-memory JIRA issues for the outbox's JIRA calls."""
+
+    def __init__(self, **issues):
+        self.issues = issues
+        self.transitions = {'Open': [{'id': '21', 'name': 'Start', 'to': {'name': 'In Progress'}},
+                                     {'id': '31', 'name': 'Close', 'to': {'name': 'Done'}}]}
+        self.calls = []
+
+    def touch(self, key, **fields):
+        self.issues[key].update(fields, updated='2024-03-02T10:00:00.000+0000')
+
+    def get_issue(self, key, fields=None):
+        self.calls.append(('get', key))
+        return make_jira_issue(key, **self.issues[key])
+
+    def get_transitions(self, key):
+        self.calls.append(('transitions', key))
+        return {'transitions': self.transitions.get(self.issues[key]['status']['name'], [])}
+
+    def transition(self, key, transition_id):
+        self.calls.append(('transition', key, transition_id))
+        target = next(t['to']['name'] for ts in self.transitions.values() for t in ts if t['id'] == transition_id)
+        self.touch(key, status={'name': target})
+        return {}
+
+    def update(self, key, fields):
+        self.calls.append(('update', key, fields))
+        self.touch(key, **{
+            'priority': fields.get('priority', self.issues[key].get('priority')),
+            'assignee': {'displayName': 'Ann Lee'} if fields.get('assignee', {}).get('accountId') else None,
+        })
+        return {}
+
+    def find_users(self, query):
+        self.calls.append(('users', query))
+        return [{'accountId': 'acc-ann', 'displayName': 'Ann Lee'}]
+
+    def patch(self, test):
+        for name, fake in [('get_jira_issue', self.get_issue), ('get_jira_transitions', self.get_transitions),
+                           ('transition_jira_issue', self.transition), ('update_jira_issue', self.update),
+                           ('find_jira_users', self.find_users)]:
+            patcher = patch(f'jira_integration.outbox.{name}', side_effect=fake)
+            patcher.start()
+            test.addCleanup(patcher.stop)
+
+
+@override_settings(JOBS_EAGER=False, JOB_EMBEDDED_WORKERS=0, OUTBOX_FLUSH_DELAY=0)
+class OutboxTests(APITestCase):
+    def setUp(self):
+        outbox._transitions.clear()
+        outbox._account_ids.clear()
+        self.user = User.objects.create_user(username='outbox_user', password='pw')
+        self.client.force_authenticate(user=self.user)
+        self.project = Project.objects.create(name='Sync Project', jira_key='SYN')
+        self.jira = FakeJira()
+        self.jira.patch(self)
+        self.tickets = {key: self._ticket(key) for key in ('SYN-1', 'SYN-2')}
+
+    def _ticket(self, key):
+        self.jira.issues[key] = {'status': {'name': 'Open'}, 'priority': {'name': 'Medium'}}
+        return Ticket.objects.create(
+            project=self.project, jira_id=key, title=key, status='Open', priority='Medium',
+            created_date=parse_jira_datetime('2024-03-01T09:00:00.000+0000'),
+            updated_date=parse_jira_datetime('2024-03-01T10:00:00.000+0000'), synced_at=timezone.now(),
+        )
+
+    def _edit(self, key, **data):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(reverse('ticket-detail', args=[self.tickets[key].pk]), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+
+    def test_edits_to_a_ticket_coalesce_into_one_entry(self):
+        self._edit('SYN-1', status='In Progress')
+        self._edit('SYN-1', status='Done', priority='High')
+        self._edit('SYN-1', priority='Medium')
+
+        entry = OutboxEntry.objects.get()
+        self.assertEqual((entry.changes, entry.original), ({'status': 'Done'}, {'status': 'Open', 'priority': 'Medium'}))
+        self.assertEqual(Job.objects.filter(task=flush_outbox.task_name).count(), 1)
+
+        # Editing back to JIRA's value leaves nothing to push.
+        self._edit('SYN-1', status='Open')
+        self.assertFalse(OutboxEntry.objects.exists())
+        # Local-only tickets aren't pushed at all.
+        Ticket.objects.filter(jira_id='SYN-2').update(synced_at=None)
+        self.tickets['SYN-2'].refresh_from_db()
+        self._edit('SYN-2', status='Done')
+        self.assertFalse(OutboxEntry.objects.exists())
+
+    def test_flush_pushes_entries_with_cached_lookups(self):
+        self._edit('SYN-1', status='Done', assignee='Ann Lee')
+        self._edit('SYN-2', status='Done', priority='High')
+
+        self.assertEqual(flush_outbox(), {'applied': 2, 'conflict': 0, 'retry': 0, 'failed': 0})
+
+        self.assertFalse(OutboxEntry.objects.exists())
+        self.assertEqual([c for c in self.jira.calls if c[0] == 'transitions'], [('transitions', 'SYN-1')])
+        self.assertIn(('transition', 'SYN-2', '31'), self.jira.calls)
+        self.assertIn(('update', 'SYN-1', {'assignee': {'accountId': 'acc-ann'}}), self.jira.calls)
+        self.assertIn(('update', 'SYN-2', {'priority': {'name': 'High'}}), self.jira.calls)
+        # JIRA's copy, with its new `updated`, is stored back.
+        ticket = Ticket.objects.get(jira_id='SYN-2')
+        self.assertEqual((ticket.status, ticket.priority), ('Done', 'High'))
+        self.assertEqual(ticket.updated_date, parse_jira_datetime('2024-03-02T10:00:00.000+0000'))
+
+    def test_field_changed_in_jira_meanwhile_is_a_conflict(self):
+        self._edit('SYN-1', status='Done')
+        self._edit('SYN-2', status='Done')
+        self.jira.touch('SYN-1', status={'name': 'In Progress'})
+        # A change to another field isn't a conflict.
+        self.jira.touch('SYN-2', priority={'name': 'Low'})
+
+        self.assertEqual(flush_outbox(), {'applied': 1, 'conflict': 1, 'retry': 0, 'failed': 0})
+
+        entry = OutboxEntry.objects.get()
+        self.assertEqual((entry.ticket.jira_id, entry.status), ('SYN-1', OutboxEntry.STATUS_CONFLICT))
+        self.assertIn("JIRA has 'In Progress'", entry.last_error)
+        self.assertEqual(self.jira.issues['SYN-1']['status'], {'name': 'In Progress'})
+        self.assertEqual(Ticket.objects.get(jira_id='SYN-2').priority, 'Low')
+
+    def test_ingest_keeps_edits_waiting_to_be_pushed(self):
+        self._edit('SYN-1', status='Done')
+        self._edit('SYN-2', priority='High')
+        OutboxEntry.objects.filter(ticket__jira_id='SYN-2').update(status=OutboxEntry.STATUS_SENDING)
+        self.jira.touch('SYN-1', summary='Renamed in JIRA')
+
+        # A stale-read refresh and a webhook both carry JIRA's old values.
+        store_jira_issues([self.jira.get_issue('SYN-1'), self.jira.get_issue('SYN-2')])
+        apply_issue(make_jira_issue('SYN-1', **dict(self.jira.issues['SYN-1'], updated='2024-03-03T10:00:00.000+0000')))
+
+        ticket = Ticket.objects.get(jira_id='SYN-1')
+        self.assertEqual((ticket.status, ticket.title), ('Done', 'Renamed in JIRA'))
+        self.assertEqual(Ticket.objects.get(jira_id='SYN-2').priority, 'High')
+
+    def test_claimed_entries_are_not_recovered_as_stale(self):
+        self._edit('SYN-1', status='Done')
+        # Edited long before the flush claims it.
+        OutboxEntry.objects.update(modified_at=timezone.now() - timedelta(hours=1))
+
+        entry, = outbox.claim_entries(10)
+
+        self.assertEqual(outbox.recover_stale_entries(), 0)
+        entry.refresh_from_db()
+        self.assertEqual(entry.status, OutboxEntry.STATUS_SENDING)
+
+    @override_settings(OUTBOX_MAX_ATTEMPTS=2)
+    def test_transient_errors_back_off_then_fail(self):
+        self._edit('SYN-1', status='Done')
+        with patch('jira_integration.outbox.get_jira_issue', return_value={'error': 'Unavailable', 'status_code': 503}):
+            Job.objects.all().delete()
+            self.assertEqual(flush_outbox()['retry'], 1)
+            entry = OutboxEntry.objects.get()
+            self.assertEqual((entry.status, entry.attempts), (OutboxEntry.STATUS_PENDING, 1))
+            self.assertGreater(entry.run_at, timezone.now())
+            # A later flush is queued for when the entry is due.
+            job = Job.objects.get(task=flush_outbox.task_name)
+            self.assertAlmostEqual(job.run_at, entry.run_at, delta=timedelta(seconds=1))
+
+            OutboxEntry.objects.update(run_at=timezone.now())
+            self.assertEqual(flush_outbox()['failed'], 1)
+        self.assertEqual(OutboxEntry.objects.get().status, OutboxEntry.STATUS_FAILED)
+
+    def test_unknown_transition_fails_without_retry(self):
+        self._edit('SYN-1', status='Blocked')
+        self.assertEqual(flush_outbox()['failed'], 1)
+        self.assertIn("No workflow transition from 'Open' to 'Blocked'", OutboxEntry.objects.get().last_error)
+
+@override_settings(JOBS_EAGER=False, JOB_EMBEDDED_WORKERS=0)
+class BulkTicketWriteTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='bulk_user', password='pw')
+        self.client.force_authenticate(user=self.user)
+        self.project = Project.objects.create(name='Bulk', jira_key='BLK')
+        now = timezone.now()
+        self.tickets = Ticket.objects.bulk_create(
+            Ticket(project=self.project, jira_id=f'BLK-{i}', title=f'Ticket {i}', status='Open', priority='Medium',
+                   created_date=now, updated_date=now, synced_at=now)
+            for i in range(5)
+        )
+
+    def test_bulk_update_applies_valid_rows_in_one_write(self):
+        updates = [{'id': ticket.pk, 'status': 'Done', 'priority': 'High'} for ticket in self.tickets[:4]]
+        updates.insert(2, {'id': 999999, 'status': 'Done'})
+        updates.append({'id': self.tickets[4].pk, 'title': ''})
+        updates.append({'status': 'Done'})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.patch(reverse('ticket-bulk-update'), updates, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.assertEqual([t['jira_id'] for t in response.data['tickets']], ['BLK-0', 'BLK-1', 'BLK-2', 'BLK-3'])
+        self.assertEqual(
+            [(e['row'], e['id'], list(e['errors'])) for e in response.data['errors']],
+            [(2, 999999, ['id']), (5, self.tickets[4].pk, ['title']), (6, None, ['id'])],
+        )
+        self.assertEqual(Ticket.objects.filter(status='Done', priority='High').count(), 4)
+        self.assertEqual(Ticket.objects.get(jira_id='BLK-4').title, 'Ticket 4')
+        ticket_updates = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('UPDATE "jira_integration_ticket"')]
+        self.assertEqual(len(ticket_updates), 1)
+        # The edits are queued for JIRA like single PATCHes.
+        self.assertEqual(OutboxEntry.objects.count(), 4)
+        self.assertEqual(Job.objects.filter(task=flush_outbox.task_name).count(), 1)
+
+    def test_bulk_update_rejects_malformed_bodies(self):
+        url = reverse('ticket-bulk-update')
+        self.assertEqual(self.client.patch(url, {'id': 1}, format='json').status_code, status.HTTP_400_BAD_REQUEST)
+        with override_settings(TICKET_BULK_UPDATE_MAX=2):
+            response = self.client.patch(url, [{'id': t.pk} for t in self.tickets[:3]], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_ndjson_import_upserts_in_chunks_and_reports_bad_lines(self):
+        rows = [
+            {'jira_id': f'BLK-{i}', 'project': 'BLK', 'title': f'Imported {i}', 'status': 'Open', 'priority': 'Low',
+             'updated_date': '2024-03-01T10:00:00Z'}
+            for i in range(3, 8)
+        ]
+        rows[1]['description'] = {'type': 'doc', 'content': [{'type': 'paragraph', 'content': [{'type': 'text', 'text': 'From a dump'}]}]}
+        lines = [json.dumps(row) for row in rows]
+        lines.insert(2, '{not json')
+        lines.append(json.dumps({'jira_id': 'NOPE-1', 'project': 'NOPE', 'title': 'x', 'status': 'Open', 'priority': 'Low'}))
+        lines.append(json.dumps({'jira_id': 'BLK-9', 'project': 'BLK'}))
+        body = '\n'.join(lines) + '\n'
+
+        with override_settings(TICKET_IMPORT_CHUNK_SIZE=2):
+            response = self.client.post(reverse('ticket-bulk-import'), body, content_type='application/x-ndjson')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.assertEqual({k: response.data[k] for k in ('rows', 'created', 'updated', 'failed')},
+                         {'rows': 8, 'created': 3, 'updated': 2, 'failed': 3})
+        self.assertEqual([(e['line'], e['jira_id']) for e in response.data['errors']], [(3, None), (7, 'NOPE-1'), (8, 'BLK-9')])
+        self.assertEqual(set(response.data['errors'][2]['errors']), {'title', 'status', 'priority'})
+        imported = Ticket.objects.get(jira_id='BLK-4')
+        self.assertEqual((imported.title, imported.description, imported.description_html),
+                         ('Imported 4', 'From a dump', '<p>From a dump</p>'))
+        # Existing rows keep their sync state; new ones count as never synced.
+        self.assertIsNotNone(Ticket.objects.get(jira_id='BLK-3').synced_at)
+        self.assertIsNone(Ticket.objects.get(jira_id='BLK-7').synced_at)
+
+    def test_csv_import(self):
+        body = (
+            '\ufeffjira_id,project,title,status,priority,assignee,due_date\r\n'
+            'CSV-1,BLK,"Title, with comma",Open,High,,2024-04-01\r\n'
+            'CSV-2,BLK,"Multi\nline",Done,Low,Ann,\r\n'
+            'CSV-3,BLK,Bad date,Open,Low,,someday\r\n'
+        ).encode()
+        response = self.client.post(reverse('ticket-bulk-import'), body, content_type='text/csv; charset=utf-8')
+
+        self.assertEqual((response.data['created'], response.data['failed']), (2, 1), response.data)
+        self.assertEqual(response.data['errors'][0]['line'], 5)
+        self.assertIn('due_date', response.data['errors'][0]['errors'])
+        first, second = Ticket.objects.get(jira_id='CSV-1'), Ticket.objects.get(jira_id='CSV-2')
+        self.assertEqual((first.title, first.assignee, str(first.due_date)), ('Title, with comma', None, '2024-04-01'))
+        self.assertEqual((second.title, second.assignee), ('Multi\nline', 'Ann'))
+
+    def test_import_requires_a_streamable_format(self):
+        response = self.client.post(reverse('ticket-bulk-import'), [], format='json')
+        self.assertEqual(response.status_code, status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+
+class TicketExportTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='export_user', password='pw')
+        self.client.force_authenticate(user=self.user)
+        project = Project.objects.create(name='Export', jira_key='EXP')
+        other = Project.objects.create(name='Other', jira_key='OTH')
+        now = timezone.now()
+        self.tickets = Ticket.objects.bulk_create(
+            Ticket(project=project if i % 5 else other, jira_id=f'EXP-{i}', title=f'Ticket, "{i}"',
+                   status='Done' if i % 2 else 'Open', priority='High', description=f'Line one\nline two {i}',
+                   created_date=now, updated_date=now + timedelta(minutes=i))
+            for i in range(7)
+        )
+        Comment.objects.bulk_create(
+            Comment(ticket=self.tickets[i], author=self.user if i else None, author_name='JIRA User', body=f'Note {i}.{n}',
+                    created_date=now + timedelta(seconds=n))
+            for i in (0, 3) for n in range(2)
+        )
+        self.url = reverse('ticket-export')
+
+    def _get(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content)
+
+    @override_settings(TICKET_EXPORT_CHUNK_SIZE=2)
+    def test_ndjson_export_streams_in_chunks(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response, body = self._get(comments='true')
+        rows = [json.loads(line) for line in body.decode().splitlines()]
+
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual([row['jira_id'] for row in rows], [f'EXP-{i}' for i in range(6, -1, -1)])
+        self.assertEqual((rows[-1]['project_key'], rows[-2]['project_key']), ('OTH', 'EXP'))
+        self.assertEqual(rows[3]['description'], 'Line one\nline two 3')
+        self.assertEqual([(c['author'], c['body']) for c in rows[3]['comments']], [('export_user', 'Note 3.0'), ('export_user', 'Note 3.1')])
+        self.assertEqual(rows[-1]['comments'][0]['author'], 'JIRA User')
+        self.assertEqual(rows[0]['comments'], [])
+        # One ticket query, plus one comment query per chunk of two tickets.
+        self.assertEqual(len(ctx.captured_queries), 1 + 4)
+
+    def test_csv_export_applies_list_filters(self):
+        response, body = self._get(format='csv', status='Done')
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn('filename="tickets.csv"', response['Content-Disposition'])
+        rows = list(csv.DictReader(StringIO(body.decode())))
+        self.assertEqual([row['jira_id'] for row in rows], ['EXP-5', 'EXP-3', 'EXP-1'])
+        self.assertEqual((rows[0]['title'], rows[0]['project_key'], rows[0]['assignee']), ('Ticket, "5"', 'OTH', ''))
+        self.assertNotIn('comments', rows[0])
+
+        by_accept = self.client.get(self.url, HTTP_ACCEPT='text/csv')
+        self.assertTrue(b''.join(by_accept.streaming_content).startswith(b'id,jira_id,project_key'))
+
+    def test_gzip_export(self):
+        response, body = self._get(compress='gzip', comments='1', project='OTH')
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertIn('filename="tickets.ndjson.gz"', response['Content-Disposition'])
+        rows = [json.loads(line) for line in gzip.decompress(body).splitlines()]
+        self.assertEqual([(row['jira_id'], len(row['comments'])) for row in rows], [('EXP-5', 0), ('EXP-0', 2)])
+
+    def test_invalid_filter_is_reported_as_json(self):
+        response = self.client.get(self.url, {'updated_after': 'yesterday'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('updated_after', json.loads(response.content))
+
+
+@override_settings(TICKET_EXPORT_CHUNK_SIZE=2)
+class AsyncTicketExportTests(TransactionTestCase):
+    async def test_export_streams_chunk_by_chunk_under_asgi(self):
+        user = await User.objects.acreate_user(username='async_export_user', password='pw')
+        token = await Token.objects.acreate(user=user)
+        project = await Project.objects.acreate(name='Export', jira_key='AEX')
+        now = timezone.now()
+        await Ticket.objects.abulk_create(
+            Ticket(project=project, jira_id=f'AEX-{i}', title=f'Ticket {i}', status='Open', priority='High',
+                   created_date=now, updated_date=now + timedelta(minutes=i))
+            for i in range(5)
+        )
+
+        response = await self.async_client.get(
+            reverse('ticket-export'), headers={'authorization': f'Token {token.key}'},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # An async iterator, so Django doesn't buffer the export before sending it.
+        self.assertTrue(response.is_async)
+        chunks = [chunk async for chunk in response.streaming_content]
+
+        self.assertEqual(len(chunks), 3)
+        rows = [json.loads(line) for line in b''.join(chunks).decode().splitlines()]
+        self.assertEqual([row['jira_id'] for row in rows], [f'AEX-{i}' for i in range(4, -1, -1)])
+
+
+class CachingTokenAuthenticationTests(APITestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.user = User.objects.create_user(username='token_user', password='pw')
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.url = reverse('ticket-list')
+
+    def _auth_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url)
+        return response.status_code, sum('authtoken_token' in q['sql'] for q in ctx.captured_queries)
+
+    def test_token_lookup_is_cached(self):
+        self.assertEqual(self._auth_queries(), (status.HTTP_200_OK, 1))
+        self.assertEqual(self._auth_queries(), (status.HTTP_200_OK, 0))
+        self.client.credentials(HTTP_AUTHORIZATION='Token not-a-token')
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivating_the_user_invalidates(self):
+        self._auth_queries()
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deleting_the_token_invalidates(self):
+        self._auth_queries()
+        self.token.delete()
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(AUTH_TOKEN_CACHE_TTL=0)
+    def test_entries_expire(self):
+        self._auth_queries()
+        self.assertEqual(self._auth_queries(), (status.HTTP_200_OK, 1))
+
+    @override_settings(AUTH_TOKEN_CACHE_ALIAS='default')
+    def test_shared_cache_backend(self):
+        self.assertEqual(self._auth_queries(), (status.HTTP_200_OK, 1))
+        self.assertEqual(self._auth_queries(), (status.HTTP_200_OK, 0))
+        User.objects.filter(pk=self.user.pk).delete()
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class ResponseCacheTests(APITestCase):
+    def setUp(self):
+        get_response_cache().backend.clear()
+        self.user = User.objects.create_user(username='cache_user', password='pw')
+        self.client.force_authenticate(user=self.user)
+        self.project = Project.objects.create(name='Cached', jira_key='CCH')
+        now = timezone.now()
+        self.tickets = [
+            Ticket.objects.create(project=self.project, jira_id=f'CCH-{i}', title=f'Ticket {i}',
+                                  status='Open', priority='High', created_date=now, updated_date=now)
+            for i in range(3)
+        ]
+
+    def _serialized(self, url):
+        with patch.object(Serializer, 'to_representation', autospec=True, side_effect=Serializer.to_representation) as spy:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json(), spy.call_count
+
+    def test_list_and_detail_are_served_from_the_cache(self):
+        list_url, detail_url = reverse('ticket-list'), reverse('ticket-detail', args=['CCH-0'])
+        first, calls = self._serialized(list_url)
+        self.assertEqual(calls, 3)
+        self.assertEqual(self._serialized(list_url), (first, 0))
+        # The list's trimmed field set is cached separately from the detail.
+        detail, calls = self._serialized(detail_url)
+        self.assertGreater(calls, 0)
+        self.assertIn('comments', detail)
+        self.assertEqual(self._serialized(detail_url), (detail, 0))
+        self.assertEqual(self._serialized(list_url + '?fields=id,title')[1], 3)
+
+    def test_signals_invalidate_related_fragments(self):
+        detail_url, project_url = reverse('ticket-detail', args=['CCH-0']), reverse('project-detail', args=[self.project.pk])
+        self._serialized(detail_url)
+        self._serialized(project_url)
+        Comment.objects.create(ticket=self.tickets[0], author=self.user, body='New note')
+        detail, calls = self._serialized(detail_url)
+        self.assertGreater(calls, 0)
+        self.assertEqual([c['body'] for c in detail['comments']], ['New note'])
+
+        self.tickets[1].title = 'Renamed'
+        self.tickets[1].save()
+        project, calls = self._serialized(project_url)
+        self.assertGreater(calls, 0)
+        self.assertIn('Renamed', [t['title'] for t in project['tickets']])
+
+    def test_writes_without_signals_are_picked_up(self):
+        url = reverse('ticket-list')
+        self._serialized(url)
+        # Bulk writes send no signals but stamp modified_at themselves.
+        Ticket.objects.filter(pk=self.tickets[2].pk).update(title='Bulk edit', modified_at=timezone.now())
+        rows, calls = self._serialized(url)
+        self.assertEqual(calls, 1)
+        self.assertIn('Bulk edit', [row['title'] for row in rows['results']])
+
+    def test_writes_outside_the_stamp_dont_reach_fragments(self):
+        urls = [reverse('ticket-list'), reverse('ticket-detail', args=['CCH-0']),
+                reverse('project-detail', args=[self.project.pk])]
+        cached = [self._serialized(url)[0] for url in urls]
+        # Refreshes and comment syncs write these without bumping modified_at.
+        Ticket.objects.update(synced_at=timezone.now(), comment_sync_offset=5, comment_sync_last_id='9')
+        with override_settings(RESPONSE_CACHE_BACKEND=None):
+            self.assertEqual([self._serialized(url)[0] for url in urls], cached)
+
+    @override_settings(RESPONSE_CACHE_MAX_BYTES=1)
+    def test_memory_backend_evicts_over_its_byte_cap(self):
+        url = reverse('ticket-list')
+        self._serialized(url)
+        self.assertEqual(self._serialized(url)[1], 3)
+        self.assertLessEqual(get_response_cache().backend.size, 1)
+
+    @override_settings(RESPONSE_CACHE_BACKEND='django')
+    def test_django_cache_backend(self):
+        url = reverse('ticket-list')
+        get_response_cache().backend.clear()
+        first, calls = self._serialized(url)
+        self.assertEqual(calls, 3)
+        self.assertEqual(self._serialized(url), (first, 0))
+
+    @override_settings(RESPONSE_CACHE_BACKEND=None)
+    def test_caching_can_be_turned_off(self):
+        url = reverse('ticket-list')
+        self._serialized(url)
+        self.assertEqual(self._serialized(url)[1], 3)
+
+
+class AsyncJiraClientTests(StubJiraServerMixin, SimpleTestCase):
+    def make_client(self, base_url, **kwargs):
+        self.sleeps = []
+
+        async def sleep(delay):
+            self.sleeps.append(delay)
+
+        return AsyncJiraClient(base_url, 'bot@example.com', 'pat', sleep=sleep, **kwargs)
+
+    async def test_retries_and_shares_one_pool(self):
+        server, base_url = self.start_stub_server([
+            (503, {'Retry-After': '1'}, {}),
+            (200, {}, {'key': 'AS-1'}),
+            (404, {}, {'errorMessages': ['Issue does not exist']}),
+        ])
+        client = self.make_client(base_url)
+        try:
+            self.assertEqual(await client.get('/rest/api/3/issue/AS-1'), {'key': 'AS-1'})
+            missing = await client.get('/rest/api/3/issue/AS-2')
+        finally:
+            await client.aclose()
+
+        self.assertEqual(self.sleeps, [1.0])
+        self.assertEqual(missing['status_code'], 404)
+        self.assertEqual(len({address for _, address in server.requests}), 1)
+
+    async def test_connection_errors_are_reported(self):
+        server, base_url = self.start_stub_server()
+        server.shutdown()
+        server.server_close()
+        client = self.make_client(base_url, max_retries=1)
+        try:
+            result = await client.get('/rest/api/3/issue/AS-3')
+        finally:
+            await client.aclose()
+        self.assertIn('Error connecting to JIRA', result['error'])
+        self.assertEqual(len(self.sleeps), 1)
+
+
+@override_settings(JIRA_SYNC_COMMENTS=False)
+class AsyncTicketFetchTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='async_user', password='pw')
+        self.token = Token.objects.create(user=self.user)
+        Project.objects.create(name='Async', jira_key='ASY')
+        self.auth = {'authorization': f'Token {self.token.key}'}
+        self.calls = []
+
+    def fake_jira(self, delay=0.0, status_code=None):
+        async def aget_jira_issue(jira_id):
+            self.calls.append(jira_id)
+            await asyncio.sleep(delay)
+            if status_code:
+                return {'error': 'HTTP error occurred', 'status_code': status_code}
+            return make_jira_issue(jira_id, project_key='ASY')
+        return patch('jira_integration.freshness.aget_jira_issue', aget_jira_issue)
+
+    async def test_miss_is_fetched_on_the_event_loop(self):
+        url = reverse('ticket-detail', kwargs={'pk': 'ASY-1'})
+        with self.fake_jira(delay=0.01), patch('jira_integration.views.schedule_refresh') as mock_schedule:
+            first, second = await asyncio.gather(self.async_client.get(url, headers=self.auth), self.async_client.get(url, headers=self.auth))
+
+        self.assertEqual((first.status_code, second.status_code), (201, 201))
+        self.assertEqual(first.json()['jira_id'], 'ASY-1')
+        # Concurrent misses share one upstream request, and the job queue isn't involved.
+        self.assertEqual(self.calls, ['ASY-1'])
+        mock_schedule.assert_not_called()
+        self.assertIsNotNone((await Ticket.objects.aget(jira_id='ASY-1')).synced_at)
+
+    @override_settings(TICKET_FETCH_WAIT=0.01)
+    async def test_slow_fetch_answers_202_and_completes(self):
+        with self.fake_jira(delay=0.2):
+            response = await self.async_client.get(reverse('ticket-detail', kwargs={'pk': 'ASY-2'}), headers=self.auth)
+            self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+            self.assertFalse(await Ticket.objects.filter(jira_id='ASY-2').aexists())
+            await arefresh_ticket('ASY-2')
+        self.assertTrue(await Ticket.objects.filter(jira_id='ASY-2').aexists())
+        self.assertEqual(self.calls, ['ASY-2'])
+
+    async def test_jira_errors_are_passed_through(self):
+        with self.fake_jira(status_code=404):
+            response = await self.async_client.get(reverse('ticket-detail', kwargs={'pk': 'ASY-3'}), headers=self.auth)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertIn('jira_error', response.json())
+
+    async def test_rejected_clients_never_reach_jira(self):
+        with self.fake_jira():
+            response = await self.async_client.get(reverse('ticket-detail', kwargs={'pk': 'ASY-4'}))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self.calls, [])
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker(window=4, min_calls=4, failure_rate=0.5, slow_call_rate=0.75,
+                                      slow_call_seconds=2.0, open_seconds=10.0, half_open_calls=2, clock=self.clock)
+
+    def call(self, duration=0.1, failed=False):
+        allowed = self.breaker.allow()
+        if allowed:
+            self.breaker.record(duration, failed)
+        return allowed
+
+    def test_opens_on_error_rate_and_recovers_through_half_open(self):
+        for failed in (False, True, False):
+            self.call(failed=failed)
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.call(failed=True)
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(self.call())
+        self.assertEqual(self.breaker.retry_after(), 10.0)
+
+        self.clock.now = 10.0
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        # Only half_open_calls trials are let through at once.
+        self.assertTrue(self.breaker.allow())
+        self.assertTrue(self.breaker.allow())
+        self.assertFalse(self.breaker.allow())
+        self.breaker.record(0.1, False)
+        self.breaker.record(0.1, False)
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_opens_on_slow_calls_and_a_failed_trial_reopens(self):
+        for _ in range(3):
+            self.call(duration=2.5)
+        self.call()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+
+        self.clock.now = 10.0
+        self.assertTrue(self.call(duration=3.0))
+        self.assertTrue(self.breaker.is_open())
+        self.assertEqual(self.breaker.retry_after(), 10.0)
+
+
+class TokenBucketTests(SimpleTestCase):
+    def test_spaces_out_requests_beyond_the_burst(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=10, burst=2, clock=clock)
+
+        delays = [bucket.reserve(max_wait=1.0) for _ in range(4)]
+        self.assertEqual(delays[:2], [0.0, 0.0])
+        self.assertAlmostEqual(delays[2], 0.1)
+        self.assertAlmostEqual(delays[3], 0.2)
+        self.assertIsNone(bucket.reserve(max_wait=0.25))
+
+        clock.now = 1.0
+        self.assertEqual(bucket.reserve(max_wait=0), 0.0)
+
+
+class JiraClientGuardTests(StubJiraServerMixin, SimpleTestCase):
+    def test_breaker_stops_calls_to_a_failing_jira(self):
+        server, base_url = self.start_stub_server([(500, {}, {})] * 10)
+        breaker = CircuitBreaker(window=3, min_calls=3, open_seconds=60)
+        client = JiraClient(base_url, 'bot@example.com', 'pat', max_retries=0, breaker=breaker)
+        self.addCleanup(client.close)
+
+        for i in range(3):
+            self.assertEqual(client.get(f'/rest/api/3/issue/CB-{i}')['status_code'], 500)
+        result = client.get('/rest/api/3/issue/CB-4')
+
+        self.assertTrue(result['circuit_open'])
+        self.assertEqual(len(server.requests), 3)
+
+    def test_rate_limiter_delays_and_refuses(self):
+        server, base_url = self.start_stub_server()
+        sleeps = []
+        limiter = TokenBucket(rate=1, burst=1, clock=FakeClock())
+        client = JiraClient(base_url, 'bot@example.com', 'pat', sleep=sleeps.append, limiter=limiter, rate_limit_wait=1.0)
+        self.addCleanup(client.close)
+
+        client.get('/rest/api/3/issue/RL-1')
+        client.get('/rest/api/3/issue/RL-2')
+        result = client.get('/rest/api/3/issue/RL-3')
+
+        self.assertEqual(sleeps, [1.0])
+        self.assertEqual(result['status_code'], 429)
+        self.assertEqual(len(server.requests), 2)
+
+
+class CircuitOpenRetrieveTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='breaker_user', password='pw')
+        self.client.force_authenticate(user=self.user)
+        self.breaker = CircuitBreaker(window=1, min_calls=1, open_seconds=30)
+        self.breaker.allow()
+        self.breaker.record(0.1, True)
+        patcher = patch('jira_integration.views.get_circuit_breaker', return_value=self.breaker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @patch('jira_integration.views.schedule_refresh')
+    def test_miss_fails_fast(self, mock_schedule):
+        response = self.client.get(reverse('ticket-detail', kwargs={'pk': 'CO-1'}))
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response['Retry-After'], '30')
+        mock_schedule.assert_not_called()
+
+    @patch('jira_integration.views.schedule_refresh')
+    def test_stale_row_is_served_without_a_refresh(self, mock_schedule):
+        now = timezone.now()
+        Ticket.objects.create(
+            project=Project.objects.create(name='Breaker', jira_key='CO'), jira_id='CO-2', title='Stale',
+            status='Open', priority='High', created_date=now, updated_date=now, synced_at=now - timedelta(days=1),
+        )
+
+        response = self.client.get(reverse('ticket-detail', kwargs={'pk': 'CO-2'}))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        mock_schedule.assert_not_called()
+
+
+@override_settings(TICKET_STREAM_POLL_INTERVAL=0, TICKET_STREAM_KEEPALIVE=0)
+class TicketEventStreamTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='stream_user', password='pw')
+        self.token = Token.objects.create(user=self.user)
+        self.project = Project.objects.create(name='Stream', jira_key='STR')
+        self.other = Project.objects.create(name='Other', jira_key='OTH')
+
+    def create_ticket(self, jira_id, project=None):
+        now = timezone.now()
+        return Ticket.objects.create(
+            project=project or self.project, jira_id=jira_id, title=jira_id, status='Open', priority='Low',
+            created_date=now, updated_date=now,
+        )
+
+    def logged(self):
+        return list(TicketEvent.objects.order_by('id').values_list('type', 'jira_id', 'comment_id'))
+
+    def open_stream(self, query='', **headers):
+        response = self.client.get(
+            reverse('ticket-stream') + f'?token={self.token.key}{query}', headers=headers, HTTP_ACCEPT='text/event-stream',
+        )
+        self.addCleanup(response.close)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        return iter(response.streaming_content)
+
+    @staticmethod
+    def messages(chunk):
+        # (id, data) of each message in a chunk of the stream.
+        found = []
+        for block in chunk.decode().split('\n\n'):
+            fields = dict(line.split(': ', 1) for line in block.splitlines() if not line.startswith(':'))
+            if 'data' in fields:
+                found.append((int(fields['id']), json.loads(fields['data'])))
+        return found
+
+    def test_saves_and_deletes_are_logged(self):
+        ticket = self.create_ticket('STR-1')
+        ticket.status = 'Done'
+        ticket.save()
+        comment = Comment.objects.create(ticket=ticket, author=self.user, body='Hi')
+        comment_id = comment.pk
+        comment.delete()
+
+        self.assertEqual(self.logged(), [
+            ('ticket.created', 'STR-1', None), ('ticket.updated', 'STR-1', None),
+            ('comment.created', 'STR-1', comment_id), ('comment.deleted', 'STR-1', comment_id),
+        ])
+
+    def test_deleting_a_ticket_logs_only_the_ticket(self):
+        ticket = self.create_ticket('STR-1')
+        Comment.objects.create(ticket=ticket, author=self.user, body='Hi')
+        TicketEvent.objects.all().delete()
+
+        ticket.delete()
+
+        self.assertEqual(self.logged(), [('ticket.deleted', 'STR-1', None)])
+        self.assertEqual(TicketEvent.objects.get().project_id, self.project.pk)
+
+    def test_bulk_writes_are_logged(self):
+        self.create_ticket('STR-1')
+        now = timezone.now()
+        tickets = [
+            Ticket(project=self.project, jira_id=jira_id, title='Synced', status='Open', priority='Low',
+                   created_date=now, updated_date=now)
+            for jira_id in ('STR-1', 'STR-2')
+        ]
+        upsert_tickets(tickets)
+
+        self.assertEqual(self.logged()[1:], [('ticket.created', 'STR-2', None), ('ticket.updated', 'STR-1', None)])
+        self.assertEqual(
+            TicketEvent.objects.get(type='ticket.created', jira_id='STR-2').ticket_id, Ticket.objects.get(jira_id='STR-2').pk,
+        )
+
+    def test_refreshing_unchanged_tickets_logs_nothing(self):
+        store_jira_issues([make_jira_issue('STR-1', project_key='STR'), make_jira_issue('STR-2', project_key='STR')])
+        TicketEvent.objects.all().delete()
+        Ticket.objects.update(synced_at=None)
+
+        created, updated = store_jira_issues([
+            make_jira_issue('STR-1', project_key='STR'),
+            make_jira_issue('STR-2', project_key='STR', status={'name': 'Done'}),
+        ])
+
+        self.assertEqual((created, updated), (0, 1))
+        self.assertEqual(self.logged(), [('ticket.updated', 'STR-2', None)])
+        # The unchanged row still counts as refreshed.
+        self.assertIsNotNone(Ticket.objects.get(jira_id='STR-1').synced_at)
+
+    @override_settings(TICKET_EVENT_LOG_SIZE=3)
+    def test_worker_housekeeping_bounds_the_log(self):
+        ticket = self.create_ticket('STR-1')
+        for status_name in ('A', 'B', 'C', 'D'):
+            ticket.status = status_name
+            ticket.save()
+        self.assertEqual(TicketEvent.objects.count(), 5)
+
+        Worker(threads=1).maintain()
+
+        self.assertEqual(TicketEvent.objects.count(), 3)
+
+    def test_stream_resumes_after_last_event_id_for_a_project(self):
+        self.create_ticket('STR-1')
+        last_id = TicketEvent.objects.get().pk
+        self.create_ticket('OTH-1', project=self.other)
+        self.create_ticket('STR-2')
+
+        stream = self.open_stream('&project=STR', **{'Last-Event-ID': str(last_id)})
+
+        self.assertEqual(next(stream), b'retry: 3000\n\n')
+        [(event_id, data)] = self.messages(next(stream))
+        ticket = Ticket.objects.get(jira_id='STR-2')
+        self.assertEqual(event_id, TicketEvent.objects.get(jira_id='STR-2').pk)
+        self.assertEqual(data, {'type': 'ticket.created', 'ticket': ticket.pk, 'jira_id': 'STR-2', 'project': self.project.pk})
+        # Nothing newer: the stream idles with keepalive comments until the next change.
+        self.assertEqual(next(stream), b': keepalive\n\n')
+        self.create_ticket('STR-3')
+        self.assertEqual([data['jira_id'] for _, data in self.messages(next(stream))], ['STR-3'])
+
+    def test_stream_without_last_event_id_sends_only_new_events(self):
+        self.create_ticket('STR-1')
+        stream = self.open_stream()
+        next(stream)
+        self.assertEqual(next(stream), b': keepalive\n\n')
+
+    @override_settings(TICKET_EVENT_LOG_SIZE=2)
+    def test_stream_resets_clients_behind_the_log(self):
+        for i in range(4):
+            self.create_ticket(f'STR-{i}')
+        prune_events()
+        newest = TicketEvent.objects.latest('id').pk
+
+        stream = self.open_stream('&last_event_id=1')
+
+        self.assertEqual(self.messages(next(stream)), [(newest, {'type': 'reset'})])
+
+    def test_stream_waits_for_an_event_that_may_not_have_committed(self):
+        self.create_ticket('STR-1')
+        last_id = TicketEvent.objects.get().pk
+        # Event last_id + 1 is still open in another transaction; last_id + 2 committed first.
+        TicketEvent.objects.create(
+            id=last_id + 2, type='ticket.created', ticket_id=0, jira_id='STR-3', project_id=self.project.pk,
+        )
+
+        stream = self.open_stream(**{'Last-Event-ID': str(last_id)})
+        next(stream)
+        self.assertEqual(next(stream), b': keepalive\n\n')
+
+        TicketEvent.objects.create(
+            id=last_id + 1, type='ticket.created', ticket_id=0, jira_id='STR-2', project_id=self.project.pk,
+        )
+        self.assertEqual([data['jira_id'] for _, data in self.messages(next(stream))], ['STR-2', 'STR-3'])
+
+    def test_stream_requires_a_valid_token(self):
+        response = self.client.get(reverse('ticket-stream') + '?token=nope', HTTP_ACCEPT='text/event-stream')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        # Other endpoints don't read tokens from the URL.
+        response = self.client.get(reverse('ticket-list') + f'?token={self.token.key}')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class TicketChangesTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='changes_user', password='pw')
+        self.client.force_authenticate(user=self.user)
+        self.project = Project.objects.create(name='Changes', jira_key='CHG')
+        now = timezone.now()
+        self.tickets = [
+            Ticket.objects.create(
+                project=self.project, jira_id=f'CHG-{i}', title=f'Ticket {i}', status='Open', priority='Low',
+                created_date=now, updated_date=now,
+            )
+            for i in range(3)
+        ]
+
+    def changes(self, **params):
+        response = self.client.get(reverse('ticket-changes'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_returns_only_what_changed_since_the_cursor(self):
+        first = self.changes()
+        self.assertEqual([t['jira_id'] for t in first['changes']], ['CHG-0', 'CHG-1', 'CHG-2'])
+        self.assertFalse(first['has_more'])
+        self.assertNotIn('description_html', first['changes'][0])
+
+        self.tickets[0].status = 'Done'
+        self.tickets[0].save()
+        deleted_pk = self.tickets[1].pk
+        self.tickets[1].delete()
+
+        with CaptureQueriesContext(connection) as ctx:
+            delta = self.changes(since=first['cursor'])
+        self.assertEqual([(t['jira_id'], t['status']) for t in delta['changes']], [('CHG-0', 'Done')])
+        self.assertEqual(delta['deleted'], [{'id': deleted_pk, 'jira_id': 'CHG-1'}])
+        # Two for the committed horizon, then the change log page and the
+        # changed tickets, however large the board.
+        self.assertEqual(len(ctx.captured_queries), 4)
+
+        caught_up = self.changes(since=delta['cursor'])
+        self.assertEqual((caught_up['changes'], caught_up['deleted'], caught_up['cursor']), ([], [], delta['cursor']))
+
+    def test_changes_are_logged_in_the_writing_transaction(self):
+        cursor = self.changes()['cursor']
+        try:
+            with transaction.atomic():
+                self.tickets[0].status = 'Done'
+                self.tickets[0].save()
+                raise RuntimeError
+        except RuntimeError:
+            pass
+
+        delta = self.changes(since=cursor)
+
+        self.assertEqual((delta['changes'], delta['deleted']), ([], []))
+        self.assertFalse(TicketEvent.objects.filter(type='ticket.updated').exists())
+
+    def test_comments_and_bulk_writes_count_as_ticket_changes(self):
+        cursor = self.changes()['cursor']
+        Comment.objects.create(ticket=self.tickets[2], author=self.user, body='New')
+        bulk_update_tickets([{'id': self.tickets[0].pk, 'priority': 'High'}], context={})
+
+        delta = self.changes(since=cursor)
+
+        self.assertEqual([t['jira_id'] for t in delta['changes']], ['CHG-2', 'CHG-0'])
+        self.assertEqual(TicketChange.objects.count(), 3)
+
+    def test_cursor_waits_for_a_change_that_may_not_have_committed(self):
+        cursor = self.changes()['cursor']
+        newest = TicketEvent.objects.latest('id').pk
+        # Event newest + 1 is still open in another transaction; newest + 2 committed first.
+        event = TicketEvent.objects.create(
+            id=newest + 2, type='ticket.updated', ticket_id=self.tickets[2].pk, jira_id='CHG-2', project_id=self.project.pk,
+        )
+        TicketChange.objects.filter(ticket_id=self.tickets[2].pk).update(seq=event.pk)
+
+        held = self.changes(since=cursor)
+        self.assertEqual((held['changes'], held['cursor']), ([], cursor))
+
+        # Long enough later, the missing id can only have rolled back.
+        TicketEvent.objects.filter(pk=event.pk).update(created_at=timezone.now() - timedelta(seconds=60))
+        self.assertEqual([t['jira_id'] for t in self.changes(since=cursor)['changes']], ['CHG-2'])
+
+    def test_pages_through_a_long_backlog(self):
+        page = self.changes(page_size=2)
+        self.assertEqual((len(page['changes']), page['has_more']), (2, True))
+        page = self.changes(since=page['cursor'], page_size=2)
+        self.assertEqual(([t['jira_id'] for t in page['changes']], page['has_more']), (['CHG-2'], False))
+
+    def test_rejects_a_malformed_cursor(self):
+        response = self.client.get(reverse('ticket-changes'), {'since': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ConcurrentTicketChangeTests(TransactionTestCase):
+    def test_two_writers_changing_one_ticket_share_its_change_row(self):
+        now = timezone.now()
+        ticket = Ticket.objects.create(
+            project=Project.objects.create(name='Race', jira_key='RACE'), jira_id='RACE-1', title='Race',
+            status='Open', priority='Low', created_date=now, updated_date=now,
+        )
+        # Each writer holds its own copy, as two requests would.
+        first, second = Ticket.objects.get(pk=ticket.pk), Ticket.objects.get(pk=ticket.pk)
+        first.status = 'Done'
+        second.priority = 'High'
+
+        with transaction.atomic():
+            first.save()
+        with transaction.atomic():
+            second.save()
+
+        updates = list(TicketEvent.objects.filter(type='ticket.updated').order_by('id').values_list('id', flat=True))
+        self.assertEqual(len(updates), 2)
+        change = TicketChange.objects.get(ticket_id=ticket.pk)
+        self.assertEqual((change.seq, change.deleted), (updates[-1], False))
+
+        second.delete()
+        change.refresh_from_db()
+        self.assertTrue(change.deleted)
+        self.assertEqual(TicketChange.objects.filter(ticket_id=ticket.pk).count(), 1)
+
+
+@override_settings(TICKET_STREAM_POLL_INTERVAL=0, TICKET_STREAM_KEEPALIVE=0)
+class AsyncEventStreamTests(TransactionTestCase):
+    async def test_streams_poll_in_the_thread_pool(self):
+        now = timezone.now()
+        project = await Project.objects.acreate(name='Async', jira_key='ASE')
+        await Ticket.objects.acreate(
+            project=project, jira_id='ASE-1', title='Async', status='Open', priority='Low', created_date=now, updated_date=now,
+        )
+        threads = set()
+
+        class RecordingStream(EventStream):
+            def poll(self):
+                threads.add(threading.current_thread().name)
+                return super().poll()
+
+        events = aiter(RecordingStream(last_id=0))
+        self.assertEqual(await anext(events), 'retry: 3000\n\n')
+        [(_, data)] = TicketEventStreamTests.messages((await anext(events)).encode())
+        await events.aclose()
+
+        self.assertEqual(data['jira_id'], 'ASE-1')
+        # The loop's executor, not the single thread shared by thread-sensitive calls.
+        self.assertTrue(all(name.startswith('asyncio_') for name in threads), threads)
+
+
+# Instructions for running tests:
+# (These would typically be in a README.md, but included here as per prompt)
+#
+# ## Running Tests
+#
+# To run the automated tests for the `jira_integration` app, navigate to the
+# `vibejira_django` project root directory (where `manage.py` is located)
+# and execute the following command in your terminal:
+#
+# ```bash
+# python manage.py test jira_integration
+# ```
+#
+# This command will discover and run all tests within the `jira_integration/tests.py` file.
+# Ensure your virtual environment is activated and all dependencies from
+# `requirements.txt` are installed.
+#
+# The tests use `unittest.mock.patch` to mock external JIRA API calls made via
+# `jira_utils.get_jira_issue` (which is imported into `views.py`). This allows
+# tests for JIRA interaction logic (like fetching a ticket not in the local DB)
+# to run reliably without a live JIRA connection or valid JIRA credentials.
+#
+# Test results will indicate success or failure for each test case, along with
+# any errors or tracebacks.
+#
+# To run a specific test class or method:
+# ```bash
+# python manage.py test jira_integration.tests.TicketAPITests
+# python manage.py test jira_integration.tests.TicketAPITests.test_get_ticket_retrieve_authenticated_fetch_from_jira_success
+# ```
+#
+# Note on URL Naming:
+# The tests rely on Django's `reverse()` function to generate URLs for API endpoints.
+# This requires that your URL patterns in `urls.py` are named. For example:
+# - `router.register(r'projects', ProjectViewSet, basename='project')`
+# - `router.register(r'tickets', TicketViewSet, basename='ticket')`
+# - `router.register(r'comments', CommentViewSet, basename='comment')`
+# - `path('api-token-auth/', authtoken_views.obtain_auth_token, name='api-token-auth')`
+# The test code uses names like 'project-list', 'project-detail', 'ticket-list', 'ticket-detail', etc.
+# These are default names generated by DRF's DefaultRouter. If you've customized these names,
+# update the `reverse()` calls in the tests accordingly.
+# For the `CommentAPITests`, the `list` view for comments is assumed to be named `comment-list` and
+# allows filtering by `ticket` PK in query parameters (e.g., `/api/comments/?ticket=<pk>`).
+# If your comment endpoint is nested (e.g., `/api/tickets/<ticket_pk>/comments/`), the URL reversing
+# and test logic for fetching comments would need to be adjusted.
+# The test `test_update_ticket_patch_authenticated_status` and `test_delete_ticket_authenticated`
+# currently assume that the detail URL for tickets (`ticket-detail`) uses the database primary key (PK)
+# for `PATCH` and `DELETE` operations, as `TicketViewSet` does not override `update` or `destroy` methods.
+# However, `retrieve` is overridden to use `jira_id`. This means:
+# - `GET /api/tickets/{jira_id}/` is handled by the overridden `retrieve`.
+# - `PATCH /api/tickets/{db_pk}/` and `DELETE /api/tickets/{db_pk}/` use the database PK.
+# This distinction is important for writing correct tests.
+#
+#
+# A note on `vibejira_django.jira_integration.views.get_jira_issue`:
+# The patch target `@patch('vibejira_django.jira_integration.views.get_jira_issue')` assumes that
+# `get_jira_issue` is imported directly into the `views.py` module. If it's imported differently
+# (e.g., `from . import jira_utils` and then called as `jira_utils.get_jira_issue`), the patch
+# target must be adjusted accordingly (e.g., `@patch('vibejira_django.jira_integration.jira_utils.get_jira_issue')`
+# if `views.py` calls it that way, or more precisely, where it's looked up at runtime).
+# The current path is based on the common pattern of `from .jira_utils import get_jira_issue` in `views.py`.
+#
+# The test `test_get_comment_list_for_ticket_authenticated` assumes that the listing
+# of comments can be filtered by `ticket` (PK) as a query parameter.
+# e.g. `GET /api/comments/?ticket=1`. This is a common way to implement filtering
+# with DRF if comments are not a nested resource.
+#
+# The `setUpTestData` class method is used for setting up data that is shared across
+# all test methods in a class and is created once per class. This is more efficient
+# than `setUp` for data that doesn't need to be reset for each test.
+# `setUp` is then used for objects that might be modified by tests or need to be
+# fresh for each test, like the `APIClient`.
+#
+# Ensure your `CommentSerializer` is configured to correctly handle the `ticket` field
+# (e.g., using `PrimaryKeyRelatedField`) for creating comments.
+# The `author` field for comments is populated with `self.user.email` in `test_create_comment_authenticated_valid_data`.
+# Ensure your `Comment` model and serializer can handle this or adjust as needed.
+#
+# The `TicketAPITests` for `retrieve` are specifically designed to test both local DB hits
+# and fallbacks to JIRA (mocked). The `pk` in the URL for `ticket-detail` is the `jira_id`
+# because the `TicketViewSet.retrieve` method is overridden to use `kwargs.get('pk')` as `jira_id`.
+# However, for `update` and `delete`, DRF's default `ModelViewSet` behavior uses the actual
+# database primary key. The tests reflect this distinction.
+#
+# For `test_get_ticket_list_authenticated`, the assertion `self.assertTrue(any(t['title'] == self.ticket1.title for t in response.data))`
+# is a robust way to check if the ticket is present in the list, as the order might not be guaranteed.
+#
+# One final check for `TicketAPITests.test_create_ticket_authenticated_valid_data`:
+# The number of tickets before creation is 1 (self.ticket1). After creation, it should be 2.
+# The test `self.assertEqual(Ticket.objects.count(), 2)` was in the original template for Project,
+# it should be adapted if there are more tickets created in setUpTestData or other tests.
+# Given `setUpTestData`, there's only `self.ticket1`. So, after creating one more, count should be 2.
+# This seems correct.
+# Similarly for `CommentAPITests.test_create_comment_authenticated_valid_data`:
+# `self.comment1` is created in `setUpTestData`.
+# `test_get_comment_list_for_ticket_authenticated` creates one more comment on `ticket2`.
+# So, before `test_create_comment_authenticated_valid_data` runs, there are 2 comments.
+# After creating one more, the count becomes 3. This also seems correct.
+#
+# The test file is quite comprehensive.
+# Make sure all necessary imports are present and correct.
+# `from unittest.mock import patch, MagicMock` was added to the template.
+# Serializers are not directly used but can be helpful for understanding data structure.
+# The `setUpTestData` is a good optimization.
+# The instructions for running tests are clear.I have overwritten `vibejira_django/jira_integration/tests.py` with a comprehensive suite of unit tests.
+#
+# **Summary of `tests.py` Content:**
+#
+# 1.  **`AuthTokenTests`:**
+#     *   Tests token generation with valid and invalid credentials.
+#     *   Ensures that `rest_framework.authtoken.views.obtain_auth_token` (or its equivalent if customized) works as expected.
+#
+# 2.  **`BaseAPITestCase`:**
+#     *   Uses `setUpTestData` for efficient creation of common test data (user, project, ticket, comment).
+#     *   `setUp` method initializes an authenticated `APIClient` for use in derived test classes.
+#
+# 3.  **`ProjectAPITests(BaseAPITestCase)`:**
+#     *   Covers GET (list, retrieve), POST, PUT, PATCH, and DELETE operations for projects.
+#     *   Tests for unauthenticated access, valid/invalid data, duplicate keys, and non-existent resources.
+#
+# 4.  **`TicketAPITests(BaseAPITestCase)`:**
+#     *   Covers GET (list, retrieve), POST, PATCH, and DELETE for tickets.
+#     *   **Mocking for `retrieve`:** Critically, the `retrieve` tests for tickets include:
+#         *   Fetching a ticket that exists locally (mocked `get_jira_issue` should not be called).
+#         *   Fetching a ticket not in the local DB, successfully from JIRA (mocked `get_jira_issue` returns valid data, ticket is created locally).
+#         *   Fetching a ticket not in the local DB, where JIRA API call fails (mocked `get_jira_issue` returns an error).
+#     *   The tests for `update` (PATCH) and `delete` assume that the `ticket-detail` URL uses the database PK for these operations, as the `TicketViewSet` does not override the default `update`/`destroy` methods which use the model's PK. The `retrieve` method, however, is overridden to use `jira_id` from the URL's `pk` kwarg.
+#
+# 5.  **`CommentAPITests(BaseAPITestCase)`:**
+#     *   Covers GET (list, filtered by ticket) and POST (create) for comments.
+#     *   Assumes comments are listed via `/api/comments/` and can be filtered using a query parameter (e.g., `/api/comments/?ticket=<ticket_pk>`).
+#     *   Tests creation with valid data, missing body, and for a non-existent ticket.
+#
+# 6.  **Mocking:**
+#     *   `@patch('vibejira_django.jira_integration.views.get_jira_issue')` is used to mock the JIRA API interaction within the `TicketViewSet`'s `retrieve` method. This ensures tests are isolated and don't make real network calls.
+#
+# 7.  **URL Reversing and Naming:**
+#     *   Tests use `django.urls.reverse` with standard DRF `DefaultRouter` generated names (e.g., `project-list`, `ticket-detail`). Notes are included in the file's docstring about ensuring these names match the project's URL configuration.
+#
+# 8.  **Test Execution Instructions:**
+#     *   The file ends with a comprehensive comment block explaining how to run the tests using `python manage.py test jira_integration`, how to run specific tests, and notes on the test setup (mocking, URL naming, PK vs. `jira_id` usage in `TicketViewSet`).
+#
+# The testing environment is implicitly set up by Django's test runner when `manage.py test` is called. All necessary utilities like `APITestCase`, `APIClient`, and `unittest.mock.patch` are standard parts of Django REST Framework and Python, respectively, and should be available if the project dependencies are correctly installed.
+#
+# This set of tests should provide good coverage for the specified API endpoints and their core functionalities.
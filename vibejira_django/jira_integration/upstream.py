@@ -0,0 +1,186 @@
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+
+
+class CircuitBreaker:
+    """
+    Stops calling JIRA while it is failing or too slow.
+
+    Closed, it records the outcome of the last `window` calls. Once at least
+    `min_calls` are recorded and the share of failures or of calls slower
+    than `slow_call_seconds` reaches its threshold, it opens: calls are
+    refused for `open_seconds`. It then lets `half_open_calls` trial calls
+    through. If they all succeed it closes again; any failed or slow one
+    reopens it. Thread-safe; shared by the sync and async JIRA clients.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, window=20, min_calls=10, failure_rate=0.5, slow_call_rate=0.5, slow_call_seconds=5.0,
+                 open_seconds=30.0, half_open_calls=3, clock=time.monotonic):
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_rate = slow_call_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._calls = deque(maxlen=window)  # (failed, slow)
+        self._state = self.CLOSED
+        self._opened_at = None
+        self._trials_started = 0
+        self._trials_passed = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def _maybe_half_open(self):
+        if self._state == self.OPEN and self._clock() >= self._opened_at + self.open_seconds:
+            self._state = self.HALF_OPEN
+            self._trials_started = self._trials_passed = 0
+
+    def _open(self):
+        self._state = self.OPEN
+        self._opened_at = self._clock()
+        self._calls.clear()
+
+    def is_open(self):
+        """
+        True while calls are being refused. Unlike allow(), this takes no trial slot.
+        """
+        return self.state == self.OPEN
+
+    def retry_after(self):
+        """
+        Seconds until the breaker lets trial calls through (0 unless open).
+        """
+        with self._lock:
+            if self._state != self.OPEN:
+                return 0.0
+            return max(0.0, self._opened_at + self.open_seconds - self._clock())
+
+    def allow(self):
+        """
+        Returns whether a call may go ahead. A caller that gets True must record() its outcome.
+        """
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == self.OPEN:
+                return False
+            if self._state == self.HALF_OPEN:
+                if self._trials_started >= self.half_open_calls:
+                    return False
+                self._trials_started += 1
+            return True
+
+    def record(self, duration, failed):
+        """
+        Records a call that took `duration` seconds and failed or not.
+        """
+        slow = duration >= self.slow_call_seconds
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                if failed or slow:
+                    self._open()
+                else:
+                    self._trials_passed += 1
+                    if self._trials_passed >= self.half_open_calls:
+                        self._state = self.CLOSED
+                return
+            if self._state == self.OPEN:
+                # Started before the breaker opened.
+                return
+            self._calls.append((failed, slow))
+            if len(self._calls) >= self.min_calls:
+                failures = sum(failed for failed, _ in self._calls) / len(self._calls)
+                slow_calls = sum(slow for _, slow in self._calls) / len(self._calls)
+                if failures >= self.failure_rate or slow_calls >= self.slow_call_rate:
+                    self._open()
+
+
+class TokenBucket:
+    """
+    Process-wide limit of `rate` requests per second, with bursts of up to `burst`.
+
+    reserve() hands out tokens in advance: a caller told to wait N seconds
+    owns the token it will have then, so callers are spaced out fairly
+    instead of racing for each refill. Thread-safe.
+    """
+
+    def __init__(self, rate, burst, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._updated = clock()
+
+    def reserve(self, max_wait):
+        """
+        Takes a token and returns how many seconds to wait before using it,
+        or None (taking nothing) if that would be longer than `max_wait`.
+        """
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            wait = 0.0 if self._tokens >= 1 else (1 - self._tokens) / self.rate
+            if wait > max_wait:
+                return None
+            self._tokens -= 1
+            return wait
+
+
+_breaker = None
+_limiter = None
+_lock = threading.Lock()
+
+
+def get_circuit_breaker():
+    """
+    Returns the process-wide JIRA CircuitBreaker, configured by the JIRA_CIRCUIT_* settings.
+    """
+    global _breaker
+    if _breaker is None:
+        with _lock:
+            if _breaker is None:
+                _breaker = CircuitBreaker(
+                    window=settings.JIRA_CIRCUIT_WINDOW,
+                    min_calls=settings.JIRA_CIRCUIT_MIN_CALLS,
+                    failure_rate=settings.JIRA_CIRCUIT_FAILURE_RATE,
+                    slow_call_rate=settings.JIRA_CIRCUIT_SLOW_CALL_RATE,
+                    slow_call_seconds=settings.JIRA_CIRCUIT_SLOW_CALL_SECONDS,
+                    open_seconds=settings.JIRA_CIRCUIT_OPEN_SECONDS,
+                    half_open_calls=settings.JIRA_CIRCUIT_HALF_OPEN_CALLS,
+                )
+    return _breaker
+
+
+def get_rate_limiter():
+    """
+    Returns the process-wide JIRA TokenBucket (JIRA_RATE_LIMIT per second,
+    bursts of JIRA_RATE_BURST), or None if JIRA_RATE_LIMIT is unset.
+    """
+    global _limiter
+    if _limiter is None and settings.JIRA_RATE_LIMIT:
+        with _lock:
+            if _limiter is None:
+                _limiter = TokenBucket(settings.JIRA_RATE_LIMIT, settings.JIRA_RATE_BURST)
+    return _limiter
+
+
+def reset_upstream_guards():
+    """
+    Drops the shared breaker and limiter so the next call re-reads settings.
+    """
+    global _breaker, _limiter
+    with _lock:
+        _breaker = _limiter = None
@@ -1,12 +1,20 @@
-from django.urls import path, include
+from django.urls import URLPattern, path, include
 from rest_framework.routers import DefaultRouter
-from .views import ProjectViewSet, TicketViewSet, CommentViewSet
+from .views import ProjectViewSet, TicketViewSet, CommentViewSet, DashboardSummaryView, JiraWebhookView, fetch_misses_async
 
 router = DefaultRouter()
 router.register(r'projects', ProjectViewSet)
 router.register(r'tickets', TicketViewSet)
 router.register(r'comments', CommentViewSet)
 
+# Ticket lookups that miss locally are fetched from JIRA asynchronously under ASGI.
+router_urls = [
+    URLPattern(url.pattern, fetch_misses_async(url.callback), url.default_args, url.name) if url.name == 'ticket-detail' else url
+    for url in router.urls
+]
+
 urlpatterns = [
-    path('', include(router.urls)),
+    path('jira/webhook/', JiraWebhookView.as_view(), name='jira-webhook'),
+    path('dashboard/summary/', DashboardSummaryView.as_view(), name='dashboard-summary'),
+    path('', include(router_urls)),
 ]
@@ -1,84 +1,517 @@
-from rest_framework import viewsets
-from .models import Project, Ticket, Comment
-from .serializers import ProjectSerializer, TicketSerializer, CommentSerializer
+import asyncio
+import functools
+import json
+import math
 
-class ProjectViewSet(viewsets.ModelViewSet):
-    queryset = Project.objects.all()
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Max, Prefetch, Q
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import APIException, NotFound
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.views import APIView
+from .authentication import QueryTokenAuthentication
+from .bulk import IMPORT_READERS, TicketImporter, bulk_update_tickets
+from .conditional import ConditionalGetMixin, change_state, latest
+from .dashboard import build_dashboard_summary
+from .events import EventStream, stream_project_ids
+from .export import export_response
+from .filters import TicketFilterBackend, TicketSearchFilter
+from .freshness import arefresh_ticket, is_fresh, schedule_refresh
+from .jira_utils import get_jira_issues
+from .jobs import JobFailed, wait, workers_running
+from .models import Job, Project, Ticket, TicketChange, Comment
+from .outbox import record_edit, snapshot
+from .pagination import CommentPagination, TicketChangePagination, TicketPagination
+from .renderers import CSVRenderer, EventStreamRenderer, NDJSONRenderer
+from .serializers import (
+    CommentSerializer, ProjectSerializer, TicketCommentSerializer, TicketDetailSerializer, TicketSerializer,
+    requested_fields,
+)
+from .sync import schedule_comment_push, store_jira_issues
+from .upstream import get_circuit_breaker
+from .webhooks import SUPPORTED_EVENTS, delivery_id_for, get_webhook_secret, record_event, verify_signature
+
+
+FETCH_PENDING = {"status": "pending", "detail": "Ticket is being fetched from JIRA; retry shortly."}
+
+
+def jira_unavailable(response_class=Response):
+    """
+    The 503 answered, without waiting, for a ticket that needs JIRA while
+    the circuit breaker is open.
+    """
+    retry_after = max(1, math.ceil(get_circuit_breaker().retry_after()))
+    return response_class(
+        {"error": "JIRA is unavailable; retry shortly."},
+        status=status.HTTP_503_SERVICE_UNAVAILABLE, headers={'Retry-After': str(retry_after)},
+    )
+
+
+def fetch_failure(outcome):
+    """
+    Returns the (body, status) answered when a ticket fetch produced no ticket.
+    """
+    if outcome.get('project_missing'):
+        return {"error": "Project key not found in JIRA data"}, status.HTTP_400_BAD_REQUEST
+    error_detail = {"error": "Failed to fetch ticket from JIRA."}
+    if outcome.get("error"):
+        error_detail["jira_error"] = outcome.get("error")
+        if "status_code" in outcome:
+            return error_detail, outcome.get("status_code", 500) # Use JIRA's status code if available
+    return error_detail, status.HTTP_404_NOT_FOUND
+
+
+def latest_comments_prefetch():
+    """
+    Prefetches each ticket's newest TICKET_DETAIL_COMMENTS comments into
+    `latest_comments`: one windowed query for any number of tickets.
+    """
+    comments = Comment.objects.select_related('author').order_by('-created_date', '-id')
+    return Prefetch('comments', queryset=comments[:settings.TICKET_DETAIL_COMMENTS], to_attr='latest_comments')
+
+
+class ProjectViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+    queryset = Project.objects.prefetch_related('tickets')
     serializer_class = ProjectSerializer
 
-class TicketViewSet(viewsets.ModelViewSet):
+    def project_not_modified(self, request, projects):
+        # Projects nest their tickets, so both feed the validators.
+        project_state = change_state(projects)
+        ticket_state = change_state(Ticket.objects.filter(project__in=projects))
+        last_modified = latest(project_state[1], ticket_state[1])
+        return self.not_modified(request, (project_state, ticket_state), last_modified)
+
+    def list(self, request, *args, **kwargs):
+        projects = self.filter_queryset(Project.objects.all())
+        return self.project_not_modified(request, projects) or super().list(request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        projects = Project.objects.filter(pk=kwargs.get('pk'))
+        return self.project_not_modified(request, projects) or super().retrieve(request, *args, **kwargs)
+
+class TicketViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Ticket.objects.all()
-    serializer_class = TicketSerializer
+    serializer_class = TicketDetailSerializer
+    pagination_class = TicketPagination
+    filter_backends = [TicketFilterBackend, TicketSearchFilter]
+    # Left out of list responses unless asked for with ?fields; the list
+    # previews the plaintext `description` instead.
+    LIST_OMITTED_FIELDS = ('description_html',)
+    # Actions returning list rows rather than ticket details.
+    LIST_ACTIONS = ('list', 'changes')
+
+    def get_serializer_class(self):
+        # Only single tickets (and batches of them) carry comments.
+        return TicketSerializer if self.action in self.LIST_ACTIONS else super().get_serializer_class()
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.action in self.LIST_ACTIONS:
+            context['omit_fields'] = self.LIST_OMITTED_FIELDS
+        return context
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields = requested_fields(self.request)
+        if self.action in self.LIST_ACTIONS:
+            if fields is None:
+                # description_adf isn't serialized at all, so never load it here.
+                queryset = queryset.defer('description_adf', *self.LIST_OMITTED_FIELDS)
+            else:
+                # Only load the columns the sparse fieldset will serialize (plus
+                # the pagination keys and validator), so skipped descriptions
+                # never leave the DB.
+                columns = {f.name for f in Ticket._meta.concrete_fields} & fields
+                queryset = queryset.only('id', 'updated_date', 'modified_at', *columns)
+        else:
+            if fields is None or {'comments', 'comment_count'} & fields:
+                # comments_modified completes the cache stamp (see TicketDetailSerializer).
+                queryset = queryset.annotate(comment_count=Count('comments'), comments_modified=Max('comments__modified_at'))
+            if fields is None or 'comments' in fields:
+                queryset = queryset.prefetch_related(latest_comments_prefetch())
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        page = self.paginate_queryset(self.filter_queryset(self.get_queryset()))
+        # The page's own rows are the validators, so a 304 costs the page query alone.
+        not_modified = self.page_not_modified(request, page)
+        if not_modified is not None:
+            return not_modified
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
     def retrieve(self, request, *args, **kwargs):
         jira_id = kwargs.get('pk') # Assuming 'pk' is the jira_id for retrieve
         try:
-            # Try to fetch from local database first
-            ticket = Ticket.objects.get(jira_id=jira_id)
-            serializer = self.get_serializer(ticket)
-            return Response(serializer.data)
-        except Ticket.DoesNotExist:
-            # If not found locally, fetch from JIRA
-            from .jira_utils import get_jira_issue
-            jira_data = get_jira_issue(jira_id)
-
-            if jira_data and not jira_data.get("error"):
-                # Ensure project exists or create a placeholder if necessary
-                # This part might need more robust handling in a real app
-                project_key = jira_data.get('fields', {}).get('project', {}).get('key')
-                project_name = jira_data.get('fields', {}).get('project', {}).get('name')
-                
-                if not project_key:
-                    return Response({"error": "Project key not found in JIRA data"}, status=status.HTTP_400_BAD_REQUEST)
-
-                project, _ = Project.objects.get_or_create(
-                    jira_key=project_key, 
-                    defaults={'name': project_name or 'Unnamed Project'}
+            # Try the local database first. Stale rows are still served right
+            # away; a background refresh brings them up to date for next time.
+            state = (
+                Ticket.objects.filter(jira_id=jira_id)
+                .only('id', 'updated_date', 'synced_at', 'modified_at')
+                .annotate(comment_count=Count('comments'), comments_modified=Max('comments__modified_at'))
+                .first()
+            )
+            if state is not None:
+                # While JIRA is down the stale row is all there is; don't queue doomed refreshes.
+                if not is_fresh(state) and not get_circuit_breaker().is_open():
+                    schedule_refresh(jira_id)
+                not_modified = self.not_modified(
+                    request,
+                    (state.pk, state.modified_at, state.comment_count, state.comments_modified),
+                    latest(state.modified_at, state.comments_modified),
                 )
+                if not_modified is not None:
+                    return not_modified
+                # The state row carries the cache stamp, so a hit skips the full fetch.
+                cached = self.get_serializer().cached_representation(state)
+                if cached is not None:
+                    return Response(cached)
+                ticket = self.get_queryset().get(pk=state.pk)
+                serializer = self.get_serializer(ticket)
+                return Response(serializer.data)
 
-                # Map JIRA data to Ticket model fields
-                ticket_data = {
-                    'project': project,
-                    'jira_id': jira_data.get('key'),
-                    'title': jira_data.get('fields', {}).get('summary'),
-                    'description': jira_data.get('fields', {}).get('description'),
-                    'status': jira_data.get('fields', {}).get('status', {}).get('name'),
-                    'priority': jira_data.get('fields', {}).get('priority', {}).get('name'),
-                    'assignee': jira_data.get('fields', {}).get('assignee', {}).get('displayName') if jira_data.get('fields', {}).get('assignee') else None,
-                    'reporter': jira_data.get('fields', {}).get('reporter', {}).get('displayName') if jira_data.get('fields', {}).get('reporter') else None,
-                    'created_date': jira_data.get('fields', {}).get('created'),
-                    'updated_date': jira_data.get('fields', {}).get('updated'),
-                    'due_date': jira_data.get('fields', {}).get('duedate'),
-                }
-                
-                # Remove None values for fields that don't allow null if not blank
-                ticket_data_cleaned = {k: v for k, v in ticket_data.items() if v is not None}
-
-
-                # Create or update local ticket instance
-                # Using update_or_create to handle both cases
-                ticket, created = Ticket.objects.update_or_create(
-                    jira_id=jira_id,
-                    defaults=ticket_data_cleaned
-                )
-                
+            # If not found locally, fetch from JIRA on the job queue and wait
+            # for it. Concurrent misses for the same jira_id share one job,
+            # which this request runs itself if no worker picks it up (at
+            # once when there are no workers to wait for).
+            if get_circuit_breaker().is_open():
+                return jira_unavailable()
+            job, _ = schedule_refresh(jira_id, priority=Job.PRIORITY_HIGH)
+            run_after = settings.TICKET_FETCH_INLINE_AFTER if workers_running() else 0
+            try:
+                outcome = wait(job, settings.TICKET_FETCH_WAIT, run_after=run_after)
+            except TimeoutError:
+                return Response(FETCH_PENDING, status=status.HTTP_202_ACCEPTED)
+            except JobFailed as e:
+                outcome = {"error": str(e).strip().splitlines()[-1]}
+
+            ticket = self.get_queryset().filter(jira_id=outcome.get('jira_id')).first() if outcome.get('jira_id') else None
+            if ticket is not None:
                 serializer = self.get_serializer(ticket)
-                return Response(serializer.data, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
-            else:
-                error_detail = {"error": "Failed to fetch ticket from JIRA."}
-                if jira_data and jira_data.get("error"):
-                    error_detail["jira_error"] = jira_data.get("error")
-                    if "status_code" in jira_data:
-                         return Response(error_detail, status=jira_data.get("status_code", 500)) # Use JIRA's status code if available
-                return Response(error_detail, status=status.HTTP_404_NOT_FOUND)
+                return Response(serializer.data, status=status.HTTP_201_CREATED if outcome.get('created') else status.HTTP_200_OK)
+            body, code = fetch_failure(outcome)
+            return Response(body, status=code)
         except Exception as e:
             # General exception handler
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    def perform_update(self, serializer):
+        # Status, priority and assignee edits are queued for JIRA with the
+        # save, and pushed in batches shortly after.
+        before = snapshot(serializer.instance)
+        with transaction.atomic():
+            ticket = serializer.save()
+            record_edit(ticket, before)
+
+    @action(detail=True, methods=['get', 'post'], url_path='comments', serializer_class=TicketCommentSerializer,
+            pagination_class=CommentPagination, filter_backends=[])
+    def comments(self, request, pk=None):
+        """
+        Pages through a ticket's comments, oldest first, or adds one.
+
+        `{id}` is the ticket's JIRA key or database PK. Pages follow the
+        `next` cursor like the ticket list.
+        """
+        lookup = Q(jira_id=pk) | Q(pk=int(pk)) if pk.isdigit() else Q(jira_id=pk)
+        ticket = Ticket.objects.filter(lookup).only('id', 'jira_id').first()
+        if ticket is None:
+            raise NotFound("Ticket not found.")
+
+        if request.method == 'POST':
+            serializer = self.get_serializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            comment = serializer.save(ticket=ticket, author=request.user)
+            transaction.on_commit(lambda: schedule_comment_push(comment.pk))
+            return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+        page = self.paginate_queryset(Comment.objects.filter(ticket=ticket).select_related('author'))
+        not_modified = self.page_not_modified(request, page)
+        if not_modified is not None:
+            return not_modified
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=['post'], url_path='batch-retrieve')
+    def batch_retrieve(self, request):
+        """
+        Returns many tickets by jira_id in one call.
+
+        Local rows are served from the database; only the misses are fetched
+        from JIRA (concurrently) and stored. Keys that fail are reported per
+        key under `errors`.
+        """
+        keys = request.data.get('keys')
+        if not isinstance(keys, list) or not keys or not all(isinstance(k, str) and k for k in keys):
+            return Response({"error": "'keys' must be a non-empty list of JIRA issue keys."}, status=status.HTTP_400_BAD_REQUEST)
+        keys = list(dict.fromkeys(keys))
+        if len(keys) > settings.TICKET_BATCH_RETRIEVE_MAX:
+            return Response({"error": f"At most {settings.TICKET_BATCH_RETRIEVE_MAX} keys can be requested at once."}, status=status.HTTP_400_BAD_REQUEST)
+
+        found = {ticket.jira_id: ticket for ticket in self.get_queryset().filter(jira_id__in=keys)}
+        misses = [key for key in keys if key not in found]
+        errors = {}
+
+        if misses:
+            jira_results = get_jira_issues(misses)
+            fetched = {}
+            for key, jira_data in jira_results.items():
+                if jira_data.get('error'):
+                    errors[key] = {k: v for k, v in jira_data.items() if k in ('error', 'status_code')}
+                else:
+                    fetched[key] = jira_data
+            store_jira_issues(fetched.values())
+            # A moved issue comes back under its new key, so map through the returned key.
+            stored = {t.jira_id: t for t in self.get_queryset().filter(jira_id__in=[i.get('key') for i in fetched.values()])}
+            for key, jira_data in fetched.items():
+                if jira_data.get('key') in stored:
+                    found[key] = stored[jira_data['key']]
+                else:
+                    errors[key] = {"error": "Project key not found in JIRA data"}
+
+        serializer = self.get_serializer([found[key] for key in keys if key in found], many=True)
+        return Response({"tickets": serializer.data, "errors": errors})
+
+    @action(detail=False, methods=['get'], url_path='export', renderer_classes=[NDJSONRenderer, CSVRenderer])
+    def export(self, request):
+        """
+        Streams every ticket matching the list filters, as NDJSON (default)
+        or CSV (`?format=csv` or `Accept: text/csv`).
+
+        `?comments=true` adds each ticket's comments; `?compress=gzip`
+        gzips the stream. Rows are read in chunks, so memory use doesn't
+        grow with the size of the export, under WSGI or ASGI.
+        """
+        queryset = self.filter_queryset(Ticket.objects.order_by('-updated_date', '-id'))
+        return export_response(
+            queryset,
+            export_format=request.accepted_renderer.format,
+            with_comments=request.query_params.get('comments', '').lower() in ('1', 'true', 'yes'),
+            compress=request.query_params.get('compress', '').lower() == 'gzip',
+            asynchronous=isinstance(request._request, ASGIRequest),
+        )
+
+    @action(detail=False, methods=['get'], url_path='changes')
+    def changes(self, request):
+        """
+        Returns the tickets created, updated or deleted after `?since=`.
+
+        Live tickets come back under `changes` as list rows (`?fields=`
+        applies), deleted ones under `deleted` as `{"id", "jira_id"}`, in
+        change order. `cursor` is the `since` for the next call; while
+        `has_more` is true, more changes are waiting. Without `since`,
+        every ticket is returned, a page at a time.
+        """
+        paginator = TicketChangePagination()
+        rows = paginator.paginate_queryset(TicketChange.objects.all(), request, view=self)
+        tickets = self.get_queryset().in_bulk([row.ticket_id for row in rows if not row.deleted])
+        # A ticket deleted since its row was read is skipped; its tombstone comes later.
+        serializer = self.get_serializer(
+            [tickets[row.ticket_id] for row in rows if not row.deleted and row.ticket_id in tickets], many=True,
+        )
+        return Response({
+            "changes": serializer.data,
+            "deleted": [{"id": row.ticket_id, "jira_id": row.jira_id} for row in rows if row.deleted],
+            "cursor": paginator.cursor,
+            "has_more": paginator.has_next,
+        })
+
+    @action(detail=False, methods=['get'], url_path='stream', renderer_classes=[EventStreamRenderer],
+            authentication_classes=[QueryTokenAuthentication, *api_settings.DEFAULT_AUTHENTICATION_CLASSES])
+    def stream(self, request):
+        """
+        Streams ticket and comment changes as Server-Sent Events.
+
+        Each event is `{"type", "ticket", "jira_id", "project"[, "comment"]}`
+        (type being e.g. `ticket.updated` or `comment.created`); clients
+        fetch what changed rather than reloading everything. `?project=`
+        filters like the list. Resumes after the `Last-Event-ID` header (or
+        `?last_event_id=`); since EventSource can't set headers, the token
+        may be passed as `?token=`.
+        """
+        last_id = request.headers.get('Last-Event-ID') or request.query_params.get('last_event_id') or ''
+        stream = EventStream(
+            last_id=int(last_id) if last_id.strip().isdigit() else None,
+            project_ids=stream_project_ids(request.query_params.get('project')),
+        )
+        # A sync generator would hold a thread per client under ASGI.
+        events = aiter(stream) if isinstance(request._request, ASGIRequest) else iter(stream)
+        response = StreamingHttpResponse(events, content_type=EventStreamRenderer.media_type)
+        response['Cache-Control'] = 'no-cache'
+        # Stops nginx from buffering the stream.
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    @action(detail=False, methods=['patch'], url_path='bulk', serializer_class=TicketSerializer)
+    def bulk_update(self, request):
+        """
+        Applies many partial updates in one transaction.
+
+        The body is a list of `{"id": <db pk>, <field>: <value>, ...}`. Valid
+        rows are saved and returned under `tickets`; invalid ones are skipped
+        and reported under `errors` by row index.
+        """
+        items = request.data
+        if not isinstance(items, list) or not items:
+            return Response({"error": "Expected a non-empty list of ticket updates."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > settings.TICKET_BULK_UPDATE_MAX:
+            return Response({"error": f"At most {settings.TICKET_BULK_UPDATE_MAX} tickets can be updated at once."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            tickets, errors = bulk_update_tickets(items, context=self.get_serializer_context())
+        except IntegrityError as e:
+            # E.g. two rows moving tickets onto the same jira_id.
+            return Response({"error": f"Bulk update conflicts with existing data: {e}"}, status=status.HTTP_409_CONFLICT)
+        serializer = self.get_serializer(tickets, many=True)
+        return Response({"tickets": serializer.data, "errors": errors})
+
+    @action(detail=False, methods=['post'], url_path='import')
+    def bulk_import(self, request):
+        """
+        Upserts tickets (keyed on jira_id) from an NDJSON or CSV body.
+
+        The body is streamed and written in chunks, never read whole. Rows
+        that fail validation are counted and reported by line under `errors`.
+        """
+        reader = IMPORT_READERS.get(request.content_type.split(';')[0].strip().lower())
+        if reader is None:
+            return Response(
+                {"error": f"Send the tickets as one of: {', '.join(IMPORT_READERS)}."},
+                status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            )
+        # request.stream is the raw body; request.data would buffer all of it.
+        return Response(TicketImporter().run(reader(request.stream or ())))
+
+
+def _may_retrieve(request, pk):
+    # TicketViewSet's authentication, permission and throttle checks, so
+    # clients it would turn away can't trigger JIRA fetches.
+    viewset = TicketViewSet(action_map={'get': 'retrieve'}, args=(), kwargs={'pk': pk}, headers={}, format_kwarg=None)
+    try:
+        viewset.initial(viewset.initialize_request(request))
+    except APIException:
+        return False
+    return True
+
+
+def fetch_misses_async(detail_view):
+    """
+    Wraps TicketViewSet's detail view so that, under ASGI, a GET for a
+    ticket missing locally is fetched from JIRA on the event loop.
+
+    A slow JIRA then holds a coroutine per request rather than a worker
+    thread (and skips the job queue). Everything else, including local
+    hits, writes, rejected clients and WSGI requests, goes to `detail_view`.
+    """
+    sync_view = sync_to_async(detail_view)
+
+    @csrf_exempt
+    @functools.wraps(detail_view)
+    async def view(request, pk, **kwargs):
+        if (
+            request.method != 'GET' or not isinstance(request, ASGIRequest)
+            or await Ticket.objects.filter(jira_id=pk).aexists()
+            or not await sync_to_async(_may_retrieve)(request, pk)
+        ):
+            return await sync_view(request, pk=pk, **kwargs)
+        if get_circuit_breaker().is_open():
+            return jira_unavailable(JsonResponse)
+
+        refresh = arefresh_ticket(pk)
+        try:
+            # Shielded, so a fetch that outlasts the wait still gets stored.
+            outcome = await asyncio.wait_for(asyncio.shield(refresh), settings.TICKET_FETCH_WAIT)
+        except TimeoutError:
+            return JsonResponse(FETCH_PENDING, status=status.HTTP_202_ACCEPTED)
+        except Exception as e:
+            return JsonResponse({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        if outcome.get('jira_id'):
+            response = await sync_view(request, pk=outcome['jira_id'], **kwargs)
+            if outcome.get('created') and response.status_code == status.HTTP_200_OK:
+                response.status_code = status.HTTP_201_CREATED
+            return response
+        body, code = fetch_failure(outcome)
+        return JsonResponse(body, status=code)
+
+    return view
+
+
 class CommentViewSet(viewsets.ModelViewSet):
-    queryset = Comment.objects.all()
+    queryset = Comment.objects.select_related('author')
     serializer_class = CommentSerializer
+    pagination_class = CommentPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        ticket = self.request.query_params.get('ticket')
+        if ticket and self.action == 'list':
+            queryset = queryset.filter(ticket_id=ticket) if ticket.isdigit() else queryset.none()
+        return queryset
 
     def perform_create(self, serializer):
         # Automatically set the author to the currently authenticated user
-        serializer.save(author=self.request.user)
+        comment = serializer.save(author=self.request.user)
+        # Mirror it to JIRA in the background once the row is committed.
+        transaction.on_commit(lambda: schedule_comment_push(comment.pk))
+
+
+class DashboardSummaryView(APIView):
+    """
+    Status counts, priority-group counts and the top tickets of each group.
+
+    Accepts the ticket list's filters (e.g. `project`, `assignee`, `search`).
+    `top` sets how many tickets are returned per priority group.
+    """
+    filter_backends = [TicketFilterBackend, TicketSearchFilter]
+
+    def get(self, request):
+        queryset = Ticket.objects.all()
+        for backend in self.filter_backends:
+            queryset = backend().filter_queryset(request, queryset, self)
+
+        try:
+            top_n = int(request.query_params.get('top', settings.DASHBOARD_TOP_N))
+        except ValueError:
+            return Response({"error": "'top' must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+        top_n = max(0, min(top_n, settings.DASHBOARD_MAX_TOP_N))
+
+        return Response(build_dashboard_summary(queryset, top_n=top_n))
+
+
+class JiraWebhookView(APIView):
+    """
+    Receives JIRA issue and comment webhooks.
+
+    Deliveries are authenticated with the shared JIRA_WEBHOOK_SECRET,
+    recorded (duplicates are dropped) and applied in the background, so
+    JIRA gets its answer without waiting on the database writes.
+    """
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def post(self, request):
+        body = request.body
+        if not verify_signature(
+            get_webhook_secret(), body,
+            signature=request.headers.get('X-Hub-Signature'),
+            token=request.query_params.get('secret'),
+        ):
+            return Response({"error": "Invalid webhook signature."}, status=status.HTTP_403_FORBIDDEN)
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return Response({"error": "Body must be JSON."}, status=status.HTTP_400_BAD_REQUEST)
+        if not isinstance(payload, dict) or payload.get('webhookEvent') not in SUPPORTED_EVENTS:
+            return Response({"status": "ignored"})
+
+        delivery_id = delivery_id_for(body, request.headers.get('X-Atlassian-Webhook-Identifier'))
+        if record_event(payload, delivery_id) is None:
+            return Response({"status": "duplicate"})
+        return Response({"status": "queued"}, status=status.HTTP_202_ACCEPTED)
@@ -0,0 +1,230 @@
+import hashlib
+import hmac
+import logging
+import os
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .events import record_events
+from .freshness import fetch_ticket
+from .jobs import enqueue, task
+from .models import Comment, Ticket, TicketEvent, WebhookEvent
+from .mapper import IssueMapper, comment_from_jira, render_descriptions
+from .sync import COMMENT_SYNC_FIELDS, DESCRIPTION_FIELDS, TICKET_SYNC_FIELDS, keep_pending_edits
+
+logger = logging.getLogger(__name__)
+
+ISSUE_CREATED = 'jira:issue_created'
+ISSUE_UPDATED = 'jira:issue_updated'
+ISSUE_DELETED = 'jira:issue_deleted'
+COMMENT_CREATED = 'comment_created'
+COMMENT_UPDATED = 'comment_updated'
+COMMENT_DELETED = 'comment_deleted'
+ISSUE_EVENTS = {ISSUE_CREATED, ISSUE_UPDATED, ISSUE_DELETED}
+COMMENT_EVENTS = {COMMENT_CREATED, COMMENT_UPDATED, COMMENT_DELETED}
+SUPPORTED_EVENTS = ISSUE_EVENTS | COMMENT_EVENTS
+
+
+def get_webhook_secret():
+    return os.getenv('JIRA_WEBHOOK_SECRET')
+
+
+def verify_signature(secret, body, signature=None, token=None):
+    """
+    Checks a delivery against the shared secret.
+
+    Accepts either an `X-Hub-Signature: sha256=<hex>` HMAC of the raw body
+    (JIRA webhooks registered with a secret) or the secret itself passed as
+    a `?secret=` token (for webhooks that can't sign).
+    """
+    if not secret:
+        return False
+    if signature:
+        algorithm, _, digest = signature.partition('=')
+        if algorithm != 'sha256':
+            return False
+        expected = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+        return hmac.compare_digest(expected, digest)
+    if token:
+        return hmac.compare_digest(secret.encode(), token.encode())
+    return False
+
+
+def delivery_id_for(body, identifier=None):
+    return identifier or hashlib.sha256(body).hexdigest()
+
+
+def record_event(payload, delivery_id):
+    """
+    Stores a webhook delivery and queues it for applying.
+
+    Returns the new WebhookEvent, or None if this delivery was already received.
+    """
+    event_type = payload.get('webhookEvent', '')
+    issue = payload.get('issue') or {}
+    comment = payload.get('comment') or {}
+    try:
+        # The event and its job commit together, so no event is left unqueued.
+        with transaction.atomic():
+            event = WebhookEvent.objects.create(
+                delivery_id=delivery_id,
+                event_type=event_type,
+                issue_key=issue.get('key') or '',
+                comment_id=str(comment.get('id') or ''),
+                payload=payload,
+            )
+            enqueue(process_event, event.pk)
+    except IntegrityError:
+        return None
+    return event
+
+
+def _event_time(payload):
+    # `timestamp` is epoch milliseconds; used when the entity has no `updated`.
+    timestamp = payload.get('timestamp')
+    if timestamp is None:
+        return None
+    return datetime.fromtimestamp(timestamp / 1000, tz=dt_timezone.utc)
+
+
+def _deleted(field, value):
+    """
+    True if a delete event for this issue/comment has been applied, so a
+    late create or update must not bring it back.
+    """
+    event_type = ISSUE_DELETED if field == 'issue_key' else COMMENT_DELETED
+    return WebhookEvent.objects.filter(
+        **{field: value}, event_type=event_type, status=WebhookEvent.STATUS_APPLIED,
+    ).exists()
+
+
+def apply_issue(issue):
+    """
+    Upserts an issue unless the local row is already at least as new.
+    Local edits waiting in the outbox are kept.
+
+    Returns True if the ticket was written.
+    """
+    key = issue.get('key')
+    if not key or _deleted('issue_key', key):
+        return False
+    ticket = IssueMapper().to_ticket(issue)
+    if ticket is None:
+        return False
+    keep_pending_edits([ticket])
+    ticket.modified_at = timezone.now()
+    stored_hash = Ticket.objects.filter(jira_id=key).values_list('description_hash', flat=True).first()
+    unchanged = render_descriptions([ticket], {key: stored_hash})
+    values = {
+        field: getattr(ticket, field) for field in TICKET_SYNC_FIELDS
+        if not (key in unchanged and field in DESCRIPTION_FIELDS)
+    }
+
+    # Compare-and-set on updated_date: of two deliveries racing for the same
+    # issue, the older one can never overwrite the newer.
+    for _ in range(2):
+        with transaction.atomic():
+            if Ticket.objects.filter(jira_id=key, updated_date__lt=ticket.updated_date).update(**values):
+                record_events(TicketEvent.TICKET_UPDATED, [ticket])
+                return True
+        if Ticket.objects.filter(jira_id=key).exists():
+            return False
+        if key in unchanged:
+            # Deleted since the hash was read; render for the insert.
+            render_descriptions([ticket])
+            unchanged = set()
+        try:
+            with transaction.atomic():
+                ticket.save(force_insert=True)
+            return True
+        except IntegrityError:
+            # Created concurrently; go round once more to compare against it.
+            ticket.pk = None
+    return False
+
+
+def apply_issue_deleted(issue):
+    return bool(Ticket.objects.filter(jira_id=issue.get('key')).delete()[0])
+
+
+def apply_comment(payload):
+    issue = payload.get('issue') or {}
+    data = payload.get('comment') or {}
+    jira_id = str(data.get('id') or '')
+    if not jira_id or _deleted('comment_id', jira_id):
+        return False
+
+    ticket = Ticket.objects.filter(jira_id=issue.get('key')).first()
+    if ticket is None and issue.get('key'):
+        ticket, _, _ = fetch_ticket(issue['key'])
+    if ticket is None:
+        raise ValueError(f"Ticket {issue.get('key')!r} for comment {jira_id} not found")
+
+    comment = comment_from_jira(data, ticket, fallback_time=_event_time(payload))
+    values = {field: getattr(comment, field) for field in COMMENT_SYNC_FIELDS}
+    values['modified_at'] = timezone.now()
+
+    for _ in range(2):
+        stale = Comment.objects.filter(jira_id=jira_id).exclude(updated_date__gte=comment.updated_date)
+        with transaction.atomic():
+            if stale.update(**values):
+                record_events(TicketEvent.COMMENT_UPDATED, [comment])
+                return True
+        if Comment.objects.filter(jira_id=jira_id).exists():
+            return False
+        try:
+            with transaction.atomic():
+                comment.save(force_insert=True)
+            return True
+        except IntegrityError:
+            comment.pk = None
+    return False
+
+
+def apply_comment_deleted(payload):
+    jira_id = str((payload.get('comment') or {}).get('id') or '')
+    return bool(jira_id and Comment.objects.filter(jira_id=jira_id).delete()[0])
+
+
+def apply_event(event):
+    """
+    Applies one webhook event to the local copy. Returns True if anything changed.
+    """
+    payload = event.payload
+    if event.event_type in (ISSUE_CREATED, ISSUE_UPDATED):
+        return apply_issue(payload.get('issue') or {})
+    if event.event_type == ISSUE_DELETED:
+        return apply_issue_deleted(payload.get('issue') or {})
+    if event.event_type in (COMMENT_CREATED, COMMENT_UPDATED):
+        return apply_comment(payload)
+    if event.event_type == COMMENT_DELETED:
+        return apply_comment_deleted(payload)
+    return False
+
+
+@task
+def process_event(event_id):
+    """
+    Job task: applies one recorded webhook event. Failures are recorded on
+    the event and re-raised so the job queue retries them.
+    """
+    event = WebhookEvent.objects.filter(
+        pk=event_id, status__in=[WebhookEvent.STATUS_PENDING, WebhookEvent.STATUS_FAILED],
+    ).first()
+    if event is None:
+        return None
+    try:
+        changed = apply_event(event)
+    except Exception as e:
+        event.status, event.error, event.processed_at = WebhookEvent.STATUS_FAILED, str(e), timezone.now()
+        event.save(update_fields=['status', 'error', 'processed_at'])
+        raise
+    # Deletes are recorded as applied even if the row was already gone, so
+    # they still act as tombstones for late creates and updates.
+    is_delete = event.event_type in (ISSUE_DELETED, COMMENT_DELETED)
+    event.status = WebhookEvent.STATUS_APPLIED if changed or is_delete else WebhookEvent.STATUS_SKIPPED
+    event.error, event.processed_at = '', timezone.now()
+    event.save(update_fields=['status', 'error', 'processed_at'])
+    return event.status
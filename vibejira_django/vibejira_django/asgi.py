@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'vibejira_django.settings')
 
 application = get_asgi_application()
+
+# Starts job queue worker threads in this process if JOB_EMBEDDED_WORKERS is set (development).
+from jira_integration.jobs import ensure_embedded_workers  # noqa: E402
+
+ensure_embedded_workers()
@@ -72,6 +72,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'vibejira_django.wsgi.application'
+ASGI_APPLICATION = 'vibejira_django.asgi.application'
 
 
 # Database
@@ -140,9 +141,138 @@ CORS_ALLOW_CREDENTIALS = True
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'jira_integration.authentication.CachingTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
 }
+
+
+# JIRA integration
+# Timezone of the JIRA account used for syncing; JQL date literals are read in it.
+JIRA_TIMEZONE = 'UTC'
+# Issues requested per JIRA search page, and rows per bulk_create/bulk_update batch.
+JIRA_SYNC_PAGE_SIZE = 100
+JIRA_SYNC_BATCH_SIZE = 500
+# Shared HTTP client: connection pool size, timeouts (seconds) and retry/backoff policy.
+JIRA_POOL_SIZE = 10
+JIRA_TIMEOUT = 10
+JIRA_SEARCH_TIMEOUT = 30
+JIRA_MAX_RETRIES = 3
+JIRA_BACKOFF_BASE = 0.5
+JIRA_BACKOFF_MAX = 30.0
+# Connections held by each event loop's async client (ASGI ticket fetches); more concurrent
+# fetches wait for a free connection, within JIRA_TIMEOUT.
+JIRA_ASYNC_MAX_CONNECTIONS = 100
+# Circuit breaker around JIRA calls: over the last JIRA_CIRCUIT_WINDOW calls (once there are
+# at least JIRA_CIRCUIT_MIN_CALLS), it opens when this share fails (connection errors,
+# timeouts, 429 and 5xx) or takes JIRA_CIRCUIT_SLOW_CALL_SECONDS or longer. Open, it refuses
+# calls for JIRA_CIRCUIT_OPEN_SECONDS, then closes again after JIRA_CIRCUIT_HALF_OPEN_CALLS
+# trial calls in a row succeed.
+JIRA_CIRCUIT_WINDOW = 20
+JIRA_CIRCUIT_MIN_CALLS = 10
+JIRA_CIRCUIT_FAILURE_RATE = 0.5
+JIRA_CIRCUIT_SLOW_CALL_RATE = 0.5
+JIRA_CIRCUIT_SLOW_CALL_SECONDS = 5.0
+JIRA_CIRCUIT_OPEN_SECONDS = 30.0
+JIRA_CIRCUIT_HALF_OPEN_CALLS = 3
+# Process-wide cap on JIRA requests per second (None for no cap), the burst allowed above it,
+# and how long a request may wait for its turn before failing with a 429.
+JIRA_RATE_LIMIT = 20
+JIRA_RATE_BURST = 40
+JIRA_RATE_LIMIT_WAIT = 5.0
+# Batch fetches: issue keys folded into one JQL search, and concurrent requests in flight.
+JIRA_BATCH_SIZE = 50
+JIRA_BATCH_WORKERS = 8
+# Upper bound on keys accepted by POST /api/tickets/batch-retrieve/.
+TICKET_BATCH_RETRIEVE_MAX = 500
+# Ticket freshness for retrieve (seconds). Rows synced within their TTL are served as-is;
+# older rows are served immediately while a background refresh is queued. Tickets JIRA
+# hasn't updated for TICKET_COLD_AFTER seconds change rarely and get the longer TTL.
+# Tickets never synced from JIRA (created or imported locally) are never refreshed.
+TICKET_TTL = 300
+TICKET_COLD_AFTER = 7 * 24 * 3600
+TICKET_COLD_TTL = 3600
+# Keyset pagination of GET /api/tickets/ (override per request with ?page_size=).
+TICKET_PAGE_SIZE = 50
+TICKET_MAX_PAGE_SIZE = 500
+# Pages of GET /api/tickets/changes/ (override per request with ?page_size=).
+TICKET_CHANGES_PAGE_SIZE = 500
+TICKET_CHANGES_MAX_PAGE_SIZE = 2000
+# Comments embedded (newest N) in ticket detail responses, and keyset pagination of
+# GET /api/tickets/{id}/comments/ and /api/comments/.
+TICKET_DETAIL_COMMENTS = 10
+COMMENT_PAGE_SIZE = 50
+COMMENT_MAX_PAGE_SIZE = 500
+# Tickets returned per priority group by /api/dashboard/summary/ (override with ?top=).
+DASHBOARD_TOP_N = 10
+DASHBOARD_MAX_TOP_N = 100
+# Job queue for JIRA I/O (see `manage.py run_workers`): threads per worker process, idle
+# poll interval (seconds) and retry policy.
+JOB_WORKER_THREADS = 4
+JOB_POLL_INTERVAL = 1.0
+JOB_MAX_ATTEMPTS = 5
+JOB_BACKOFF_BASE = 2.0
+JOB_BACKOFF_MAX = 300.0
+# Running jobs whose lock hasn't been renewed (by their heartbeat) for this long (seconds)
+# are assumed orphaned and requeued; finished jobs are kept JOB_RESULT_TTL seconds.
+JOB_LOCK_TIMEOUT = 1800
+JOB_RESULT_TTL = 3600
+# Worker threads to run inside each web process. Off by default: jobs are run by
+# `manage.py run_workers`. For development without it, set this to e.g. 2 and runserver
+# works through the queue itself.
+# JOBS_EAGER runs every job inline as it is enqueued (for tests).
+JOB_EMBEDDED_WORKERS = 0
+JOBS_EAGER = False
+# Set when `manage.py run_workers` processes are deployed next to the web processes.
+JOB_EXTERNAL_WORKERS = False
+# How long GET /api/tickets/{jira_id}/ waits for a JIRA fetch before answering 202, and
+# after how many seconds it runs a fetch job no worker has picked up itself. With neither
+# external nor embedded workers, it runs the fetch at once.
+TICKET_FETCH_WAIT = 10
+TICKET_FETCH_INLINE_AFTER = 2.0
+# Comment sync: comments requested per JIRA page, and whether ticket refreshes queue a sync
+# of the ticket's comments (project syncs only do with `sync_jira --comments`).
+JIRA_COMMENT_PAGE_SIZE = 100
+JIRA_SYNC_COMMENTS = True
+# Outbox of local ticket edits pushed to JIRA: how long a flush waits for more edits to
+# coalesce (seconds), entries per batch, concurrent JIRA requests, attempts before an entry
+# is marked failed, and how long workflow transitions are cached per project (seconds).
+OUTBOX_FLUSH_DELAY = 2.0
+OUTBOX_BATCH_SIZE = 100
+OUTBOX_CONCURRENCY = 4
+OUTBOX_MAX_ATTEMPTS = 5
+JIRA_TRANSITION_CACHE_TTL = 3600
+# Bulk ticket writes: updates accepted per PATCH /api/tickets/bulk/, rows written per chunk
+# by POST /api/tickets/import/, and row errors an import reports (the rest are only counted).
+TICKET_BULK_UPDATE_MAX = 1000
+TICKET_IMPORT_CHUNK_SIZE = 500
+TICKET_IMPORT_MAX_ERRORS = 100
+# Rows read per query chunk (and written per response chunk) by GET /api/tickets/export/.
+TICKET_EXPORT_CHUNK_SIZE = 2000
+# Cached token authentication: seconds a token -> user lookup is reused, entries kept per
+# process, and optionally a CACHES alias (e.g. Redis) to share them between processes instead.
+AUTH_TOKEN_CACHE_TTL = 60
+AUTH_TOKEN_CACHE_SIZE = 10000
+AUTH_TOKEN_CACHE_ALIAS = None
+# Cached serialized tickets and projects: 'memory' (a per-process LRU of up to
+# RESPONSE_CACHE_MAX_BYTES of JSON), 'django' (the RESPONSE_CACHE_ALIAS cache, entries kept
+# RESPONSE_CACHE_TTL seconds) or None to serialize every response.
+RESPONSE_CACHE_BACKEND = 'memory'
+RESPONSE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+RESPONSE_CACHE_ALIAS = 'default'
+RESPONSE_CACHE_TTL = 3600
+# Ticket event stream (GET /api/tickets/stream/): events kept for Last-Event-ID resumes, how
+# often a stream polls the log (seconds), idle seconds between keepalive comments, the
+# reconnect delay sent to clients (ms), and how long a stream lasts under WSGI, where it
+# holds a worker thread (clients then reconnect and resume).
+TICKET_EVENT_LOG_SIZE = 10000
+TICKET_STREAM_POLL_INTERVAL = 1.0
+TICKET_STREAM_KEEPALIVE = 15
+TICKET_STREAM_RETRY_MS = 3000
+TICKET_STREAM_MAX_SECONDS = 300
+# Event ids are assigned at insert, not commit. Readers of the event and change logs don't
+# move past a missing id until the event after it is this many seconds old, in case the
+# missing one's transaction has yet to commit.
+TICKET_EVENT_COMMIT_LAG = 5.0